@@ -0,0 +1,100 @@
+# ================================
+# GODOFREDA AUDIO ENCODING
+# ================================
+# Encoders plugáveis: PCM 16-bit mono em memória -> WAV/Opus/MP3, sem arquivos
+# temporários. Rodam no processo do pool TTS, fora do event loop.
+# ================================
+
+import io
+import logging
+import shutil
+import struct
+import subprocess
+import wave
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+class AudioEncoder:
+    """Interface: ``encode`` recebe PCM s16le mono e devolve o arquivo pronto para servir"""
+
+    name: str = ""
+    media_type: str = "application/octet-stream"
+
+    def encode(self, pcm: bytes, sample_rate: int) -> bytes:
+        raise NotImplementedError
+
+    def stream_chunk(self, audio: bytes, first: bool) -> bytes:
+        """Trecho de uma resposta em streaming (uma frase por vez). Formatos em que
+        arquivos concatenados continuam válidos (MP3, Ogg encadeado) usam o próprio arquivo
+        (``audio`` pode ser uma memoryview do cache; o StreamingResponse exige bytes)."""
+        return bytes(audio)
+
+
+class WavEncoder(AudioEncoder):
+    name = "wav"
+    media_type = "audio/wav"
+
+    def encode(self, pcm: bytes, sample_rate: int) -> bytes:
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(sample_rate)
+            wav.writeframes(pcm)
+        return buffer.getvalue()
+
+    def stream_chunk(self, audio: bytes, first: bool) -> bytes:
+        # Um único WAV: cabeçalho de streaming (tamanhos desconhecidos) + PCM de cada frase
+        with wave.open(io.BytesIO(audio), "rb") as wav:
+            frames = wav.readframes(wav.getnframes())
+            if not first:
+                return frames
+            rate = wav.getframerate()
+        header = struct.pack(
+            "<4sI4s4sIHHIIHH4sI",
+            b"RIFF", 0xFFFFFFFF, b"WAVE", b"fmt ", 16, 1, 1, rate, rate * 2, 2, 16, b"data", 0xFFFFFFFF,
+        )
+        return header + frames
+
+
+class FFmpegEncoder(AudioEncoder):
+    """Codifica via ffmpeg com stdin/stdout em pipe (nenhum arquivo em disco)"""
+
+    def __init__(self, name: str, media_type: str, args: List[str]):
+        self.name = name
+        self.media_type = media_type
+        self.args = args
+
+    def encode(self, pcm: bytes, sample_rate: int) -> bytes:
+        result = subprocess.run(
+            ["ffmpeg", "-hide_banner", "-loglevel", "error",
+             "-f", "s16le", "-ar", str(sample_rate), "-ac", "1", "-i", "pipe:0",
+             *self.args, "pipe:1"],
+            input=pcm, capture_output=True, check=True,
+        )
+        return result.stdout
+
+
+ENCODERS: Dict[str, AudioEncoder] = {}
+
+
+def register_encoder(encoder: AudioEncoder) -> None:
+    """Registra um encoder; precisa acontecer no import do módulo para valer também nos workers (spawn)"""
+    ENCODERS[encoder.name] = encoder
+
+
+def get_encoder(name: str) -> AudioEncoder:
+    try:
+        return ENCODERS[name]
+    except KeyError:
+        raise ValueError(f"Formato de áudio não suportado: {name} (disponíveis: {', '.join(ENCODERS)})")
+
+
+register_encoder(WavEncoder())
+if shutil.which("ffmpeg"):
+    register_encoder(FFmpegEncoder("opus", "audio/ogg", ["-c:a", "libopus", "-b:a", "32k", "-f", "ogg"]))
+    register_encoder(FFmpegEncoder("mp3", "audio/mpeg", ["-c:a", "libmp3lame", "-b:a", "64k", "-f", "mp3"]))
+else:
+    logger.info("ffmpeg não encontrado: apenas WAV disponível para TTS")
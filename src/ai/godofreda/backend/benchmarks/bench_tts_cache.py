@@ -0,0 +1,78 @@
+# ================================
+# GODOFREDA TTS CACHE FORMAT BENCHMARK
+# ================================
+# Custo de um hit no cache TTS, depois do GET no Redis: formato antigo
+# (pickle de dict + zlib) vs cabeçalho binário + áudio servido como está,
+# e a camada de disco (mmap) para entradas grandes.
+#
+# Uso (a partir de src/ai/godofreda/backend):
+#     python -m benchmarks.bench_tts_cache
+#     python -m benchmarks.bench_tts_cache --seconds 2 8 30 --rounds 500
+#
+# O áudio é PCM com ruído (fala real comprime pouco, como ruído), em WAV 22.05 kHz.
+# ================================
+
+import argparse
+import os
+import pickle
+import tempfile
+import time
+import zlib
+
+from audio_encoding import get_encoder
+from tts_cache import TTSCache, pack_entry, unpack_entry
+
+
+def legacy_entry(audio: bytes) -> bytes:
+    """Como o cache_audio antigo gravava"""
+    compressed = zlib.compress(audio, level=6)
+    is_compressed = len(compressed) < len(audio)
+    return pickle.dumps({
+        "audio": compressed if is_compressed else audio,
+        "compressed": is_compressed,
+        "audio_size": len(audio),
+        "created_at": time.time(),
+    })
+
+
+def legacy_read(blob: bytes) -> bytes:
+    info = pickle.loads(blob)
+    return zlib.decompress(info["audio"]) if info["compressed"] else info["audio"]
+
+
+def timed(func, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - start) / rounds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Leitura de entradas do cache TTS por formato")
+    parser.add_argument("--seconds", type=float, nargs="+", default=[2, 8, 30], help="duração do áudio")
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    wav = get_encoder("wav")
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = TTSCache.__new__(TTSCache)
+        cache.cache_dir = tmp
+        print(f"{'áudio':>8} {'tamanho':>10} {'pickle+zlib':>14} {'binário':>12} {'disco (mmap)':>14}")
+        for seconds in args.seconds:
+            audio = wav.encode(os.urandom(int(22050 * seconds)) * 2, 22050)
+            old, new = legacy_entry(audio), pack_entry(audio, "wav", 1.0)
+            cache._write_spilled("bench", new)
+            assert legacy_read(old) == audio == bytes(unpack_entry(new)[3]) == bytes(cache._map_spilled("bench"))
+
+            results = [
+                timed(lambda: legacy_read(old), args.rounds),
+                timed(lambda: unpack_entry(new), args.rounds),
+                timed(lambda: cache._map_spilled("bench"), args.rounds),
+            ]
+            print(f"{seconds:7.0f}s {len(audio) / 1024:8.0f} KB " + " ".join(
+                f"{r * 1e6:11.1f} µs" for r in results
+            ) + f"   (pickle+zlib ocupa {len(old) / len(audio):.0%} do WAV)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+# ================================
+# GODOFREDA TTS POOL BENCHMARK
+# ================================
+# Throughput de síntese e latência do event loop (proxy do /health) com a
+# síntese no event loop vs no TTSWorkerPool com 1..N processos.
+#
+# Uso (a partir de src/ai/godofreda/backend):
+#     python -m benchmarks.bench_tts_pool
+#     python -m benchmarks.bench_tts_pool --requests 64 --workers 1 2 4 8 --work-ms 200
+#     python -m benchmarks.bench_tts_pool --coqui     # modelo real (config.tts.model)
+#
+# Sem --coqui o motor é sintético: laço puro de CPU calibrado para ~--work-ms por
+# síntese, 1 thread, sem torch. Escala com núcleos físicos, não com --workers.
+# ================================
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+from tts_service import TTSWorkerPool, coqui_engine
+
+
+class BurnEngine:
+    """Motor sintético: gasta CPU fixa por síntese, devolve 1 s de silêncio em PCM"""
+
+    def __init__(self, iterations: int):
+        self.iterations = iterations
+
+    @staticmethod
+    def calibrate(work_ms: float) -> int:
+        n, start = 500_000, time.perf_counter()
+        BurnEngine._burn(n)
+        return max(1, int(n * work_ms / 1000 / (time.perf_counter() - start)))
+
+    @staticmethod
+    def _burn(n: int) -> int:
+        acc = 0
+        for i in range(n):
+            acc = (acc * 31 + i) & 0xFFFFFFFF
+        return acc
+
+    def synthesize(self, text: str, language: str, speaker: str):
+        self._burn(self.iterations)
+        return bytes(2 * 22050), 22050
+
+
+class BurnFactory:
+    """Picklável para o initializer dos processos (spawn); calibrado uma vez, no processo pai,
+    para todos os workers fazerem o mesmo trabalho mesmo subindo em paralelo"""
+
+    def __init__(self, work_ms: float):
+        self.iterations = BurnEngine.calibrate(work_ms)
+
+    def __call__(self, threads: int) -> BurnEngine:
+        return BurnEngine(self.iterations)
+
+
+async def probe_loop(stop: asyncio.Event, lags: list) -> None:
+    """Atraso do event loop a cada 10 ms: é o que um GET /health esperaria"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        lags.append(time.perf_counter() - start - 0.01)
+
+
+async def run(label: str, synthesize, requests: int, concurrency: int) -> None:
+    stop, lags = asyncio.Event(), []
+    probe = asyncio.create_task(probe_loop(stop, lags))
+    queue = iter(range(requests))
+
+    async def worker():
+        for i in queue:
+            await synthesize(f"Frase de teste número {i}.")
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe
+    lags.sort()
+    p99 = lags[int(len(lags) * 0.99) - 1] if lags else 0.0
+    print(f"{label:<22} {requests / elapsed:7.2f} sínteses/s   "
+          f"atraso do loop p50 {statistics.median(lags or [0]) * 1000:7.1f} ms  p99 {p99 * 1000:7.1f} ms")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark do pool de inferência TTS")
+    parser.add_argument("--requests", type=int, default=32)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--work-ms", type=float, default=100, help="custo da síntese no motor sintético")
+    parser.add_argument("--coqui", action="store_true", help="usa o modelo Coqui real em vez do motor sintético")
+    args = parser.parse_args()
+
+    factory = coqui_engine if args.coqui else BurnFactory(args.work_ms)
+    print(f"{args.requests} sínteses, concorrência {args.concurrency}, {os.cpu_count()} CPUs, "
+          f"motor {'coqui' if args.coqui else f'sintético {args.work_ms:.0f} ms'}")
+
+    engine = factory(1)
+
+    async def inline(text: str) -> bytes:
+        return engine.synthesize(text, "pt", "p230")[0]  # como antes: bloqueia o event loop
+
+    await run("no event loop", inline, args.requests, args.concurrency)
+
+    for workers in args.workers:
+        pool = TTSWorkerPool(
+            workers=workers, threads_per_worker=1, max_queue=args.requests, timeout=3600, factory=factory
+        )
+        await pool.start()
+        try:
+            await run(f"pool {workers} processo(s)", pool.synthesize, args.requests, args.concurrency)
+        finally:
+            await pool.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,102 @@
+# ================================
+# GODOFREDA STREAMING TTS BENCHMARK
+# ================================
+# Tempo até o primeiro byte de áudio (TTFB) e tempo total do chat multimodal:
+# resposta inteira do LLM -> síntese única  vs  tokens -> frases -> síntese concorrente.
+#
+# Uso (a partir de src/ai/godofreda/backend):
+#     python -m benchmarks.bench_tts_stream
+#     python -m benchmarks.bench_tts_stream --workers 4 --token-ms 40 --ms-per-char 3
+#
+# O LLM é simulado (um token a cada --token-ms) e o motor TTS é sintético, com
+# custo proporcional ao tamanho do texto (--ms-per-char), como nos modelos reais.
+# ================================
+
+import argparse
+import asyncio
+import os
+import time
+
+from benchmarks.bench_tts_pool import BurnEngine
+from speech_stream import split_sentences, stream_speech
+from tts_service import TTSWorkerPool
+
+RESPONSE = (
+    "Ah, claro, mais uma pergunta brilhante para a minha coleção. "
+    "Vou responder mesmo assim, porque sou generosa. "
+    "A resposta curta é que depende do contexto, como quase tudo na vida. "
+    "A resposta longa envolve detalhes que você provavelmente vai ignorar. "
+    "Mas tudo bem, pelo menos agora você sabe onde procurar."
+)
+
+
+class TextBurnEngine(BurnEngine):
+    """Custo proporcional ao número de caracteres; devolve PCM de duração proporcional"""
+
+    def synthesize(self, text: str, language: str, speaker: str):
+        self._burn(self.iterations * len(text))
+        return bytes(2 * 220 * len(text)), 22050  # ~10 ms de áudio por caractere
+
+
+class TextBurnFactory:
+    def __init__(self, ms_per_char: float):
+        self.iterations = BurnEngine.calibrate(ms_per_char)
+
+    def __call__(self, threads: int) -> TextBurnEngine:
+        return TextBurnEngine(self.iterations)
+
+
+async def fake_llm(token_ms: float):
+    for token in RESPONSE.split(" "):
+        await asyncio.sleep(token_ms / 1000)
+        yield token + " "
+
+
+async def batch(pool: TTSWorkerPool, token_ms: float):
+    start = time.perf_counter()
+    text = "".join([token async for token in fake_llm(token_ms)])
+    await pool.synthesize(text.strip(), audio_format="wav")
+    first = time.perf_counter() - start
+    return first, first
+
+
+async def streaming(pool: TTSWorkerPool, token_ms: float, lookahead: int):
+    start, first = time.perf_counter(), None
+    async for _ in stream_speech(split_sentences(fake_llm(token_ms)), "wav", lookahead, pool):
+        if first is None:
+            first = time.perf_counter() - start
+    return first, time.perf_counter() - start
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="TTFB do chat multimodal: síntese única vs streaming por frase")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--lookahead", type=int, default=2)
+    parser.add_argument("--token-ms", type=float, default=30, help="intervalo entre tokens do LLM simulado")
+    parser.add_argument("--ms-per-char", type=float, default=2, help="custo da síntese por caractere")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    pool = TTSWorkerPool(
+        workers=args.workers, threads_per_worker=1, max_queue=16, timeout=3600,
+        factory=TextBurnFactory(args.ms_per_char),
+    )
+    await pool.start()
+    tokens = len(RESPONSE.split(" "))
+    print(f"{tokens} tokens a cada {args.token_ms:.0f} ms, {len(RESPONSE)} caracteres a {args.ms_per_char} ms/caractere, "
+          f"{args.workers} workers, lookahead {args.lookahead}, {os.cpu_count()} CPUs")
+    try:
+        for label, run in (
+            ("resposta inteira", lambda: batch(pool, args.token_ms)),
+            ("streaming por frase", lambda: streaming(pool, args.token_ms, args.lookahead)),
+        ):
+            results = [await run() for _ in range(args.rounds)]
+            ttfb = min(r[0] for r in results)
+            total = min(r[1] for r in results)
+            print(f"{label:<22} primeiro byte {ttfb * 1000:7.0f} ms   total {total * 1000:7.0f} ms")
+    finally:
+        await pool.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
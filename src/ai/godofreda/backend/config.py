@@ -23,6 +23,14 @@ class APIConfig:
             self.cors_origins = os.getenv("CORS_ORIGINS", "http://localhost:3000,http://localhost:8501").split(",")
         self.max_text_length = int(os.getenv("MAX_TEXT_LENGTH", self.max_text_length))
 
+# Respostas de fallback do LLM e frases que se repetem em toda sessão
+DEFAULT_WARM_PHRASES = "|".join([
+    "Interessante. Deixe-me processar isso com minha inteligência superior.",
+    "Você realmente acha que isso é uma pergunta inteligente?",
+    "Bem, pelo menos você tentou. Vou dar uma resposta útil, mesmo que você não mereça.",
+    "Analisando... Analisando... Ah, encontrei uma resposta que talvez você consiga entender.",
+])
+
 @dataclass
 class TTSConfig:
     """Configurações do TTS"""
@@ -30,12 +38,39 @@ class TTSConfig:
     default_speaker: str = "p230"
     temp_dir: str = "app/tts_temp"
     coqui_tos_agreed: bool = True
+    # Pool de inferência: cada processo carrega o próprio modelo
+    workers: int = 0                # 0 = metade dos núcleos (mínimo 1)
+    threads_per_worker: int = 0     # 0 = núcleos / workers (evita oversubscription do torch)
+    max_queue: int = 16             # requisições aguardando além das em execução
+    timeout: float = 60.0           # segundos por síntese (inclui a espera na fila)
+    audio_format: str = "wav"       # wav | opus | mp3 (opus/mp3 exigem ffmpeg)
+    stream_lookahead: int = 2       # frases sintetizando em paralelo por resposta em streaming
+    cache_ttl: int = 7 * 24 * 3600  # segundos; áudio só muda se texto/voz/modelo/formato mudarem
+    cache_dir: str = "app/tts_cache"        # camada de disco do cache (entradas grandes)
+    cache_spill_bytes: int = 256 * 1024     # acima disso o áudio vai para o disco, não para o Redis
+    cache_cleanup_interval: int = 3600      # segundos entre remoções de arquivos expirados do disco
+    warm_phrases: Optional[List[str]] = None  # sintetizadas no startup (TTS_WARM_PHRASES, separadas por "|")
     
     def __post_init__(self):
         self.model = os.getenv("TTS_MODEL", self.model)
         self.default_speaker = os.getenv("TTS_SPEAKER", self.default_speaker)
         self.temp_dir = os.getenv("TTS_TEMP_DIR", self.temp_dir)
         self.coqui_tos_agreed = bool(int(os.getenv("COQUI_TOS_AGREED", "1")))
+        cpus = os.cpu_count() or 1
+        self.workers = int(os.getenv("TTS_WORKERS", self.workers)) or max(1, cpus // 2)
+        self.threads_per_worker = (
+            int(os.getenv("TTS_THREADS_PER_WORKER", self.threads_per_worker)) or max(1, cpus // self.workers)
+        )
+        self.max_queue = int(os.getenv("TTS_MAX_QUEUE", self.max_queue))
+        self.timeout = float(os.getenv("TTS_TIMEOUT", self.timeout))
+        self.audio_format = os.getenv("TTS_AUDIO_FORMAT", self.audio_format)
+        self.stream_lookahead = max(1, int(os.getenv("TTS_STREAM_LOOKAHEAD", self.stream_lookahead)))
+        self.cache_ttl = int(os.getenv("TTS_CACHE_TTL", self.cache_ttl))
+        self.cache_dir = os.getenv("TTS_CACHE_DIR", self.cache_dir)
+        self.cache_spill_bytes = int(os.getenv("TTS_CACHE_SPILL_BYTES", self.cache_spill_bytes))
+        self.cache_cleanup_interval = max(60, int(os.getenv("TTS_CACHE_CLEANUP_INTERVAL", self.cache_cleanup_interval)))
+        if self.warm_phrases is None:
+            self.warm_phrases = [p for p in os.getenv("TTS_WARM_PHRASES", DEFAULT_WARM_PHRASES).split("|") if p.strip()]
 
 @dataclass
 class LLMConfig:
@@ -127,12 +162,14 @@ class Config:
         # Criar diretórios necessários (usar caminhos absolutos)
         try:
             os.makedirs(self.tts.temp_dir, exist_ok=True)
+            os.makedirs(self.tts.cache_dir, exist_ok=True)
             os.makedirs(os.path.dirname(self.logging.file_path), exist_ok=True)
         except OSError as e:
             # Se não conseguir criar diretórios, usar alternativas
             print(f"Aviso: Não foi possível criar diretórios: {e}")
             # Usar /tmp como fallback
             self.tts.temp_dir = "/tmp/tts_temp"
+            self.tts.cache_dir = "/tmp/godofreda_tts_cache"
             self.logging.file_path = "/tmp/godofreda.log"
         
         # Validar configurações críticas
@@ -6,7 +6,7 @@ Serviço para integração com modelos de linguagem locais via Ollama
 import asyncio
 import logging
 import json
-from typing import Optional, Dict, Any, List
+from typing import AsyncIterator, Optional, Dict, Any, List
 import httpx
 from config import config
 
@@ -133,6 +133,49 @@ class GodofredaLLM:
             logger.error(f"Error generating LLM response: {e}")
             return self._fallback_response(user_input)
     
+    async def stream_response(self, user_input: str, context: str = "") -> AsyncIterator[str]:
+        """
+        Gera resposta em streaming ("stream": true): produz os fragmentos de texto
+        conforme o Ollama os envia (uma linha JSON por fragmento)
+        
+        Args:
+            user_input: Entrada do usuário
+            context: Contexto adicional
+            
+        Yields:
+            Fragmentos da resposta; se nada chegar do LLM, a resposta de fallback inteira
+        """
+        data = {
+            "model": self.model,
+            "prompt": self._build_prompt(user_input, context),
+            "stream": True,
+            "options": {
+                "temperature": 0.7,
+                "top_p": 0.9,
+                "max_tokens": 500
+            }
+        }
+        received = False
+        try:
+            if not self.client:
+                raise ConnectionError("LLM client not initialized")
+            async with self.client.stream("POST", "/api/generate", json=data) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    chunk = json.loads(line)
+                    if chunk.get("response"):
+                        received = True
+                        yield chunk["response"]
+                    if chunk.get("done"):
+                        break
+        except Exception as e:
+            logger.error(f"Error streaming LLM response: {e}")
+        if not received:
+            logger.warning("No response from LLM, using fallback")
+            yield self._fallback_response(user_input)
+    
     def _build_prompt(self, user_input: str, context: str = "") -> str:
         """Constrói prompt com personalidade da Godofreda"""
         base_prompt = """Você é a Godofreda, uma IA VTuber sarcástica e irreverente. 
@@ -3,21 +3,20 @@ Godofreda API - IA VTuber Multimodal
 API principal para conversação com IA sarcástica e síntese de voz
 """
 
-from fastapi import FastAPI, HTTPException, Request, Form, File, UploadFile, BackgroundTasks, Depends
-from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from fastapi import FastAPI, HTTPException, Request, Form, File, UploadFile, Depends
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 
-from TTS.api import TTS
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, generate_latest
 import uvicorn
 import os
-import uuid
 import time
 import logging
 from datetime import datetime
 import json
-import io
-from typing import Optional, Dict, Any
+import base64
+from typing import AsyncIterator, Optional, Dict, Any, Tuple
 import asyncio
 from contextlib import asynccontextmanager
 import sys
@@ -32,7 +31,10 @@ from config import config
 from cache_service import response_cache, cached_response, cache_service
 from rate_limiter import rate_limiter, check_rate_limit, rate_limit_decorator
 from cleanup_service import cleanup_service, start_background_cleanup
-from tts_cache import tts_cache
+from tts_cache import AudioData, tts_cache
+from tts_service import tts_pool, TTSQueueFull, TTSTimeout, TTSUnavailable
+from audio_encoding import get_encoder
+from speech_stream import split_sentences, stream_speech
 
 
 # ================================
@@ -128,37 +130,21 @@ app.add_middleware(
 # ================================
 # MÉTRICAS SIMPLIFICADAS
 # ================================
-# Métricas removidas para simplificação
+# Métricas do pool TTS ficam em tts_service.py; aqui só os erros por tipo
+ERROR_COUNT = Counter("godofreda_errors_total", "Erros da API por tipo", ["type"])
 
 # ================================
-# INICIALIZAÇÃO DO TTS
+# TTS
 # ================================
-def initialize_tts() -> TTS:
-    """Inicializa o modelo TTS com tratamento de erro"""
-    try:
-        # Criar diretório temporário se não existir
-        os.makedirs(config.tts.temp_dir, exist_ok=True)
-        
-        # Configurar variável de ambiente para aceitar licença automaticamente
-        os.environ['COQUI_TOS_AGREED'] = '1'
-        
-        tts = TTS(model_name=config.tts.model)
-        logger.info("TTS model loaded successfully")
-        return tts
-    except Exception as e:
-        logger.error(f"Failed to load TTS model: {e}")
-        raise
-
-# Inicializar TTS globalmente
-try:
-    tts = initialize_tts()
-except Exception as e:
-    logger.error(f"Critical: TTS initialization failed: {e}")
-    tts = None
+# O modelo é carregado pelos processos do tts_pool (tts_service.py), iniciado no
+# lifespan; a síntese nunca roda no event loop.
 
 # Inicializar LLM globalmente (singleton)
 llm_instance = None
 
+# Tasks de fundo do lifespan (referência forte até o shutdown)
+_background_tasks: set = set()
+
 # ================================
 # MIDDLEWARE SIMPLIFICADO
 # ================================
@@ -238,14 +224,14 @@ async def health_check() -> Dict[str, str]:
 async def readiness_check() -> Response:
     """Verificação de prontidão"""
     try:
-        if tts is not None:
+        if tts_pool.ready:
             return JSONResponse(
                 content={"status": "ready", "timestamp": datetime.now().isoformat()}
             )
         else:
             return JSONResponse(
                 status_code=503,
-                content={"status": "not ready", "reason": "TTS model not loaded"}
+                content={"status": "not ready", "reason": "TTS pool not ready"}
             )
     except Exception as e:
         return JSONResponse(
@@ -253,6 +239,13 @@ async def readiness_check() -> Response:
             content={"status": "not ready", "reason": str(e)}
         )
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    """Métricas Prometheus (pool TTS, fila, durações)"""
+    if not config.monitoring.prometheus_enabled:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 @app.get("/health/live")
 async def liveness_check() -> Dict[str, str]:
     """Verificação de vitalidade"""
@@ -265,10 +258,11 @@ async def status() -> Dict[str, Any]:
     """Status detalhado do sistema"""
     return {
         "system": {
-            "status": "online" if SYSTEM_STATUS._value.get() == 1 else "offline",
+            "status": "online" if tts_pool.ready else "offline",
             "tts_model": config.tts.model,
             "uptime": "running"
         },
+        "tts_pool": tts_pool.stats(),
         "status": "simplified",
         "timestamp": datetime.now().isoformat()
     }
@@ -299,52 +293,18 @@ async def get_personality() -> Dict[str, Any]:
 # ================================
 @app.post("/falar")
 @rate_limit_decorator("tts")
-async def sintetizar_voz(background_tasks: BackgroundTasks, texto: str = Form(...)) -> FileResponse:
-    """Sintetiza texto em áudio usando TTS"""
-    try:
-        # Verificar se o TTS está disponível
-        if SYSTEM_STATUS._value.get() != 1 or tts is None:
-            raise HTTPException(status_code=503, detail="TTS service unavailable")
-        
-        # Validar entrada
-        validate_text_input(texto)
-        
-        # Incrementar contador de requisições TTS
-        TTS_REQUEST_COUNT.inc()
-        
-        # Gerar nome único para o arquivo
-        output_path = f"{config.tts.temp_dir}/{uuid.uuid4()}.wav"
-        
-        # Medir duração da síntese
-        start_time = time.time()
-        
-        # Gerar áudio com speaker padrão
-        tts.tts_to_file(
-            text=texto,
-            language="pt",
-            file_path=output_path,
-            speaker=config.tts.default_speaker
-        )
-        
-        # Registrar duração
-        duration = time.time() - start_time
-        TTS_DURATION.observe(duration)
-        
-        # Log de sucesso
-        logger.info(f"TTS request completed successfully. Text: '{texto[:50]}...', Duration: {duration:.2f}s")
-        
-        # Adicionar tarefa de limpeza
-        background_tasks.add_task(lambda: os.remove(output_path) if os.path.exists(output_path) else None)
-        
-        return FileResponse(output_path, media_type="audio/wav")
-
-    except HTTPException:
-        raise
-    except Exception as e:
-        # Registrar erro
-        ERROR_COUNT.labels(type="tts_error").inc()
-        logger.error(f"TTS error: {e}")
-        raise HTTPException(status_code=500, detail=f"Erro na síntese de voz: {str(e)}")
+async def sintetizar_voz(texto: str = Form(...), formato: Optional[str] = Form(None)) -> Response:
+    """Sintetiza texto em áudio usando TTS (formato: wav, opus ou mp3 quando há ffmpeg)"""
+    # Validar entrada
+    validate_text_input(texto)
+    encoder = resolve_encoder(formato)
+    
+    start_time = time.time()
+    audio = await synthesize_or_raise(texto, encoder.name)
+    logger.info(f"TTS request completed successfully. Text: '{texto[:50]}...', Duration: {time.time() - start_time:.2f}s")
+    
+    # Servido direto do buffer em memória (ou do cache: valor Redis / mmap, sem cópia)
+    return AudioResponse(content=audio, media_type=encoder.media_type)
 
 # ================================
 # ENDPOINTS DE CHAT
@@ -380,12 +340,17 @@ async def chat_endpoint(user_input: str = Form(...), context: str = Form("")) ->
 async def multimodal_chat(
     text: str = Form(...),
     image: Optional[UploadFile] = File(None),
-    voice: Optional[UploadFile] = File(None)
-) -> StreamingResponse:
-    """Chat multimodal com suporte a texto, imagem e voz"""
+    voice: Optional[UploadFile] = File(None),
+    stream: bool = Form(True)
+) -> Response:
+    """Chat multimodal com suporte a texto, imagem e voz
+    
+    Com ``stream`` (padrão) o áudio sai em chunks, frase a frase, enquanto o LLM
+    ainda gera; sem ele, a resposta inteira é sintetizada e o texto vai em X-Response-Text.
+    """
     try:
         # Verificar se o TTS está disponível
-        if SYSTEM_STATUS._value.get() != 1 or tts is None:
+        if not tts_pool.ready:
             raise HTTPException(status_code=503, detail="TTS service unavailable")
         
         # Validar entrada de texto
@@ -413,6 +378,19 @@ async def multimodal_chat(
             final_text += f" {transcription}"
             logger.info(f"Voice transcription completed for: {voice.filename}")
         
+        encoder = resolve_encoder(None)
+        if stream:
+            if llm_instance is None:
+                raise HTTPException(status_code=503, detail="LLM service unavailable")
+            if not tts_pool.has_capacity:
+                raise HTTPException(
+                    status_code=503, detail="TTS ocupado, tente novamente em instantes", headers={"Retry-After": "5"}
+                )
+            return StreamingResponse(
+                speech_chunks(final_text, context, encoder.name),
+                media_type=encoder.media_type
+            )
+        
         # Gerar resposta com personalidade da Godofreda
         godofreda_response = await generate_response_with_personality(
             user_input=final_text,
@@ -420,13 +398,13 @@ async def multimodal_chat(
         )
         
         # Converter resposta para áudio
-        audio_response = await text_to_speech_response(godofreda_response)
+        audio_response = await synthesize_or_raise(godofreda_response, encoder.name)
         
         logger.info(f"Multimodal chat completed successfully. Input: '{text[:50]}...'")
         
-        return StreamingResponse(
-            io.BytesIO(audio_response),
-            media_type="audio/wav",
+        return AudioResponse(
+            content=audio_response,
+            media_type=encoder.media_type,
             headers={"X-Response-Text": godofreda_response}
         )
         
@@ -468,36 +446,68 @@ async def generate_response_with_personality(user_input: str, context: str = "")
     
     return await llm_instance.generate_response(user_input, context)
 
-async def text_to_speech_response(text: str) -> bytes:
-    """Converte texto para áudio usando TTS"""
+class AudioResponse(Response):
+    """Aceita a memoryview do cache TTS (valor Redis ou mmap do disco) sem copiar para bytes"""
+    
+    def render(self, content: Any) -> Any:
+        if isinstance(content, memoryview):
+            return content
+        return super().render(content)
+
+def resolve_encoder(audio_format: Optional[str]):
+    """Encoder do formato pedido (ou o padrão da configuração); 400 se indisponível"""
     try:
-        # Gerar nome único para o arquivo temporário
-        output_path = f"{config.tts.temp_dir}/{uuid.uuid4()}.wav"
-        
-        # Gerar áudio
-        if tts is not None:
-            tts.tts_to_file(
-                text=text,
-                language="pt",
-                file_path=output_path,
-                speaker=config.tts.default_speaker
-            )
-        else:
-            raise HTTPException(status_code=503, detail="TTS service unavailable")
-        
-        # Ler arquivo e retornar bytes
-        with open(output_path, 'rb') as f:
-            audio_bytes = f.read()
-        
-        # Limpar arquivo temporário
-        os.remove(output_path)
-        
-        return audio_bytes
-        
+        return get_encoder(audio_format or config.tts.audio_format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+async def synthesize_or_raise(text: str, audio_format: Optional[str] = None) -> AudioData:
+    """Sintetiza no pool TTS (via cache), convertendo falhas do pool em respostas HTTP"""
+    audio, _ = await synthesize_cached_or_raise(text, audio_format)
+    return audio
+
+async def synthesize_cached_or_raise(
+    text: str, audio_format: Optional[str] = None, speaker: Optional[str] = None
+) -> Tuple[AudioData, bool]:
+    """Como ``synthesize_or_raise``, indicando também se o áudio veio do cache"""
+    try:
+        return await tts_cache.get_or_synthesize(
+            text, speaker=speaker or config.tts.default_speaker, language="pt", audio_format=audio_format
+        )
+    except TTSQueueFull:
+        raise HTTPException(
+            status_code=503, detail="TTS ocupado, tente novamente em instantes", headers={"Retry-After": "5"}
+        )
+    except TTSUnavailable:
+        raise HTTPException(status_code=503, detail="TTS service unavailable")
+    except TTSTimeout:
+        raise HTTPException(status_code=504, detail="Tempo limite da síntese de voz excedido")
     except Exception as e:
-        logger.error(f"TTS error in chat: {e}")
+        logger.error(f"TTS error: {e}")
         raise HTTPException(status_code=500, detail="Erro na síntese de voz")
 
+async def speech_chunks(user_input: str, context: str, audio_format: str) -> AsyncIterator[bytes]:
+    """Tokens do Ollama -> frases -> áudio, para o StreamingResponse do chat multimodal"""
+    start_time = time.time()
+    chunks = 0
+    sentences = split_sentences(llm_instance.stream_response(user_input, context))
+    try:
+        async for chunk in stream_speech(sentences, audio_format):
+            if chunks == 0:
+                logger.info(f"Streaming chat: primeiro áudio em {time.time() - start_time:.2f}s")
+            chunks += 1
+            yield chunk
+    except Exception as e:
+        # Status já enviado: só resta encerrar o stream
+        ERROR_COUNT.labels(type="chat_error").inc()
+        logger.error(f"Streaming chat interrompido após {chunks} frase(s): {e}")
+        return
+    logger.info(f"Streaming chat concluído: {chunks} frase(s) em {time.time() - start_time:.2f}s")
+
+async def text_to_speech_response(text: str, audio_format: Optional[str] = None) -> AudioData:
+    """Converte texto para áudio usando TTS"""
+    return await synthesize_or_raise(text, audio_format)
+
 # ================================
 # DEPENDENCIES
 # ================================
@@ -580,7 +590,7 @@ async def generate_tts(
     cache: Any = Depends(get_cache),
     rate_limit: bool = Depends(check_rate_limit)
 ):
-    """Gera áudio TTS"""
+    """Gera áudio TTS (base64, no formato padrão da configuração)"""
     start_time = time.time()
     
     try:
@@ -588,34 +598,18 @@ async def generate_tts(
         if not text or len(text) > config.api.max_text_length:
             raise HTTPException(status_code=400, detail="Texto inválido")
         
-        # Configuração da voz
-        voice_config = {"speaker": speaker, "model": config.tts.model}
-        
-        # Tentar cache primeiro
-        cached_audio = await tts_cache.get_cached_audio(text, voice_config)
-        if cached_audio:
-            duration = time.time() - start_time
-            
-            return {
-                "audio": cached_audio,
-                "cached": True,
-                "duration": duration
-            }
-        
-        # Gerar áudio (implementação do TTS aqui)
-        # audio_data = await tts_service.generate_audio(text, speaker)
-        
-        # Cachear resultado
-        # await tts_cache.cache_audio(text, voice_config, audio_data)
-        
+        audio_data, cached = await synthesize_cached_or_raise(text, speaker=speaker)
         duration = time.time() - start_time
         
         return {
-            "audio": "audio_data_placeholder",
-            "cached": False,
+            "audio": base64.b64encode(audio_data).decode("ascii"),
+            "format": config.tts.audio_format,
+            "cached": cached,
             "duration": duration
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         duration = time.time() - start_time
         logger.error(f"Erro na geração TTS: {e}")
@@ -667,9 +661,7 @@ async def get_stats():
             "api": {
                 "status": "simplified"
             },
-            "tts": {
-                "status": "simplified"
-            },
+            "tts": tts_pool.stats(),
             "llm": {
                 "status": "simplified"
             },
@@ -714,6 +706,21 @@ async def _startup_services():
     # Iniciar serviço de limpeza
     await cleanup_service.start()
     
+    # Iniciar pool de inferência TTS (carrega o modelo em cada processo)
+    try:
+        await tts_pool.start()
+    except Exception as e:
+        logger.error(f"Critical: TTS initialization failed: {e}")
+    else:
+        # Frases frequentes já sintetizadas antes do primeiro pedido (em segundo plano)
+        prewarm = asyncio.create_task(tts_cache.prewarm(config.tts.warm_phrases))
+        _background_tasks.add(prewarm)
+        prewarm.add_done_callback(_background_tasks.discard)
+    # Arquivos do cache em disco não expiram com o Redis: limpeza periódica
+    cleanup = asyncio.create_task(tts_cache.run_cleanup(config.tts.cache_cleanup_interval))
+    _background_tasks.add(cleanup)
+    cleanup.add_done_callback(_background_tasks.discard)
+    
     # Inicializar LLM
     try:
         llm_instance = GodofredaLLM()
@@ -728,6 +735,11 @@ async def _shutdown_services():
     # Parar serviço de limpeza
     await cleanup_service.stop()
     
+    # Parar pré-aquecimento, limpeza do cache TTS e pool TTS
+    for task in _background_tasks:
+        task.cancel()
+    await tts_pool.stop()
+    
     # Fechar conexões
     await cache_service.close()
     await get_llm_instance().close()
@@ -4,12 +4,14 @@
 # Sistema de rate limiting para proteger a API
 # ================================
 
+import functools
 import time
 import asyncio
 import os
 from typing import Dict, Tuple
 import logging
 import redis.asyncio as redis
+from fastapi import HTTPException
 from config import config
 
 logger = logging.getLogger(__name__)
@@ -152,6 +154,7 @@ async def check_rate_limit(request, endpoint: str = "default") -> None:
 def rate_limit_decorator(endpoint: str = "default"):
     """Decorator para aplicar rate limiting em endpoints"""
     def decorator(func):
+        @functools.wraps(func)
         async def wrapper(*args, **kwargs):
             try:
                 # Encontrar o objeto request nos argumentos
@@ -163,13 +166,14 @@ def rate_limit_decorator(endpoint: str = "default"):
                 
                 if request:
                     await check_rate_limit(request, endpoint)
-                
-                return await func(*args, **kwargs)
-                
+            except HTTPException:
+                raise
             except Exception as e:
                 logger.error(f"Error in rate limit decorator: {e}")
                 # Em caso de erro, permitir a requisição
-                return await func(*args, **kwargs)
+            
+            # Fora do try: erros do endpoint (503 do pool TTS etc.) não podem re-executá-lo
+            return await func(*args, **kwargs)
                 
         return wrapper
     return decorator 
\ No newline at end of file
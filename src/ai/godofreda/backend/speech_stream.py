@@ -0,0 +1,107 @@
+# ================================
+# GODOFREDA SPEECH STREAM
+# ================================
+# Texto do LLM em streaming -> frases -> síntese concorrente no pool TTS ->
+# áudio em chunks, na ordem das frases. O primeiro áudio sai após a primeira frase.
+# ================================
+
+import asyncio
+import logging
+from typing import AsyncIterator, Optional
+
+from audio_encoding import get_encoder
+from config import config
+from tts_cache import tts_cache
+from tts_service import TTSWorkerPool
+
+logger = logging.getLogger(__name__)
+
+SENTENCE_END = ".!?…\n"
+
+
+async def split_sentences(
+    fragments: AsyncIterator[str], min_chars: int = 20, max_chars: int = 250
+) -> AsyncIterator[str]:
+    """
+    Agrupa fragmentos de texto em frases conforme chegam
+
+    Uma frase termina em ``.!?…`` seguido de espaço (ou quebra de linha), para não
+    cortar "3.14" nem reticências no meio. Frases com menos de ``min_chars`` são
+    juntadas à seguinte (síntese de 2 palavras soa mal e custa quase o mesmo);
+    acima de ``max_chars`` sem pontuação, corta na última vírgula ou espaço.
+    """
+    buffer, scanned = "", 0
+    async for fragment in fragments:
+        buffer += fragment
+        while True:
+            cut = _boundary(buffer, scanned, min_chars, max_chars)
+            if cut is None:
+                # Só o último caractere pode virar fronteira com o próximo fragmento
+                scanned = max(0, len(buffer) - 1)
+                break
+            sentence, buffer, scanned = buffer[:cut].strip(), buffer[cut:], 0
+            if sentence:
+                yield sentence
+    if buffer.strip():
+        yield buffer.strip()
+
+
+def _boundary(buffer: str, start: int, min_chars: int, max_chars: int) -> Optional[int]:
+    """Índice (exclusivo) do fim da primeira frase completa em ``buffer``, ou None"""
+    for i in range(start, len(buffer) - 1):
+        if buffer[i] in SENTENCE_END and buffer[i + 1].isspace() and i + 1 >= min_chars:
+            return i + 1
+    if len(buffer) > max_chars:
+        cut = max(buffer.rfind(", ", 0, max_chars), buffer.rfind(" ", 0, max_chars))
+        return cut + 1 if cut > 0 else max_chars
+    return None
+
+
+async def stream_speech(
+    sentences: AsyncIterator[str],
+    audio_format: Optional[str] = None,
+    lookahead: Optional[int] = None,
+    pool: Optional[TTSWorkerPool] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Sintetiza as frases no pool TTS e produz o áudio em ordem
+
+    Até ``lookahead`` frases sintetizam em paralelo enquanto o LLM continua gerando;
+    o limite evita que uma resposta longa ocupe o pool inteiro. Cada frase passa pelo
+    cache TTS, então frases repetidas não voltam ao pool. Se o cliente desconectar
+    (ou uma síntese falhar) o gerador fecha e cancela o que ainda não começou.
+    """
+    encoder = get_encoder(audio_format or config.tts.audio_format)
+    slots = asyncio.Semaphore(lookahead or config.tts.stream_lookahead)
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def produce() -> None:
+        try:
+            async for sentence in sentences:
+                await slots.acquire()
+                queue.put_nowait(asyncio.create_task(
+                    tts_cache.get_or_synthesize(sentence, audio_format=encoder.name, pool=pool)
+                ))
+        finally:
+            queue.put_nowait(None)
+
+    producer = asyncio.create_task(produce())
+    first = True
+    try:
+        while True:
+            task = await queue.get()
+            if task is None:
+                break
+            try:
+                audio, _ = await task
+            finally:
+                slots.release()
+            yield encoder.stream_chunk(audio, first)
+            first = False
+        await producer  # propaga erro do LLM, se houver
+    finally:
+        producer.cancel()
+        while not queue.empty():
+            task = queue.get_nowait()
+            if task is not None:
+                task.cancel()
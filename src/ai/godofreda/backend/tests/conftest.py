@@ -0,0 +1,14 @@
+import os
+import sys
+import tempfile
+
+# Módulos do backend são importados sem pacote (from config import config)
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# config/main criam diretórios relativos (app/logs, app/tts_temp) no import: fora do repositório
+_workdir = tempfile.mkdtemp(prefix="godofreda-tests-")
+os.environ.setdefault("TTS_TEMP_DIR", os.path.join(_workdir, "tts_temp"))
+os.environ.setdefault("TTS_CACHE_DIR", os.path.join(_workdir, "tts_cache"))
+os.environ.setdefault("LOG_FILE_PATH", os.path.join(_workdir, "logs", "godofreda.log"))
+os.chdir(_workdir)
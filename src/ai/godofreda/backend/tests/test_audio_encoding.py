@@ -0,0 +1,55 @@
+import io
+import struct
+import wave
+
+import pytest
+
+import audio_encoding
+from audio_encoding import AudioEncoder, WavEncoder, get_encoder, register_encoder
+
+PCM = struct.pack("<4h", 0, 1000, -1000, 32767)
+
+
+def test_wav_encoder_wraps_pcm_mono_16bit():
+    audio = WavEncoder().encode(PCM, 22050)
+    with wave.open(io.BytesIO(audio), "rb") as wav:
+        assert (wav.getnchannels(), wav.getsampwidth(), wav.getframerate()) == (1, 2, 22050)
+        assert wav.readframes(wav.getnframes()) == PCM
+
+
+def test_wav_stream_chunk_sends_streaming_header_once():
+    encoder = WavEncoder()
+    audio = encoder.encode(PCM, 16000)
+    first = encoder.stream_chunk(audio, first=True)
+    riff, riff_size, wave_id, fmt, _, pcm_format, channels, rate, byte_rate, align, bits, data, data_size = (
+        struct.unpack("<4sI4s4sIHHIIHH4sI", first[:44])
+    )
+    assert (riff, wave_id, fmt, data) == (b"RIFF", b"WAVE", b"fmt ", b"data")
+    # Tamanho desconhecido em streaming
+    assert riff_size == data_size == 0xFFFFFFFF
+    assert (pcm_format, channels, rate, byte_rate, align, bits) == (1, 1, 16000, 32000, 2, 16)
+    assert first[44:] == PCM
+    # Frases seguintes: só o PCM, continuando o mesmo arquivo
+    assert encoder.stream_chunk(audio, first=False) == PCM
+
+
+def test_default_stream_chunk_returns_bytes_of_the_whole_file():
+    chunk = AudioEncoder().stream_chunk(memoryview(b"ID3...frames"), first=True)
+    assert chunk == b"ID3...frames" and isinstance(chunk, bytes)
+
+
+def test_get_encoder_rejects_unknown_format():
+    with pytest.raises(ValueError, match="flac"):
+        get_encoder("flac")
+
+
+def test_register_encoder_makes_format_available(monkeypatch):
+    class RawEncoder(AudioEncoder):
+        name = "raw"
+
+        def encode(self, pcm: bytes, sample_rate: int) -> bytes:
+            return pcm
+
+    monkeypatch.setattr(audio_encoding, "ENCODERS", dict(audio_encoding.ENCODERS))
+    register_encoder(RawEncoder())
+    assert get_encoder("raw").encode(PCM, 8000) == PCM
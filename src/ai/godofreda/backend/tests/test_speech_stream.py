@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from audio_encoding import get_encoder
+from speech_stream import split_sentences, stream_speech
+from tts_cache import tts_cache
+
+
+async def _fragments(*parts):
+    for part in parts:
+        yield part
+
+
+async def _collect(sentences, **kwargs):
+    return [sentence async for sentence in split_sentences(sentences, **kwargs)]
+
+
+class FakePool:
+    """PCM = texto da frase; frases anteriores demoram mais, para chegarem fora de ordem"""
+
+    def __init__(self, delays):
+        self.delays = delays
+        self.running = 0
+        self.max_running = 0
+
+    async def synthesize_timed(self, text, language, speaker, audio_format):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(self.delays[text])
+        finally:
+            self.running -= 1
+        return get_encoder(audio_format).encode(_pcm(text), 22050), self.delays[text]
+
+
+def _pcm(text: str) -> bytes:
+    data = text.encode()
+    return data + b"\0" * (len(data) % 2)
+
+
+@pytest.mark.asyncio
+async def test_split_sentences_across_fragments():
+    sentences = await _collect(
+        _fragments("Primeira frase bem com", "pleta aqui. Segunda frase também", " completa! Resto"),
+    )
+    assert sentences == ["Primeira frase bem completa aqui.", "Segunda frase também completa!", "Resto"]
+
+
+@pytest.mark.asyncio
+async def test_split_sentences_keeps_decimals_and_joins_short_sentences():
+    sentences = await _collect(_fragments("Ok. Sim. O valor de pi é 3.14 agora. Depois disso, mais uma frase."))
+    assert sentences == ["Ok. Sim. O valor de pi é 3.14 agora.", "Depois disso, mais uma frase."]
+
+
+@pytest.mark.asyncio
+async def test_split_sentences_cuts_long_text_without_punctuation():
+    sentences = await _collect(_fragments("palavra " * 10), min_chars=5, max_chars=30)
+    assert all(len(sentence) <= 30 for sentence in sentences)
+    assert " ".join(sentences).split() == ["palavra"] * 10
+
+
+@pytest.mark.asyncio
+async def test_stream_speech_yields_in_sentence_order_within_lookahead(monkeypatch):
+    monkeypatch.setattr(tts_cache, "redis_client", None)
+    texts = ["um", "dois", "tres", "quatro"]
+    pool = FakePool({"um": 0.08, "dois": 0.06, "tres": 0.04, "quatro": 0.02})
+
+    chunks = [chunk async for chunk in stream_speech(_fragments(*texts), "wav", lookahead=2, pool=pool)]
+
+    assert len(chunks) == len(texts)
+    assert chunks[0][:4] == b"RIFF"
+    assert chunks[0][44:] == _pcm("um")
+    assert chunks[1:] == [_pcm(text) for text in texts[1:]]
+    assert pool.max_running == 2
@@ -0,0 +1,163 @@
+import asyncio
+import mmap
+import os
+
+import pytest
+from fakeredis import aioredis as fakeredis
+
+from audio_encoding import get_encoder
+from tts_cache import (
+    AUDIO_KEY, CODECS, FLAG_SPILLED, HEADER, MAGIC, VERSION, TTSCache, normalize_text, pack_entry, unpack_entry,
+)
+
+
+class FakePool:
+    """Conta as sínteses; ``error`` faz todas falharem depois de ``delay``"""
+
+    def __init__(self, size: int = 64, delay: float = 0.05, seconds: float = 1.5, error: Exception = None):
+        self.size, self.delay, self.seconds, self.error = size, delay, seconds, error
+        self.calls = 0
+
+    async def synthesize_timed(self, text, language, speaker, audio_format):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error:
+            raise self.error
+        return get_encoder(audio_format).encode(bytes(self.size), 22050), self.seconds
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = TTSCache()
+    cache.redis_client = fakeredis.FakeRedis()
+    cache.cache_dir = str(tmp_path)
+    return cache
+
+
+def test_normalized_text_shares_the_cache_key(cache):
+    voice = TTSCache.voice_config("ana", "pt", "wav")
+    composed, decomposed = "Olá,  mundo\n", "Olá, mundo"
+    assert normalize_text(composed) == normalize_text(decomposed) == "Olá, mundo"
+    assert cache._content_hash(composed, voice) == cache._content_hash(decomposed, voice)
+    # Caixa e voz mudam o áudio: chaves diferentes
+    assert cache._content_hash("olá, mundo", voice) != cache._content_hash(composed, voice)
+    assert cache._content_hash(composed, TTSCache.voice_config("bia", "pt", "wav")) != (
+        cache._content_hash(composed, voice)
+    )
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_synthesis(cache):
+    pool = FakePool()
+    results = await asyncio.gather(*(
+        cache.get_or_synthesize(text, audio_format="wav", pool=pool)
+        for text in ("Bom dia.", " Bom  dia. ", "Bom dia.")
+    ))
+    assert pool.calls == 1
+    assert sorted(cached for _, cached in results) == [False, True, True]
+    assert len({bytes(audio) for audio, _ in results}) == 1
+    assert cache._inflight == {}
+
+    audio, cached = await cache.get_or_synthesize("Bom dia.", audio_format="wav", pool=pool)
+    assert cached and bytes(audio) == bytes(results[0][0]) and pool.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_leader_error_reaches_every_waiter(cache):
+    pool = FakePool(error=RuntimeError("modelo caiu"))
+    results = await asyncio.gather(
+        *(cache.get_or_synthesize("Falha.", audio_format="wav", pool=pool) for _ in range(3)),
+        return_exceptions=True,
+    )
+    assert pool.calls == 1
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert cache._inflight == {}
+    # Nada foi cacheado: a próxima requisição tenta de novo
+    with pytest.raises(RuntimeError):
+        await cache.get_or_synthesize("Falha.", audio_format="wav", pool=pool)
+    assert pool.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_usage_stats_counts_hit_ratio_and_saved_seconds(cache):
+    pool = FakePool(seconds=2.0)
+    await asyncio.gather(*(cache.get_or_synthesize("Oi.", audio_format="wav", pool=pool) for _ in range(2)))
+    await cache.get_or_synthesize("Oi.", audio_format="wav", pool=pool)
+
+    stats = cache.usage_stats()
+    assert (stats["misses"], stats["coalesced"], stats["hits"]) == (1, 1, 1)
+    assert stats["hit_ratio"] == round(2 / 3, 4)
+    assert stats["saved_seconds"] == 4.0
+    assert stats["inflight"] == 0
+
+
+def test_entry_header_round_trip():
+    audio = b"RIFF" + bytes(100)
+    codec, flags, seconds, view = unpack_entry(pack_entry(audio, "opus", 0.5))
+    assert (codec, flags, seconds) == (CODECS["opus"], 0, 0.5)
+    assert isinstance(view, memoryview) and view == audio
+
+    header = pack_entry(audio, "wav", 0.5, spilled=True)
+    assert len(header) == HEADER.size
+    assert unpack_entry(header)[1] & FLAG_SPILLED
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("header", [
+    HEADER.pack(b"XXXX", VERSION, CODECS["wav"], 0, 4, 1.0),
+    HEADER.pack(MAGIC, VERSION + 1, CODECS["wav"], 0, 4, 1.0),
+    HEADER.pack(MAGIC, VERSION, CODECS["wav"], 0, 99, 1.0),  # truncada
+])
+async def test_invalid_entry_is_a_miss_and_gets_rewritten(cache, header):
+    voice = TTSCache.voice_config(audio_format="wav")
+    content_hash = cache._content_hash("Velha.", voice)
+    await cache.redis_client.set(AUDIO_KEY.format(content_hash), header + b"RIFF")
+    assert await cache._get_entry(content_hash) is None
+
+    pool = FakePool()
+    _, cached = await cache.get_or_synthesize("Velha.", audio_format="wav", pool=pool)
+    assert not cached and pool.calls == 1
+    assert await cache._get_entry(content_hash) is not None
+
+
+@pytest.mark.asyncio
+async def test_large_entry_spills_to_disk_and_is_read_through_mmap(cache):
+    cache.spill_bytes = 1024
+    pool = FakePool(size=4096)
+    audio, _ = await cache.get_or_synthesize("Longa.", audio_format="wav", pool=pool)
+
+    content_hash = cache._content_hash("Longa.", TTSCache.voice_config(audio_format="wav"))
+    assert len(await cache.redis_client.get(AUDIO_KEY.format(content_hash))) == HEADER.size
+    assert os.path.exists(cache._spill_path(content_hash))
+
+    cached_audio, cached = await cache.get_or_synthesize("Longa.", audio_format="wav", pool=pool)
+    assert cached and pool.calls == 1
+    assert isinstance(cached_audio, memoryview) and isinstance(cached_audio.obj, mmap.mmap)
+    assert cached_audio == audio
+    assert (await cache.get_cache_stats())["disk_entries"] == 1
+
+    # Arquivo removido do disco: vira miss e é sintetizado de novo
+    os.unlink(cache._spill_path(content_hash))
+    _, cached = await cache.get_or_synthesize("Longa.", audio_format="wav", pool=pool)
+    assert not cached and pool.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_run_cleanup_removes_expired_spill_files_repeatedly(cache):
+    cache.ttl = 60
+    stale, fresh = cache._spill_path("velho"), cache._spill_path("novo")
+    for path in (stale, fresh):
+        with open(path, "wb") as f:
+            f.write(pack_entry(b"RIFF", "wav", 0.1))
+    os.utime(stale, (0, 0))
+
+    cleanup = asyncio.create_task(cache.run_cleanup(0.01))
+    try:
+        await asyncio.sleep(0.05)
+        assert not os.path.exists(stale) and os.path.exists(fresh)
+        # Na próxima volta do laço, arquivos que expiraram depois também saem
+        os.utime(fresh, (0, 0))
+        await asyncio.sleep(0.05)
+        assert not os.path.exists(fresh)
+    finally:
+        cleanup.cancel()
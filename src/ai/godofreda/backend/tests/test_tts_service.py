@@ -0,0 +1,132 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import HTTPException
+
+import tts_service
+from tts_service import TTSQueueFull, TTSTimeout, TTSUnavailable, TTSWorkerPool
+
+RELEASE = threading.Event()
+
+
+class StubEngine:
+    """Devolve 10 ms de silêncio; "bloqueia" espera RELEASE, "dorme" leva 0.5 s, "crash" mata o processo"""
+
+    def synthesize(self, text: str, language: str, speaker: str):
+        if text == "bloqueia":
+            RELEASE.wait(5)
+        elif text == "dorme":
+            threading.Event().wait(0.5)
+        elif text == "crash":
+            os._exit(1)
+        return bytes(2 * 220), 22050
+
+
+def stub_engine(threads: int) -> StubEngine:
+    return StubEngine()
+
+
+class ThreadWorkerPool(TTSWorkerPool):
+    """Mesmo pool com threads no lugar de processos: sem spawn, mesma fila e mesmos erros"""
+
+    def _new_executor(self):
+        return ThreadPoolExecutor(
+            max_workers=self.workers, initializer=tts_service._init_worker, initargs=(self.factory, 1)
+        )
+
+
+async def _pool(**kwargs) -> TTSWorkerPool:
+    options = dict(workers=1, threads_per_worker=1, max_queue=1, timeout=5, factory=stub_engine)
+    options.update(kwargs)
+    pool = ThreadWorkerPool(**options)
+    await pool.start()
+    return pool
+
+
+@pytest.mark.asyncio
+async def test_synthesize_returns_encoded_audio():
+    pool = await _pool()
+    try:
+        audio = await pool.synthesize("olá", audio_format="wav")
+        assert audio[:4] == b"RIFF"
+        assert pool.stats()["busy"] == 0
+    finally:
+        await pool.stop()
+
+
+@pytest.mark.asyncio
+async def test_queue_full_once_workers_and_queue_are_taken():
+    RELEASE.clear()
+    pool = await _pool(workers=1, max_queue=1)
+    try:
+        running = asyncio.create_task(pool.synthesize("bloqueia", audio_format="wav"))
+        queued = asyncio.create_task(pool.synthesize("bloqueia", audio_format="wav"))
+        await asyncio.sleep(0.05)
+        assert pool.stats()["busy"] == 1 and pool.stats()["queued"] == 1
+        assert not pool.has_capacity
+        with pytest.raises(TTSQueueFull):
+            await pool.synthesize("mais uma", audio_format="wav")
+        RELEASE.set()
+        await asyncio.gather(running, queued)
+        await asyncio.sleep(0.01)  # vagas liberadas via call_soon_threadsafe
+        assert pool.has_capacity
+    finally:
+        RELEASE.set()
+        await pool.stop()
+
+
+@pytest.mark.asyncio
+async def test_timeout_raises_and_slot_is_released_when_worker_finishes():
+    pool = await _pool(timeout=0.1)
+    try:
+        with pytest.raises(TTSTimeout):
+            await pool.synthesize("dorme", audio_format="wav")
+        assert pool.pending == 1  # o worker ainda está ocupado
+        await asyncio.sleep(0.6)
+        assert pool.pending == 0
+    finally:
+        await pool.stop()
+
+
+@pytest.mark.asyncio
+async def test_not_started_pool_is_unavailable():
+    pool = ThreadWorkerPool(workers=1, threads_per_worker=1, max_queue=1, timeout=5, factory=stub_engine)
+    with pytest.raises(TTSUnavailable):
+        await pool.synthesize("olá", audio_format="wav")
+
+
+@pytest.mark.asyncio
+async def test_crashed_worker_restarts_the_pool():
+    # Processos reais (spawn): os._exit no worker quebra o ProcessPoolExecutor
+    pool = TTSWorkerPool(workers=1, threads_per_worker=1, max_queue=1, timeout=30, factory=stub_engine)
+    await pool.start()
+    try:
+        broken = pool.executor
+        with pytest.raises(TTSUnavailable):
+            await pool.synthesize("crash", audio_format="wav")
+        assert pool.ready and pool.executor is not broken
+        assert (await pool.synthesize("olá", audio_format="wav"))[:4] == b"RIFF"
+    finally:
+        await pool.stop()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("error, status, retry_after", [
+    (TTSQueueFull("cheia"), 503, "5"),
+    (TTSUnavailable("fora"), 503, None),
+    (TTSTimeout("lento"), 504, None),
+])
+async def test_pool_errors_map_to_http_status(monkeypatch, error, status, retry_after):
+    import main
+
+    async def failing(*args, **kwargs):
+        raise error
+
+    monkeypatch.setattr(main.tts_cache, "get_or_synthesize", failing)
+    with pytest.raises(HTTPException) as exc:
+        await main.synthesize_or_raise("olá", "wav")
+    assert exc.value.status_code == status
+    assert (exc.value.headers or {}).get("Retry-After") == retry_after
@@ -1,67 +1,153 @@
 # ================================
 # GODOFREDA TTS CACHE SERVICE
 # ================================
-# Cache Redis otimizado para TTS com compressão e TTL inteligente
+# Cache de áudio TTS em Redis com camada de disco para entradas grandes.
+# Endereçado por conteúdo (texto normalizado + voz + modelo + formato), com
+# single-flight: sínteses iguais em paralelo viram uma só.
+#
+# Formato: tts:audio:{hash} = cabeçalho binário fixo + áudio já codificado, servido
+# como está (memoryview, sem pickle nem descompressão); tts:meta:{hash} = hash Redis
+# com os metadados, lido pelas estatísticas sem tocar no áudio. Acima de
+# config.tts.cache_spill_bytes o áudio vai para config.tts.cache_dir e é lido via mmap.
 # ================================
 
+import asyncio
 import hashlib
 import json
 import logging
-import pickle
-import zlib
-from typing import Optional, Dict, Any, Tuple
+import mmap
+import os
+import struct
+import time
+import unicodedata
+from typing import Optional, Dict, Any, Iterable, Tuple, Union
 import redis.asyncio as redis
+from prometheus_client import Counter
 from config import config
+from tts_service import TTSWorkerPool, tts_pool
 
 logger = logging.getLogger(__name__)
 
+TTS_CACHE_REQUESTS = Counter(
+    "godofreda_tts_cache_requests_total", "Consultas ao cache TTS por resultado", ["result"]
+)
+TTS_CACHE_SAVED_SECONDS = Counter(
+    "godofreda_tts_cache_saved_seconds_total", "Segundos de síntese evitados por hits e requisições agrupadas"
+)
+
+AUDIO_KEY = "tts:audio:{}"
+META_KEY = "tts:meta:{}"
+
+# magic, versão, codec, flags, tamanho do áudio, segundos de síntese
+HEADER = struct.Struct("<4sBBHIf")
+MAGIC = b"GTTS"
+VERSION = 1
+FLAG_SPILLED = 0x1  # áudio no disco local, não no valor Redis
+CODECS = {"wav": 1, "opus": 2, "mp3": 3}  # 0 = outro encoder registrado (nome no hash de metadados)
+
+# bytes (recém-sintetizado) ou memoryview sobre o valor Redis / mmap do arquivo
+AudioData = Union[bytes, memoryview]
+
+
+def normalize_text(text: str) -> str:
+    """Forma canônica do texto: NFC e espaços colapsados (não altera caixa nem pontuação, que mudam a prosódia)"""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def pack_entry(audio: bytes, audio_format: str, synthesis_seconds: float, spilled: bool = False) -> bytes:
+    """Cabeçalho + áudio; entradas no disco guardam só o cabeçalho no Redis"""
+    header = HEADER.pack(
+        MAGIC, VERSION, CODECS.get(audio_format, 0), FLAG_SPILLED if spilled else 0,
+        len(audio), synthesis_seconds,
+    )
+    return header if spilled else header + audio
+
+
+def unpack_entry(blob: Union[bytes, mmap.mmap]) -> Tuple[int, int, float, memoryview]:
+    """(codec, flags, segundos de síntese, áudio) sem copiar o áudio; ValueError se o blob não for válido"""
+    if len(blob) < HEADER.size:
+        raise ValueError("entrada TTS truncada")
+    magic, version, codec, flags, size, seconds = HEADER.unpack_from(blob)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("entrada TTS em formato desconhecido")
+    audio = memoryview(blob)[HEADER.size:HEADER.size + size]
+    if not flags & FLAG_SPILLED and len(audio) != size:
+        raise ValueError("entrada TTS truncada")
+    return codec, flags, seconds, audio
+
+
 class TTSCache:
-    """Cache Redis otimizado para TTS"""
+    """Cache Redis + disco para áudio TTS"""
     
     def __init__(self):
         self.redis_client: redis.Redis = None
-        self.compression_threshold = 1024  # Comprimir arquivos > 1KB
+        self.ttl = config.tts.cache_ttl
+        self.spill_bytes = config.tts.cache_spill_bytes
+        self.cache_dir = config.tts.cache_dir
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._retry_at = 0.0  # após erro do Redis, segue sem cache por alguns segundos
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "errors": 0, "saved_seconds": 0.0}
         self._connect_redis()
     
     def _connect_redis(self) -> None:
         """Conecta ao Redis"""
         try:
-            redis_url = config.redis_url if hasattr(config, 'redis_url') else "redis://redis:6379"
+            redis_url = os.getenv("REDIS_URL", "redis://redis:6379")
             self.redis_client = redis.from_url(redis_url, decode_responses=False)
             logger.info("TTS Cache Redis conectado com sucesso")
         except Exception as e:
             logger.warning(f"Falha ao conectar TTS Cache Redis: {e}")
             self.redis_client = None
     
-    def _generate_cache_key(self, text: str, voice_config: Dict[str, Any]) -> str:
-        """Gera chave única para cache baseada no texto e configuração"""
-        # Criar hash do texto e configuração
-        config_str = json.dumps(voice_config, sort_keys=True)
-        content_hash = hashlib.md5(f"{text}:{config_str}".encode()).hexdigest()
-        return f"tts:audio:{content_hash}"
+    def _content_hash(self, text: str, voice_config: Dict[str, Any]) -> str:
+        """Hash do texto normalizado e da configuração da voz"""
+        payload = json.dumps([normalize_text(text), voice_config], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode()).hexdigest()
     
-    def _compress_data(self, data: bytes) -> Tuple[bytes, bool]:
-        """Comprime dados se necessário"""
-        if len(data) > self.compression_threshold:
-            try:
-                compressed = zlib.compress(data, level=6)
-                if len(compressed) < len(data):
-                    return compressed, True
-            except Exception as e:
-                logger.warning(f"Erro na compressão: {e}")
-        return data, False
+    def _spill_path(self, content_hash: str) -> str:
+        return os.path.join(self.cache_dir, f"{content_hash}.gtts")
     
-    def _decompress_data(self, data: bytes, compressed: bool) -> bytes:
-        """Descomprime dados se necessário"""
-        if compressed:
-            try:
-                return zlib.decompress(data)
-            except Exception as e:
-                logger.error(f"Erro na descompressão: {e}")
-                return data
-        return data
+    @staticmethod
+    def voice_config(speaker: Optional[str] = None, language: str = "pt", audio_format: Optional[str] = None) -> Dict[str, Any]:
+        """Tudo o que muda o áudio gerado além do texto"""
+        return {
+            "model": config.tts.model,
+            "speaker": speaker or config.tts.default_speaker,
+            "language": language,
+            "format": audio_format or config.tts.audio_format,
+        }
     
-    async def get_cached_audio(self, text: str, voice_config: Dict[str, Any]) -> Optional[bytes]:
+    async def _get_entry(self, content_hash: str) -> Optional[Tuple[AudioData, float]]:
+        """(áudio, segundos que a síntese levou) ou None"""
+        blob = await self.redis_client.get(AUDIO_KEY.format(content_hash))
+        if not blob:
+            return None
+        try:
+            _, flags, seconds, audio = unpack_entry(blob)
+            if flags & FLAG_SPILLED:
+                audio = self._map_spilled(content_hash)
+        except (ValueError, OSError) as e:
+            # Entrada antiga/corrompida ou arquivo removido do disco: vira miss e é regravada
+            logger.debug(f"Entrada TTS {content_hash[:12]} inválida: {e}")
+            return None
+        return audio, seconds
+    
+    def _map_spilled(self, content_hash: str) -> memoryview:
+        """Áudio do disco via mmap: páginas do page cache, sem leitura para um buffer próprio"""
+        with open(self._spill_path(content_hash), "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        # A memoryview mantém o mmap aberto enquanto o áudio estiver em uso
+        return unpack_entry(mapped)[3]
+    
+    def _write_spilled(self, content_hash: str, entry: bytes) -> None:
+        path = self._spill_path(content_hash)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            f.write(entry)
+        os.replace(tmp_path, path)  # leitores nunca veem arquivo pela metade
+    
+    async def get_cached_audio(self, text: str, voice_config: Dict[str, Any]) -> Optional[AudioData]:
         """
         Obtém áudio do cache
         
@@ -76,20 +162,10 @@ class TTSCache:
             return None
         
         try:
-            cache_key = self._generate_cache_key(text, voice_config)
-            cached_data = await self.redis_client.get(cache_key)
-            
-            if cached_data:
-                # Deserializar dados
-                cache_info = pickle.loads(cached_data)
-                audio_data = cache_info['audio']
-                compressed = cache_info.get('compressed', False)
-                
-                # Descomprimir se necessário
-                audio_data = self._decompress_data(audio_data, compressed)
-                
+            entry = await self._get_entry(self._content_hash(text, voice_config))
+            if entry:
                 logger.debug(f"Cache hit para texto: {text[:50]}...")
-                return audio_data
+                return entry[0]
             
             logger.debug(f"Cache miss para texto: {text[:50]}...")
             return None
@@ -98,16 +174,106 @@ class TTSCache:
             logger.error(f"Erro ao obter cache TTS: {e}")
             return None
     
+    async def get_or_synthesize(
+        self,
+        text: str,
+        speaker: Optional[str] = None,
+        language: str = "pt",
+        audio_format: Optional[str] = None,
+        pool: Optional[TTSWorkerPool] = None,
+    ) -> Tuple[AudioData, bool]:
+        """
+        Áudio do cache ou sintetizado no pool TTS (e cacheado)
+        
+        Requisições iguais enquanto uma síntese está em andamento aguardam a mesma
+        task em vez de ocupar outro worker. Erros do Redis não impedem a síntese.
+        
+        Returns:
+            (áudio, veio do cache ou de síntese já em andamento)
+        """
+        text = normalize_text(text)
+        voice_config = self.voice_config(speaker, language, audio_format)
+        cache_key = self._content_hash(text, voice_config)
+        
+        if self._redis_usable():
+            try:
+                entry = await self._get_entry(cache_key)
+                if entry:
+                    self._record("hits", entry[1])
+                    return entry[0], True
+            except Exception as e:
+                self._redis_failed(e)
+        
+        task = self._inflight.get(cache_key)
+        if task is not None:
+            # shield: cancelar esta requisição não cancela a síntese das outras
+            audio, seconds = await asyncio.shield(task)
+            self._record("coalesced", seconds)
+            return audio, True
+        
+        task = asyncio.create_task(self._synthesize(pool or tts_pool, text, voice_config))
+        self._inflight[cache_key] = task
+        task.add_done_callback(lambda done: self._finished(cache_key, done))
+        self._record("misses", 0.0)
+        audio, _ = await asyncio.shield(task)
+        return audio, False
+    
+    async def _synthesize(self, pool: TTSWorkerPool, text: str, voice_config: Dict[str, Any]) -> Tuple[bytes, float]:
+        audio, seconds = await pool.synthesize_timed(
+            text, language=voice_config["language"], speaker=voice_config["speaker"],
+            audio_format=voice_config["format"],
+        )
+        if self._redis_usable():
+            await self.cache_audio(text, voice_config, audio, self.ttl, synthesis_seconds=seconds)
+        return audio, seconds
+    
+    def _redis_usable(self) -> bool:
+        return self.redis_client is not None and time.monotonic() >= self._retry_at
+    
+    def _redis_failed(self, error: Exception) -> None:
+        # Falha aberta: sintetiza sem cache em vez de pagar o timeout do Redis a cada frase
+        self.stats["errors"] += 1
+        self._retry_at = time.monotonic() + 30
+        logger.error(f"Erro ao obter cache TTS (sem cache por 30s): {error}")
+    
+    def _finished(self, cache_key: str, task: asyncio.Task) -> None:
+        self._inflight.pop(cache_key, None)
+        if not task.cancelled():
+            task.exception()  # já propagado a quem aguardava; evita "exception was never retrieved"
+    
+    def _record(self, result: str, saved_seconds: float) -> None:
+        self.stats[result] += 1
+        TTS_CACHE_REQUESTS.labels(result).inc()
+        if saved_seconds:
+            self.stats["saved_seconds"] += saved_seconds
+            TTS_CACHE_SAVED_SECONDS.inc(saved_seconds)
+    
+    async def prewarm(self, phrases: Iterable[str]) -> int:
+        """Sintetiza frases frequentes que ainda não estão no cache; retorna quantas foram geradas"""
+        generated = 0
+        for phrase in phrases:
+            if not tts_pool.ready:
+                break
+            try:
+                _, cached = await self.get_or_synthesize(phrase)
+                generated += not cached
+            except Exception as e:
+                logger.warning(f"Pré-aquecimento TTS falhou para '{phrase[:30]}...': {e}")
+        if generated:
+            logger.info(f"Cache TTS pré-aquecido: {generated} frase(s) sintetizada(s)")
+        return generated
+    
     async def cache_audio(self, text: str, voice_config: Dict[str, Any], 
-                         audio_data: bytes, ttl: int = 3600) -> bool:
+                         audio_data: bytes, ttl: int = 3600, synthesis_seconds: float = 0.0) -> bool:
         """
-        Cacheia áudio no Redis
+        Cacheia áudio no Redis (ou no disco, se grande) e os metadados em um hash separado
         
         Args:
             text: Texto sintetizado
             voice_config: Configuração da voz
-            audio_data: Dados do áudio
+            audio_data: Dados do áudio, já no formato final
             ttl: Tempo de vida em segundos
+            synthesis_seconds: Quanto a síntese levou (contabiliza o tempo poupado nos hits)
             
         Returns:
             True se cacheado com sucesso
@@ -116,85 +282,88 @@ class TTSCache:
             return False
         
         try:
-            cache_key = self._generate_cache_key(text, voice_config)
-            
-            # Comprimir dados se necessário
-            compressed_data, is_compressed = self._compress_data(audio_data)
-            
-            # Criar objeto de cache
-            cache_info = {
-                'audio': compressed_data,
-                'compressed': is_compressed,
-                'text_length': len(text),
-                'audio_size': len(audio_data),
-                'compressed_size': len(compressed_data),
-                'voice_config': voice_config,
-                'created_at': time.time()
-            }
-            
-            # Serializar e cachear
-            serialized_data = pickle.dumps(cache_info)
-            await self.redis_client.setex(cache_key, ttl, serialized_data)
+            content_hash = self._content_hash(text, voice_config)
+            spilled = len(audio_data) > self.spill_bytes
+            entry = pack_entry(audio_data, voice_config["format"], synthesis_seconds, spilled)
+            if spilled:
+                await asyncio.to_thread(self._write_spilled, content_hash, pack_entry(
+                    audio_data, voice_config["format"], synthesis_seconds
+                ))
             
-            compression_ratio = len(compressed_data) / len(audio_data) if len(audio_data) > 0 else 1
-            logger.debug(f"Áudio cacheado: {len(audio_data)} bytes -> {len(compressed_data)} bytes "
-                        f"(compressão: {compression_ratio:.2f})")
+            meta_key = META_KEY.format(content_hash)
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                pipe.set(AUDIO_KEY.format(content_hash), entry, ex=ttl)
+                pipe.hset(meta_key, mapping={
+                    "format": voice_config["format"],
+                    "speaker": voice_config["speaker"],
+                    "model": voice_config["model"],
+                    "tier": "disk" if spilled else "redis",
+                    "size": len(audio_data),
+                    "text_length": len(text),
+                    "synthesis_seconds": synthesis_seconds,
+                    "created_at": time.time(),
+                })
+                pipe.expire(meta_key, ttl)
+                await pipe.execute()
             
+            logger.debug(f"Áudio cacheado: {len(audio_data)} bytes ({'disco' if spilled else 'redis'})")
             return True
             
         except Exception as e:
             logger.error(f"Erro ao cachear áudio TTS: {e}")
             return False
     
+    def usage_stats(self) -> Dict[str, Any]:
+        """Contadores deste processo: taxa de acerto e segundos de síntese poupados"""
+        served = self.stats["hits"] + self.stats["coalesced"]
+        total = served + self.stats["misses"]
+        return {
+            **self.stats,
+            "saved_seconds": round(self.stats["saved_seconds"], 2),
+            "hit_ratio": round(served / total, 4) if total else 0.0,
+            "inflight": len(self._inflight),
+        }
+    
     async def get_cache_stats(self) -> Dict[str, Any]:
         """Retorna estatísticas do cache TTS"""
+        return {**await self._storage_stats(), **self.usage_stats()}
+    
+    async def _storage_stats(self) -> Dict[str, Any]:
         if not self.redis_client:
             return {"status": "disconnected"}
         
         try:
-            # Obter todas as chaves TTS
-            tts_keys = await self.redis_client.keys("tts:audio:*")
-            
-            total_size = 0
-            total_compressed_size = 0
-            compression_ratios = []
-            
-            for key in tts_keys[:100]:  # Limitar a 100 chaves para performance
-                try:
-                    cached_data = await self.redis_client.get(key)
-                    if cached_data:
-                        cache_info = pickle.loads(cached_data)
-                        total_size += cache_info.get('audio_size', 0)
-                        total_compressed_size += cache_info.get('compressed_size', 0)
-                        
-                        if cache_info.get('audio_size', 0) > 0:
-                            ratio = cache_info.get('compressed_size', 0) / cache_info.get('audio_size', 0)
-                            compression_ratios.append(ratio)
-                except Exception as e:
-                    logger.debug(f"Erro ao processar chave {key}: {e}")
-            
-            avg_compression = sum(compression_ratios) / len(compression_ratios) if compression_ratios else 1
+            # Só os hashes de metadados: o áudio nunca é lido aqui
+            tiers = {"redis": [0, 0], "disk": [0, 0]}  # entradas, bytes
+            keys = [key async for key in self.redis_client.scan_iter(match=META_KEY.format("*"), count=500)]
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.hmget(key, "tier", "size")
+                rows = await pipe.execute()
+            for tier, size in rows:
+                if tier is None:
+                    continue  # expirou entre o SCAN e o HMGET
+                totals = tiers.setdefault(tier.decode(), [0, 0])
+                totals[0] += 1
+                totals[1] += int(size or 0)
             
             return {
                 "status": "connected",
-                "total_keys": len(tts_keys),
-                "total_size_mb": total_size / 1024 / 1024,
-                "compressed_size_mb": total_compressed_size / 1024 / 1024,
-                "compression_ratio": avg_compression,
-                "space_saved_mb": (total_size - total_compressed_size) / 1024 / 1024
+                "total_keys": sum(count for count, _ in tiers.values()),
+                "redis_entries": tiers["redis"][0],
+                "redis_size_mb": tiers["redis"][1] / 1024 / 1024,
+                "disk_entries": tiers["disk"][0],
+                "disk_size_mb": tiers["disk"][1] / 1024 / 1024,
             }
             
         except Exception as e:
             logger.error(f"Erro ao obter estatísticas do cache: {e}")
             return {"status": "error", "error": str(e)}
     
-    async def clear_cache(self, pattern: str = "tts:audio:*") -> bool:
+    async def clear_cache(self) -> bool:
         """
-        Limpa cache TTS
+        Limpa cache TTS (Redis e disco)
         
-        Args:
-            pattern: Padrão de chaves para limpar
-            
         Returns:
             True se limpeza bem-sucedida
         """
@@ -202,10 +371,13 @@ class TTSCache:
             return False
         
         try:
-            keys = await self.redis_client.keys(pattern)
-            if keys:
-                await self.redis_client.delete(*keys)
-                logger.info(f"Cache TTS limpo: {len(keys)} chaves removidas")
+            removed = 0
+            for pattern in (AUDIO_KEY.format("*"), META_KEY.format("*")):
+                keys = [key async for key in self.redis_client.scan_iter(match=pattern, count=500)]
+                if keys:
+                    removed += await self.redis_client.delete(*keys)
+            await asyncio.to_thread(self._remove_spilled, 0)
+            logger.info(f"Cache TTS limpo: {removed} chaves removidas")
             return True
             
         except Exception as e:
@@ -214,22 +386,39 @@ class TTSCache:
     
     async def cleanup_expired(self) -> int:
         """
-        Remove entradas expiradas do cache
+        Remove do disco entradas mais antigas que o TTL (no Redis elas já expiraram)
         
         Returns:
             Número de entradas removidas
         """
-        if not self.redis_client:
-            return 0
-        
         try:
-            # Redis remove automaticamente entradas expiradas
-            # Este método pode ser usado para limpeza manual se necessário
-            return 0
+            return await asyncio.to_thread(self._remove_spilled, self.ttl)
             
         except Exception as e:
             logger.error(f"Erro na limpeza de cache expirado: {e}")
             return 0
+    
+    async def run_cleanup(self, interval: float) -> None:
+        """Executa cleanup_expired a cada ``interval`` segundos até ser cancelado"""
+        while True:
+            await self.cleanup_expired()
+            await asyncio.sleep(interval)
+    
+    def _remove_spilled(self, max_age: float) -> int:
+        if not os.path.isdir(self.cache_dir):
+            return 0
+        removed, cutoff = 0, time.time() - max_age
+        with os.scandir(self.cache_dir) as entries:
+            for entry in entries:
+                if entry.name.endswith((".gtts", ".tmp")) and entry.stat().st_mtime <= cutoff:
+                    try:
+                        os.unlink(entry.path)
+                        removed += 1
+                    except FileNotFoundError:
+                        pass
+        if removed:
+            logger.info(f"Cache TTS em disco: {removed} arquivo(s) removido(s)")
+        return removed
 
 # Instância global do cache TTS
 tts_cache = TTSCache() 
\ No newline at end of file
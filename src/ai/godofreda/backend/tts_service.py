@@ -0,0 +1,265 @@
+# ================================
+# GODOFREDA TTS SERVICE
+# ================================
+# Pool de processos de inferência TTS: cada processo carrega o próprio modelo,
+# o event loop só enfileira e aguarda (fila limitada, timeout por requisição)
+# ================================
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from prometheus_client import Counter, Gauge, Histogram
+from audio_encoding import get_encoder
+from config import config
+
+logger = logging.getLogger(__name__)
+
+TTS_POOL_WORKERS = Gauge("godofreda_tts_pool_workers", "Processos de inferência TTS")
+TTS_POOL_BUSY = Gauge("godofreda_tts_pool_busy", "Sínteses em execução")
+TTS_QUEUE_DEPTH = Gauge("godofreda_tts_queue_depth", "Sínteses aguardando um processo livre")
+TTS_REQUESTS = Counter("godofreda_tts_requests_total", "Sínteses por resultado", ["result"])
+TTS_DURATION = Histogram(
+    "godofreda_tts_duration_seconds", "Duração da síntese no worker",
+    buckets=(0.25, 0.5, 1, 2, 4, 8, 16, 32, 64),
+)
+TTS_WAIT = Histogram(
+    "godofreda_tts_queue_wait_seconds", "Espera na fila até um worker iniciar a síntese",
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 2, 5, 10, 30, 60),
+)
+
+
+class TTSUnavailable(Exception):
+    """Pool não iniciado ou modelo não carregado (503)"""
+
+
+class TTSQueueFull(Exception):
+    """Fila de síntese cheia: backpressure para o cliente (503 + Retry-After)"""
+
+
+class TTSTimeout(Exception):
+    """Síntese não terminou dentro de ``config.tts.timeout`` (504)"""
+
+
+# ================================
+# LADO DO WORKER (processo filho)
+# ================================
+_engine = None
+
+
+class CoquiEngine:
+    """Modelo Coqui carregado uma vez por processo.
+
+    Motores devolvem ``(pcm, sample_rate)``: PCM s16le mono em memória; o formato
+    final fica a cargo do encoder (audio_encoding).
+    """
+
+    def __init__(self, model_name: str, threads: int):
+        import torch
+        from TTS.api import TTS
+
+        torch.set_num_threads(threads)
+        os.environ['COQUI_TOS_AGREED'] = '1'
+        self.tts = TTS(model_name=model_name)
+
+    def synthesize(self, text: str, language: str, speaker: str) -> Tuple[bytes, int]:
+        import numpy as np
+
+        wav = np.asarray(self.tts.tts(text=text, language=language, speaker=speaker), dtype=np.float32)
+        # Mesma normalização de pico do tts_to_file (save_wav do Coqui)
+        peak = float(np.max(np.abs(wav))) if wav.size else 0.0
+        pcm = wav * (32767 / max(0.01, peak))
+        return pcm.astype("<i2").tobytes(), self.tts.synthesizer.output_sample_rate
+
+
+def coqui_engine(threads: int) -> CoquiEngine:
+    return CoquiEngine(config.tts.model, threads)
+
+
+def _init_worker(factory: Callable[[int], Any], threads: int) -> None:
+    global _engine
+    _engine = factory(threads)
+
+
+def _warmup() -> int:
+    return os.getpid()
+
+
+def _synthesize(text: str, language: str, speaker: str, audio_format: str, submitted: float):
+    started = time.time()
+    pcm, sample_rate = _engine.synthesize(text, language, speaker)
+    audio = get_encoder(audio_format).encode(pcm, sample_rate)
+    return audio, started - submitted, time.time() - started
+
+
+# ================================
+# LADO DA API (event loop)
+# ================================
+class TTSWorkerPool:
+    """Pool de processos de síntese com fila limitada.
+
+    Até ``workers`` sínteses rodam em paralelo e até ``max_queue`` aguardam; além
+    disso ``synthesize`` falha imediatamente com TTSQueueFull. Uma vaga só é liberada
+    quando o worker de fato termina (mesmo após timeout), para a fila refletir a carga real.
+    """
+
+    def __init__(
+        self,
+        workers: int = None,
+        threads_per_worker: int = None,
+        max_queue: int = None,
+        timeout: float = None,
+        factory: Callable[[int], Any] = coqui_engine,
+    ):
+        self.workers = workers or config.tts.workers
+        self.threads_per_worker = threads_per_worker or config.tts.threads_per_worker
+        self.max_queue = config.tts.max_queue if max_queue is None else max_queue
+        self.timeout = timeout or config.tts.timeout
+        self.factory = factory
+        self.executor: Optional[ProcessPoolExecutor] = None
+        self.ready = False
+        self.pending = 0
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        # spawn: o filho não herda o estado do event loop, conexões Redis etc.
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.factory, self.threads_per_worker),
+        )
+
+    async def start(self) -> None:
+        """Sobe os processos e espera todos carregarem o modelo"""
+        self.executor = self._new_executor()
+        loop = asyncio.get_running_loop()
+        try:
+            # Submissões simultâneas: sem worker ocioso, cada uma cria um processo
+            pids = await asyncio.gather(*(
+                loop.run_in_executor(self.executor, _warmup) for _ in range(self.workers)
+            ))
+        except Exception as e:
+            logger.error(f"Falha ao iniciar pool TTS: {e}")
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+            raise
+        self.ready = True
+        TTS_POOL_WORKERS.set(len(set(pids)))
+        logger.info(f"Pool TTS pronto: {len(set(pids))} processos, {self.threads_per_worker} threads cada")
+
+    async def stop(self) -> None:
+        self.ready = False
+        if self.executor is not None:
+            executor, self.executor = self.executor, None
+            await asyncio.get_running_loop().run_in_executor(
+                None, lambda: executor.shutdown(wait=True, cancel_futures=True)
+            )
+        TTS_POOL_WORKERS.set(0)
+
+    def _release(self) -> None:
+        self.pending -= 1
+        self._update_gauges()
+
+    def _release_from_thread(self, loop: asyncio.AbstractEventLoop) -> Callable[[Future], None]:
+        # Callbacks do Future rodam na thread do executor: o contador só muda no event loop
+        def callback(future: Future) -> None:
+            try:
+                loop.call_soon_threadsafe(self._release)
+            except RuntimeError:  # loop já encerrado (shutdown)
+                pass
+        return callback
+
+    def _update_gauges(self) -> None:
+        busy = min(self.pending, self.workers)
+        TTS_POOL_BUSY.set(busy)
+        TTS_QUEUE_DEPTH.set(self.pending - busy)
+
+    @property
+    def has_capacity(self) -> bool:
+        return self.pending < self.workers + self.max_queue
+
+    def stats(self) -> Dict[str, Any]:
+        busy = min(self.pending, self.workers)
+        return {
+            "ready": self.ready,
+            "workers": self.workers,
+            "threads_per_worker": self.threads_per_worker,
+            "busy": busy,
+            "queued": self.pending - busy,
+            "max_queue": self.max_queue,
+        }
+
+    async def synthesize(
+        self, text: str, language: str = "pt", speaker: str = None, audio_format: str = None
+    ) -> bytes:
+        """Sintetiza em um processo do pool e retorna o áudio já codificado (padrão: config.tts.audio_format)"""
+        audio, _ = await self.synthesize_timed(text, language, speaker, audio_format)
+        return audio
+
+    async def synthesize_timed(
+        self, text: str, language: str = "pt", speaker: str = None, audio_format: str = None
+    ) -> Tuple[bytes, float]:
+        """Como ``synthesize``, mais a duração da síntese no worker (sem a espera na fila)"""
+        audio_format = audio_format or config.tts.audio_format
+        get_encoder(audio_format)  # formato inválido falha aqui (ValueError), sem ocupar a fila
+        if not self.ready or self.executor is None:
+            TTS_REQUESTS.labels("unavailable").inc()
+            raise TTSUnavailable("TTS pool not ready")
+        if not self.has_capacity:
+            TTS_REQUESTS.labels("rejected").inc()
+            raise TTSQueueFull("TTS queue full")
+
+        try:
+            future = self.executor.submit(
+                _synthesize, text, language, speaker or config.tts.default_speaker, audio_format, time.time()
+            )
+        except BrokenProcessPool:
+            await self._restart()
+            TTS_REQUESTS.labels("error").inc()
+            raise TTSUnavailable("TTS pool restarting")
+        self.pending += 1
+        self._update_gauges()
+        future.add_done_callback(self._release_from_thread(asyncio.get_running_loop()))
+
+        try:
+            audio, waited, duration = await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            # Ainda na fila: sai sem ocupar worker; já em execução: termina e descarta
+            future.cancel()
+            TTS_REQUESTS.labels("timeout").inc()
+            raise TTSTimeout(f"TTS synthesis exceeded {self.timeout:.0f}s")
+        except BrokenProcessPool:
+            TTS_REQUESTS.labels("error").inc()
+            await self._restart()
+            raise TTSUnavailable("TTS worker crashed")
+        except Exception:
+            TTS_REQUESTS.labels("error").inc()
+            raise
+
+        TTS_WAIT.observe(waited)
+        TTS_DURATION.observe(duration)
+        TTS_REQUESTS.labels("ok").inc()
+        return audio, duration
+
+    async def _restart(self) -> None:
+        """Um worker morreu (OOM, segfault): o executor fica inutilizável, recria"""
+        if not self.ready:
+            return
+        logger.error("Pool TTS quebrado; reiniciando processos")
+        self.ready = False
+        broken, self.executor = self.executor, None
+        if broken is not None:
+            broken.shutdown(wait=False, cancel_futures=True)
+        try:
+            await self.start()
+        except Exception as e:
+            logger.error(f"Falha ao reiniciar pool TTS: {e}")
+
+
+# Instância global do pool TTS
+tts_pool = TTSWorkerPool()
@@ -0,0 +1,28 @@
+"""vulnerabilities.url e fingerprint para dedup da ingestão DAST
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2025-01-02 00:00:00
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("vulnerabilities") as batch:
+        batch.add_column(sa.Column("url", sa.String(length=2048), nullable=True))
+        batch.add_column(sa.Column("fingerprint", sa.String(length=64), nullable=True))
+    op.create_index("ix_vulnerabilities_fingerprint", "vulnerabilities", ["fingerprint"], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_vulnerabilities_fingerprint", table_name="vulnerabilities")
+    with op.batch_alter_table("vulnerabilities") as batch:
+        batch.drop_column("fingerprint")
+        batch.drop_column("url")
@@ -0,0 +1,63 @@
+"""índices compostos/parciais casados com as queries de endpoints/
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2025-01-03 00:00:00
+
+Cada índice corresponde a um formato de query (filtro + ORDER BY created_at, id
+da paginação keyset). No PostgreSQL os índices são criados com CONCURRENTLY
+para não bloquear escritas em tabelas grandes.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+# (nome, tabela, colunas, predicado do índice parcial)
+INDEXES = [
+    # GET /scans (keyset por usuário) e "scans recentes" do dashboard
+    ("ix_scans_user_id_created_at_id", "scans", ["user_id", "created_at", "id"], None),
+    # contagens do dashboard: user_id + status
+    ("ix_scans_user_id_status", "scans", ["user_id", "status"], None),
+    ("ix_scans_running_user_id", "scans", ["user_id"], "status = 'running'"),
+    ("ix_scan_results_scan_id", "scan_results", ["scan_id"], None),
+    # GET /targets (keyset por usuário) e resolução do alvo na ingestão DAST
+    ("ix_targets_user_id_created_at_id", "targets", ["user_id", "created_at", "id"], None),
+    ("ix_targets_user_id_host", "targets", ["user_id", "host"], None),
+    # GET /vulnerabilities: sem filtro e com cada filtro opcional
+    ("ix_vulnerabilities_created_at_id", "vulnerabilities", ["created_at", "id"], None),
+    ("ix_vulnerabilities_severity_created_at_id", "vulnerabilities", ["severity", "created_at", "id"], None),
+    ("ix_vulnerabilities_status_created_at_id", "vulnerabilities", ["status", "created_at", "id"], None),
+    ("ix_vulnerabilities_target_id_created_at_id", "vulnerabilities", ["target_id", "created_at", "id"], None),
+    ("ix_vulnerabilities_open_severity", "vulnerabilities", ["severity", "created_at", "id"], "status = 'open'"),
+    # GET /reports: sem filtro, por tipo e por scan
+    ("ix_reports_created_at_id", "reports", ["created_at", "id"], None),
+    ("ix_reports_report_type_created_at_id", "reports", ["report_type", "created_at", "id"], None),
+    ("ix_reports_scan_id_created_at_id", "reports", ["scan_id", "created_at", "id"], None),
+    # GET /users (keyset) e checagem de role em uso (DELETE /roles)
+    ("ix_users_created_at_id", "users", ["created_at", "id"], None),
+    ("ix_users_role_id", "users", ["role_id"], None),
+]
+
+
+def upgrade() -> None:
+    postgres = op.get_bind().dialect.name == "postgresql"
+    for name, table, columns, where in INDEXES:
+        kwargs = {}
+        if where:
+            kwargs = {"postgresql_where": sa.text(where), "sqlite_where": sa.text(where)}
+        if postgres:
+            # CREATE INDEX CONCURRENTLY não roda dentro de transação
+            with op.get_context().autocommit_block():
+                op.create_index(name, table, columns, postgresql_concurrently=True, **kwargs)
+        else:
+            op.create_index(name, table, columns, **kwargs)
+
+
+def downgrade() -> None:
+    for name, table, _, _ in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,151 @@
+"""user_stats: contadores do dashboard mantidos por triggers
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2025-01-04 00:00:00
+
+Cada INSERT/DELETE (e UPDATE das colunas relevantes) em scans, targets e
+vulnerabilities aplica o delta na linha do dono em user_stats, de forma que o
+dashboard lê uma única linha independente do volume de achados. Os triggers
+são criados antes do backfill: CREATE TRIGGER bloqueia escritas na tabela até
+o commit, então nenhuma linha fica de fora da contagem.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+SEVERITIES = ("critical", "high", "medium", "low")
+
+# tabela -> (colunas cujo UPDATE altera os contadores, {contador: condição sobre a linha})
+COUNTERS = {
+    "scans": (
+        ("user_id", "status"),
+        {
+            "total_scans": None,
+            "active_scans": "{row}.status = 'running'",
+            "completed_scans": "{row}.status = 'completed'",
+        },
+    ),
+    "targets": (("user_id",), {"total_targets": None}),
+    "vulnerabilities": (
+        ("user_id", "severity"),
+        {f"vulns_{s}": f"{{row}}.severity = '{s}'" for s in SEVERITIES},
+    ),
+}
+
+
+def _apply(table: str, row: str, sign: str, sqlite: bool) -> str:
+    """Statements que somam (+) ou subtraem (-) a linha OLD/NEW dos contadores do dono"""
+    _, counters = COUNTERS[table]
+    deltas = ", ".join(
+        f"{col} = {col} {sign} " + ("1" if cond is None else f"(CASE WHEN {cond.format(row=row)} THEN 1 ELSE 0 END)")
+        for col, cond in counters.items()
+    )
+    ensure = (
+        f"INSERT OR IGNORE INTO user_stats (user_id) SELECT {row}.user_id WHERE {row}.user_id IS NOT NULL"
+        if sqlite else
+        f"INSERT INTO user_stats (user_id) SELECT {row}.user_id WHERE {row}.user_id IS NOT NULL "
+        "ON CONFLICT (user_id) DO NOTHING"
+    )
+    return f"{ensure}; UPDATE user_stats SET {deltas} WHERE user_id = {row}.user_id;"
+
+
+def _changed(table: str, sqlite: bool) -> str:
+    columns, _ = COUNTERS[table]
+    op_ = "IS NOT" if sqlite else "IS DISTINCT FROM"
+    return " OR ".join(f"OLD.{c} {op_} NEW.{c}" for c in columns)
+
+
+def _create_triggers(table: str, sqlite: bool) -> None:
+    columns = ", ".join(COUNTERS[table][0])
+    if sqlite:
+        op.execute(
+            f"CREATE TRIGGER user_stats_{table}_insert AFTER INSERT ON {table} "
+            f"BEGIN {_apply(table, 'NEW', '+', True)} END"
+        )
+        op.execute(
+            f"CREATE TRIGGER user_stats_{table}_delete AFTER DELETE ON {table} "
+            f"BEGIN {_apply(table, 'OLD', '-', True)} END"
+        )
+        op.execute(
+            f"CREATE TRIGGER user_stats_{table}_update AFTER UPDATE OF {columns} ON {table} "
+            f"WHEN {_changed(table, True)} "
+            f"BEGIN {_apply(table, 'OLD', '-', True)} {_apply(table, 'NEW', '+', True)} END"
+        )
+        return
+    op.execute(
+        f"CREATE FUNCTION user_stats_{table}() RETURNS trigger AS $$\n"
+        "BEGIN\n"
+        f"  IF TG_OP <> 'INSERT' THEN {_apply(table, 'OLD', '-', False)} END IF;\n"
+        f"  IF TG_OP <> 'DELETE' THEN {_apply(table, 'NEW', '+', False)} END IF;\n"
+        "  RETURN NULL;\n"
+        "END $$ LANGUAGE plpgsql"
+    )
+    op.execute(
+        f"CREATE TRIGGER user_stats_{table}_insert_delete AFTER INSERT OR DELETE ON {table} "
+        f"FOR EACH ROW EXECUTE FUNCTION user_stats_{table}()"
+    )
+    # rescans (upsert de vulnerabilidades) reescrevem severity sem alterá-la: o WHEN evita o trabalho
+    op.execute(
+        f"CREATE TRIGGER user_stats_{table}_update AFTER UPDATE OF {columns} ON {table} "
+        f"FOR EACH ROW WHEN ({_changed(table, False)}) EXECUTE FUNCTION user_stats_{table}()"
+    )
+
+
+def _backfill() -> None:
+    op.execute(
+        "INSERT INTO user_stats (user_id) "
+        + " UNION ".join(f"SELECT user_id FROM {t} WHERE user_id IS NOT NULL" for t in COUNTERS)
+    )
+    sets = []
+    for table, (_, counters) in COUNTERS.items():
+        for col, cond in counters.items():
+            where = f"{table}.user_id = user_stats.user_id"
+            if cond:
+                where += " AND " + cond.format(row=table)
+            sets.append(f"{col} = (SELECT count(*) FROM {table} WHERE {where})")
+    op.execute("UPDATE user_stats SET " + ", ".join(sets))
+
+
+def upgrade() -> None:
+    sqlite = op.get_bind().dialect.name == "sqlite"
+    if sqlite:
+        op.create_index("ix_vulnerabilities_user_id_severity", "vulnerabilities", ["user_id", "severity"])
+    else:
+        with op.get_context().autocommit_block():
+            op.create_index(
+                "ix_vulnerabilities_user_id_severity", "vulnerabilities", ["user_id", "severity"],
+                postgresql_concurrently=True,
+            )
+
+    op.create_table(
+        "user_stats",
+        sa.Column("user_id", sa.Integer(), autoincrement=False, nullable=False),
+        *[
+            sa.Column(col, sa.Integer(), server_default=sa.text("0"), nullable=False)
+            for _, counters in COUNTERS.values() for col in counters
+        ],
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+    for table in COUNTERS:
+        _create_triggers(table, sqlite)
+    _backfill()
+
+
+def downgrade() -> None:
+    sqlite = op.get_bind().dialect.name == "sqlite"
+    for table in COUNTERS:
+        if sqlite:
+            for event in ("insert", "delete", "update"):
+                op.execute(f"DROP TRIGGER IF EXISTS user_stats_{table}_{event}")
+        else:
+            op.execute(f"DROP TRIGGER IF EXISTS user_stats_{table}_insert_delete ON {table}")
+            op.execute(f"DROP TRIGGER IF EXISTS user_stats_{table}_update ON {table}")
+            op.execute(f"DROP FUNCTION IF EXISTS user_stats_{table}()")
+    op.drop_table("user_stats")
+    op.drop_index("ix_vulnerabilities_user_id_severity", table_name="vulnerabilities")
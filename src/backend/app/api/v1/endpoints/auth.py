@@ -1,7 +1,8 @@
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
 from app.core.auth import (
     verify_password, 
@@ -14,16 +15,18 @@ from app.models.user import User
 from app.models.role import Role
 from app.schemas.auth import Token, UserCreate, UserResponse
 from app.core.config import settings
+from app.core.principal import principal_cache
 
 router = APIRouter()
 
 @router.post("/register", response_model=UserResponse)
-async def register(user: UserCreate, db: Session = Depends(get_db)):
+async def register(user: UserCreate, db: AsyncSession = Depends(get_db)):
     """Registrar novo usuário (sempre como viewer para evitar escalonamento)."""
     # Verificar se usuário já existe
-    existing_user = db.query(User).filter(
+    result = await db.execute(select(User).where(
         (User.username == user.username.lower()) | (User.email == user.email)
-    ).first()
+    ))
+    existing_user = result.scalars().first()
     
     if existing_user:
         raise HTTPException(
@@ -32,7 +35,8 @@ async def register(user: UserCreate, db: Session = Depends(get_db)):
         )
     
     # Forçar role viewer no registro
-    viewer = db.query(Role).filter(Role.name == "viewer").first()
+    result = await db.execute(select(Role).where(Role.name == "viewer"))
+    viewer = result.scalars().first()
     role_id = viewer.id if viewer else None
     
     # Criar novo usuário
@@ -47,16 +51,17 @@ async def register(user: UserCreate, db: Session = Depends(get_db)):
     )
     
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     
     return db_user
 
 @router.post("/login", response_model=Token)
-async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
     """Login do usuário"""
     # Buscar usuário
-    user = db.query(User).filter(User.username == form_data.username.lower()).first()
+    result = await db.execute(select(User).where(User.username == form_data.username.lower()))
+    user = result.scalars().first()
     
     if not user or not verify_password(form_data.password, user.hashed_password):
         raise HTTPException(
@@ -80,7 +85,8 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session =
     # Atualizar last_login
     from datetime import datetime as _dt
     user.last_login = _dt.utcnow()
-    db.commit()
+    await db.commit()
+    await principal_cache.invalidate(user.username)
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.get("/me", response_model=UserResponse)
@@ -1,17 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from pydantic import BaseModel, HttpUrl
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, HttpUrl
 from typing import Optional
 
+from app.core.config import settings
+
 from app.core.auth import get_current_user
 from app.core.security import require_permission
 from app.models.user import User
 from app.services.dast_service import dast_service
+from app.services.dast_engine import DASTQueueFull
 
 router = APIRouter()
 
 class DASTSubmitRequest(BaseModel):
     target: HttpUrl
-    tool: str = "zap"  # zap | nuclei | both
+    tool: str = Field(default="zap", pattern="^(zap|nuclei|both)$")
 
 class DASTSubmitResponse(BaseModel):
     job_id: str
@@ -20,13 +26,52 @@ class DASTSubmitResponse(BaseModel):
 @router.post("/submit", response_model=DASTSubmitResponse)
 @require_permission("write:scans")
 async def dast_submit(req: DASTSubmitRequest, current_user: User = Depends(get_current_user)):
-    job_id = await dast_service.submit(str(req.target), req.tool)
+    try:
+        job_id = await dast_service.submit(str(req.target), req.tool, owner_id=current_user.id)
+    except DASTQueueFull as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
     return DASTSubmitResponse(job_id=job_id, status="queued")
 
+@router.get("/jobs")
+@require_permission("read:scans")
+async def dast_jobs(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(50, ge=1, le=200),
+    current_user: User = Depends(get_current_user),
+):
+    return await dast_service.list_jobs(current_user.id, skip=skip, limit=limit)
+
+def _sse(events):
+    async def body():
+        async for event in events:
+            if event is None:
+                yield ": keepalive\n\n"
+            else:
+                yield f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/stream")
+@require_permission("read:scans")
+async def dast_stream_all(current_user: User = Depends(get_current_user)):
+    """Server-Sent Events com progresso, achados e status de todos os jobs do usuário"""
+    return _sse(dast_service.stream(current_user.id, keepalive=settings.DAST_STREAM_KEEPALIVE_SECONDS))
+
+@router.get("/stream/{job_id}")
+@require_permission("read:scans")
+async def dast_stream(job_id: str, current_user: User = Depends(get_current_user)):
+    """Server-Sent Events de um job: snapshot inicial, atualizações e status final"""
+    if not await dast_service.owns(job_id, current_user.id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job não encontrado")
+    return _sse(dast_service.stream(current_user.id, job_id, keepalive=settings.DAST_STREAM_KEEPALIVE_SECONDS))
+
 @router.get("/status/{job_id}")
 @require_permission("read:scans")
 async def dast_status(job_id: str, current_user: User = Depends(get_current_user)):
-    data = await dast_service.status(job_id)
+    data = await dast_service.status(job_id, owner_id=current_user.id)
     if not data:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job não encontrado")
     return data
@@ -34,7 +79,7 @@ async def dast_status(job_id: str, current_user: User = Depends(get_current_user
 @router.post("/cancel/{job_id}")
 @require_permission("write:scans")
 async def dast_cancel(job_id: str, current_user: User = Depends(get_current_user)):
-    ok = await dast_service.cancel(job_id)
+    ok = await dast_service.cancel(job_id, owner_id=current_user.id)
     if not ok:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Não foi possível cancelar")
     return {"status": "cancelled", "job_id": job_id} 
\ No newline at end of file
@@ -10,6 +10,7 @@ import logging
 from app.core.database import get_db
 from app.core.security import get_current_user, require_permission
 from app.models.user import User
+from app.services import platform_metrics
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -22,15 +23,8 @@ async def get_metrics(
 ):
     """Get system metrics"""
     try:
-        # Placeholder implementation
-        return {
-            "total_targets": 150,
-            "active_scans": 8,
-            "total_vulnerabilities": 1250,
-            "critical_vulnerabilities": 45,
-            "scan_success_rate": 96.5,
-            "average_scan_duration": "25m 30s"
-        }
+        # Somas de user_stats (mantida por triggers) + contadores/histogramas de scans no Redis
+        return await platform_metrics.snapshot(db)
     except Exception as e:
         logger.error(f"Error getting metrics: {e}")
         raise HTTPException(
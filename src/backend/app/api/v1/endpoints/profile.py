@@ -1,8 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel, EmailStr
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.database import get_db
 from app.core.auth import get_current_user, get_password_hash, verify_password
+from app.core.principal import Principal, principal_cache
 from app.models.user import User
 
 router = APIRouter()
@@ -17,6 +19,14 @@ class PasswordChange(BaseModel):
     current_password: str
     new_password: str
 
+async def _load_user(db: AsyncSession, principal: Principal) -> User:
+    """Carrega a instância ORM do usuário autenticado para alterações"""
+    result = await db.execute(select(User).where(User.id == principal.id))
+    user = result.scalars().first()
+    if user is None:
+        raise HTTPException(status_code=404, detail="Usuário não encontrado")
+    return user
+
 @router.get("/")
 async def get_profile(current_user: User = Depends(get_current_user)):
     return {
@@ -32,25 +42,29 @@ async def get_profile(current_user: User = Depends(get_current_user)):
     }
 
 @router.put("/")
-async def update_profile(payload: ProfileUpdate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def update_profile(payload: ProfileUpdate, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
     if payload.email:
-        exists = db.query(User).filter(User.email == payload.email, User.id != current_user.id).first()
+        result = await db.execute(select(User).where(User.email == payload.email, User.id != current_user.id))
+        exists = result.scalars().first()
         if exists:
             raise HTTPException(status_code=400, detail="Email já em uso")
     # role_id não é atualizável via endpoint de perfil
+    user = await _load_user(db, current_user)
     updatable = payload.model_dump(exclude_unset=True)
     for field, value in updatable.items():
-        setattr(current_user, field, value)
-    db.commit()
-    db.refresh(current_user)
+        setattr(user, field, value)
+    await db.commit()
+    await principal_cache.invalidate(user.username)
     return {"message": "Perfil atualizado"}
 
 @router.post("/change-password")
-async def change_password(payload: PasswordChange, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    if not verify_password(payload.current_password, current_user.hashed_password):
+async def change_password(payload: PasswordChange, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
+    user = await _load_user(db, current_user)
+    if not verify_password(payload.current_password, user.hashed_password):
         raise HTTPException(status_code=400, detail="Senha atual incorreta")
     if len(payload.new_password) < 8:
         raise HTTPException(status_code=400, detail="A nova senha deve ter pelo menos 8 caracteres")
-    current_user.hashed_password = get_password_hash(payload.new_password)
-    db.commit()
+    user.hashed_password = get_password_hash(payload.new_password)
+    await db.commit()
+    await principal_cache.invalidate(user.username)
     return {"message": "Senha alterada"} 
\ No newline at end of file
@@ -4,15 +4,20 @@ Report generation endpoints
 """
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 import logging
 
 from app.core.database import get_db
 from app.core.security import get_current_user, require_permission
+from app.core.cache import cache
+from app.core.pagination import decode_cursor
+from app.core.serialization import raw_response
 from app.models.user import User
 from app.models.report import Report
 from app.schemas.report import ReportCreate, ReportUpdate, ReportResponse
+from app.services.cached_queries import REPORTS, report_detail, report_page
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -22,20 +27,18 @@ router = APIRouter()
 async def get_reports(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Cursor opaco retornado em X-Next-Cursor"),
     type: Optional[str] = Query(None, alias="report_type"),
     target_id: Optional[int] = Query(None),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get all reports with filters"""
+    after = decode_cursor(cursor)
     try:
-        query = db.query(Report)
-        if type:
-            query = query.filter(Report.report_type == type)
-        if target_id:
-            query = query.filter(Report.scan_id == target_id)  # simplistic link via scan
-        reports = query.offset(skip).limit(limit).all()
-        return reports
+        # target_id filtra por scan_id (vínculo simplificado via scan)
+        page = await report_page(db, limit, skip, after, type, target_id)
+        return raw_response(page)
     except Exception as e:
         logger.error(f"Error getting reports: {e}")
         raise HTTPException(
@@ -48,7 +51,7 @@ async def get_reports(
 async def create_report(
     report_in: ReportCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     try:
         report = Report(
@@ -61,11 +64,12 @@ async def create_report(
             status="draft",
         )
         db.add(report)
-        db.commit()
-        db.refresh(report)
+        await db.commit()
+        await db.refresh(report)
+        await cache.invalidate(REPORTS)
         return report
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error creating report: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -74,30 +78,34 @@ async def create_report(
 
 @router.get("/{report_id}", response_model=ReportResponse)
 @require_permission("read:reports")
-async def get_report(report_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    report = db.query(Report).filter(Report.id == report_id).first()
+async def get_report(report_id: int, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    report = await report_detail(db, report_id)
     if not report:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Report not found")
-    return report
+    return raw_response(report)
 
 @router.put("/{report_id}", response_model=ReportResponse)
 @require_permission("write:reports")
-async def update_report(report_id: int, report_in: ReportUpdate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    report = db.query(Report).filter(Report.id == report_id).first()
+async def update_report(report_id: int, report_in: ReportUpdate, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    result = await db.execute(select(Report).where(Report.id == report_id))
+    report = result.scalars().first()
     if not report:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Report not found")
     for field, value in report_in.model_dump(exclude_unset=True).items():
         setattr(report, field, value)
-    db.commit()
-    db.refresh(report)
+    await db.commit()
+    await db.refresh(report)
+    await cache.invalidate(REPORTS)
     return report
 
 @router.delete("/{report_id}")
 @require_permission("write:reports")
-async def delete_report(report_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    report = db.query(Report).filter(Report.id == report_id).first()
+async def delete_report(report_id: int, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    result = await db.execute(select(Report).where(Report.id == report_id))
+    report = result.scalars().first()
     if not report:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Report not found")
-    db.delete(report)
-    db.commit()
+    await db.delete(report)
+    await db.commit()
+    await cache.invalidate(REPORTS)
     return {"message": "Report deleted successfully"} 
\ No newline at end of file
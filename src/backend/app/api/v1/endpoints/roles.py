@@ -1,60 +1,73 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select, exists
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
 from app.core.database import get_db
 from app.models.role import Role
 from app.schemas.role import RoleCreate, RoleUpdate, RoleResponse
 from app.core.security import require_permission, get_current_user
+from app.core.principal import principal_cache
 from app.models.user import User
 
 router = APIRouter()
 
+async def _invalidate_role_principals(db: AsyncSession, role_id: int) -> None:
+    """Invalida os principals em cache de todos os usuários da role"""
+    result = await db.execute(select(User.username).where(User.role_id == role_id))
+    await principal_cache.invalidate(*result.scalars().all())
+
 @router.get("/", response_model=List[RoleResponse])
 @require_permission("read:roles")
-async def list_roles(db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    return db.query(Role).all()
+async def list_roles(db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
+    result = await db.execute(select(Role))
+    return result.scalars().all()
 
 @router.post("/", response_model=RoleResponse, status_code=status.HTTP_201_CREATED)
 @require_permission("write:roles")
-async def create_role(role_in: RoleCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    exists = db.query(Role).filter(Role.name == role_in.name).first()
-    if exists:
+async def create_role(role_in: RoleCreate, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
+    result = await db.execute(select(Role).where(Role.name == role_in.name))
+    if result.scalars().first():
         raise HTTPException(status_code=400, detail="Role já existe")
     role = Role(name=role_in.name, description=role_in.description)
     db.add(role)
-    db.commit()
-    db.refresh(role)
+    await db.commit()
+    await db.refresh(role)
     return role
 
 @router.get("/{role_id}", response_model=RoleResponse)
 @require_permission("read:roles")
-async def get_role(role_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    role = db.query(Role).filter(Role.id == role_id).first()
+async def get_role(role_id: int, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
+    result = await db.execute(select(Role).where(Role.id == role_id))
+    role = result.scalars().first()
     if not role:
         raise HTTPException(status_code=404, detail="Role não encontrada")
     return role
 
 @router.put("/{role_id}", response_model=RoleResponse)
 @require_permission("write:roles")
-async def update_role(role_id: int, role_in: RoleUpdate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    role = db.query(Role).filter(Role.id == role_id).first()
+async def update_role(role_id: int, role_in: RoleUpdate, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
+    result = await db.execute(select(Role).where(Role.id == role_id))
+    role = result.scalars().first()
     if not role:
         raise HTTPException(status_code=404, detail="Role não encontrada")
     for k, v in role_in.model_dump(exclude_unset=True).items():
         setattr(role, k, v)
-    db.commit()
-    db.refresh(role)
+    await db.commit()
+    await db.refresh(role)
+    await _invalidate_role_principals(db, role.id)
     return role
 
 @router.delete("/{role_id}")
 @require_permission("write:roles")
-async def delete_role(role_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
-    role = db.query(Role).filter(Role.id == role_id).first()
+async def delete_role(role_id: int, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
+    result = await db.execute(select(Role).where(Role.id == role_id))
+    role = result.scalars().first()
     if not role:
         raise HTTPException(status_code=404, detail="Role não encontrada")
-    if role.users:
+    has_users = await db.scalar(select(exists().where(User.role_id == role.id)))
+    if has_users:
         raise HTTPException(status_code=400, detail="Não é possível excluir role com usuários associados")
-    db.delete(role)
-    db.commit()
+    await db.delete(role)
+    await db.commit()
     return {"message": "Role removida"} 
\ No newline at end of file
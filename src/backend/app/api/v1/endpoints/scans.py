@@ -3,28 +3,46 @@ Securet Flow SSC - Scans Endpoints
 Scan management endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from app.models import User, Scan, Target
+from app.models.scan import ScanResult
 from app.schemas import ScanCreate, ScanUpdate, ScanResponse
 from app.core.database import get_db
 from app.core.auth import get_current_user
 from datetime import datetime
 from app.core.security import require_permission
+from app.core.cache import cache
+from app.core.pagination import decode_cursor
+from app.core.serialization import raw_response
+from app.services.cached_queries import DASHBOARD, SCANS, scan_detail, scan_page, user_namespaces
+from app.services.export import export_response
+from app.services.platform_metrics import OUTCOMES, scan_metrics
 
 router = APIRouter()
 
+async def _invalidate(user_id: int) -> None:
+    """Leituras cacheadas de scans e o dashboard do usuário"""
+    await cache.invalidate(*user_namespaces(user_id, SCANS, DASHBOARD))
+
+def _duration(scan: Scan):
+    if not scan.started_at:
+        return None
+    return ((scan.completed_at or datetime.utcnow()) - scan.started_at).total_seconds()
+
 @router.post("/", response_model=ScanResponse)
 @require_permission("write:scans")
 async def create_scan(
     scan: ScanCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Criar novo scan"""
     # Verificar se target existe
-    target = db.query(Target).filter(Target.id == scan.target_id).first()
+    result = await db.execute(select(Target).where(Target.id == scan.target_id))
+    target = result.scalars().first()
     if not target:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -47,8 +65,9 @@ async def create_scan(
     )
     
     db.add(db_scan)
-    db.commit()
-    db.refresh(db_scan)
+    await db.commit()
+    await _invalidate(current_user.id)
+    await db.refresh(db_scan)
     
     return db_scan
 
@@ -57,26 +76,23 @@ async def create_scan(
 async def list_scans(
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description="Cursor opaco retornado em X-Next-Cursor"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Listar scans do usuário"""
-    scans = db.query(Scan).filter(Scan.user_id == current_user.id)\
-        .offset(skip).limit(limit).all()
-    return scans
+    page = await scan_page(db, current_user.id, limit, skip, decode_cursor(cursor))
+    return raw_response(page)
 
 @router.get("/{scan_id}", response_model=ScanResponse)
 @require_permission("read:scans")
 async def get_scan(
     scan_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Obter scan específico"""
-    scan = db.query(Scan).filter(
-        Scan.id == scan_id,
-        Scan.user_id == current_user.id
-    ).first()
+    scan = await scan_detail(db, current_user.id, scan_id)
     
     if not scan:
         raise HTTPException(
@@ -84,7 +100,33 @@ async def get_scan(
             detail="Scan não encontrado"
         )
     
-    return scan
+    return raw_response(scan)
+
+@router.get("/{scan_id}/results/export")
+@require_permission("read:scans")
+async def export_scan_results(
+    scan_id: int,
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    accept_encoding: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Exporta os resultados do scan em streaming (NDJSON ou CSV, gzip se aceito)"""
+    owned = await db.scalar(select(Scan.id).where(Scan.id == scan_id, Scan.user_id == current_user.id))
+    if owned is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Scan não encontrado"
+        )
+    
+    # result_data sai como o texto JSON gravado pela ferramenta
+    query = (
+        select(ScanResult.id, ScanResult.scan_id, ScanResult.tool_name, ScanResult.status,
+               ScanResult.result_data, ScanResult.created_at)
+        .where(ScanResult.scan_id == scan_id)
+        .order_by(ScanResult.created_at, ScanResult.id)
+    )
+    return export_response(query, format, accept_encoding, f"scan-{scan_id}-results")
 
 @router.put("/{scan_id}", response_model=ScanResponse)
 @require_permission("write:scans")
@@ -92,13 +134,14 @@ async def update_scan(
     scan_id: int,
     scan_update: ScanUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Atualizar scan"""
-    scan = db.query(Scan).filter(
+    result = await db.execute(select(Scan).where(
         Scan.id == scan_id,
         Scan.user_id == current_user.id
-    ).first()
+    ))
+    scan = result.scalars().first()
     
     if not scan:
         raise HTTPException(
@@ -106,12 +149,16 @@ async def update_scan(
             detail="Scan não encontrado"
         )
     
+    previous_status = scan.status
     # Atualizar campos
     for field, value in scan_update.dict(exclude_unset=True).items():
         setattr(scan, field, value)
     
-    db.commit()
-    db.refresh(scan)
+    await db.commit()
+    await _invalidate(current_user.id)
+    await db.refresh(scan)
+    if previous_status == "running" and scan.status in OUTCOMES:
+        await scan_metrics.finished("scan", scan.status, _duration(scan))
     
     return scan
 
@@ -120,13 +167,14 @@ async def update_scan(
 async def delete_scan(
     scan_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Deletar scan"""
-    scan = db.query(Scan).filter(
+    result = await db.execute(select(Scan).where(
         Scan.id == scan_id,
         Scan.user_id == current_user.id
-    ).first()
+    ))
+    scan = result.scalars().first()
     
     if not scan:
         raise HTTPException(
@@ -134,8 +182,13 @@ async def delete_scan(
             detail="Scan não encontrado"
         )
     
-    db.delete(scan)
-    db.commit()
+    was_running = scan.status == "running"
+    await db.delete(scan)
+    await db.commit()
+    await _invalidate(current_user.id)
+    if was_running:
+        # Removido no meio da execução: conta como cancelado
+        await scan_metrics.finished("scan", "cancelled", None)
     
     return {"message": "Scan deletado com sucesso"}
 
@@ -144,13 +197,14 @@ async def delete_scan(
 async def start_scan(
     scan_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Iniciar scan"""
-    scan = db.query(Scan).filter(
+    result = await db.execute(select(Scan).where(
         Scan.id == scan_id,
         Scan.user_id == current_user.id
-    ).first()
+    ))
+    scan = result.scalars().first()
     
     if not scan:
         raise HTTPException(
@@ -168,8 +222,9 @@ async def start_scan(
     scan.status = "running"
     scan.started_at = datetime.utcnow()
     
-    db.commit()
-    db.refresh(scan)
+    await db.commit()
+    await _invalidate(current_user.id)
+    await db.refresh(scan)
     
     # TODO: Implementar execução real do scan
     # await execute_scan(scan)
@@ -181,13 +236,14 @@ async def start_scan(
 async def stop_scan(
     scan_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Parar scan"""
-    scan = db.query(Scan).filter(
+    result = await db.execute(select(Scan).where(
         Scan.id == scan_id,
         Scan.user_id == current_user.id
-    ).first()
+    ))
+    scan = result.scalars().first()
     
     if not scan:
         raise HTTPException(
@@ -205,7 +261,9 @@ async def stop_scan(
     scan.status = "completed"
     scan.completed_at = datetime.utcnow()
     
-    db.commit()
-    db.refresh(scan)
+    await db.commit()
+    await _invalidate(current_user.id)
+    await db.refresh(scan)
+    await scan_metrics.finished("scan", "completed", _duration(scan))
     
     return {"message": "Scan parado com sucesso"} 
\ No newline at end of file
@@ -3,28 +3,42 @@ Securet Flow SSC - Targets Endpoints
 Target management endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from datetime import datetime
+import logging
 from app.models import User, Target
-from app.schemas import TargetCreate, TargetUpdate, TargetResponse
+from app.schemas import TargetCreate, TargetUpdate, TargetResponse, BulkCreateRequest, BulkCreateResponse
 from app.core.database import get_db
 from app.core.auth import get_current_user
 from app.core.security import require_permission
 from app.core.cache import cache
+from app.core.pagination import decode_cursor
+from app.core.serialization import raw_response
+from app.services.bulk import insert_rows, validate_items
+from app.services.cached_queries import DASHBOARD, TARGETS, target_detail, target_page, user_namespaces
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+async def _invalidate(user_id: int) -> None:
+    """Leituras cacheadas de targets e o dashboard do usuário"""
+    await cache.invalidate(*user_namespaces(user_id, TARGETS, DASHBOARD))
+
 @router.post("/", response_model=TargetResponse)
 @require_permission("write:targets")
 async def create_target(
     target: TargetCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Criar novo target"""
     # Criar target
-    db_target = Target(
+    db_target = await Target.create(
+        db,
         name=target.name,
         host=target.host,
         port=target.port,
@@ -32,63 +46,69 @@ async def create_target(
         description=target.description,
         user_id=current_user.id
     )
-    
-    db.add(db_target)
-    db.commit()
-    db.refresh(db_target)
 
-    # Invalida cache de listagem do usuário
-    await cache.invalidate_prefix(f"targets:{current_user.id}:")
+    # Invalida cache de targets do usuário
+    await _invalidate(current_user.id)
     
     return db_target
 
+@router.post("/bulk", response_model=BulkCreateResponse)
+@require_permission("write:targets")
+async def bulk_create_targets(
+    payload: BulkCreateRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Importar targets em lote: uma transação, INSERT multi-row e uma única invalidação.
+
+    Itens inválidos são devolvidos em ``errors`` (pelo índice) e não impedem os demais.
+    """
+    accepted, errors = validate_items(TargetCreate, payload.items)
+    now = datetime.utcnow()
+    rows = [
+        {**item.model_dump(), "user_id": current_user.id, "created_at": now, "updated_at": now}
+        for _, item in accepted
+    ]
+    try:
+        ids = await insert_rows(db, Target.__table__, rows)
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Error creating targets in bulk: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal server error")
+    if ids:
+        await _invalidate(current_user.id)
+    return BulkCreateResponse(created=len(ids), ids=ids, errors=errors)
+
 @router.get("/", response_model=List[TargetResponse])
 @require_permission("read:targets")
 async def list_targets(
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(None, description="Cursor opaco retornado em X-Next-Cursor"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Listar targets do usuário"""
-    cache_key = cache._make_key(f"targets:{current_user.id}:list", skip, limit)
-    cached = await cache.get_json(cache_key)
-    if cached is not None:
-        return cached
-
-    targets = db.query(Target).filter(Target.user_id == current_user.id)\
-        .offset(skip).limit(limit).all()
-
     # Cache curto (30s) para aliviar carga em listagens
-    await cache.set_json(cache_key, [t.__dict__ for t in targets], ttl_seconds=30)
-    return targets
+    page = await target_page(db, current_user.id, limit, skip, decode_cursor(cursor))
+    return raw_response(page)
 
 @router.get("/{target_id}", response_model=TargetResponse)
 @require_permission("read:targets")
 async def get_target(
     target_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Obter target específico"""
-    cache_key = cache._make_key(f"targets:{current_user.id}:get", target_id)
-    cached = await cache.get_json(cache_key)
-    if cached is not None:
-        return cached
-
-    target = db.query(Target).filter(
-        Target.id == target_id,
-        Target.user_id == current_user.id
-    ).first()
-    
+    target = await target_detail(db, current_user.id, target_id)
     if not target:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Target não encontrado"
         )
-    
-    await cache.set_json(cache_key, target.__dict__, ttl_seconds=60)
-    return target
+    return raw_response(target)
 
 @router.put("/{target_id}", response_model=TargetResponse)
 @require_permission("write:targets")
@@ -96,19 +116,16 @@ async def update_target(
     target_id: int,
     payload: TargetUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    db_target = db.query(Target).filter(Target.id == target_id, Target.user_id == current_user.id).first()
+    result = await db.execute(select(Target).where(Target.id == target_id, Target.user_id == current_user.id))
+    db_target = result.scalars().first()
     if not db_target:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Target não encontrado")
 
-    for field, value in payload.dict(exclude_unset=True).items():
-        setattr(db_target, field, value)
-
-    db.commit()
-    db.refresh(db_target)
+    await db_target.update(db, **payload.dict(exclude_unset=True))
 
-    await cache.invalidate_prefix(f"targets:{current_user.id}:")
+    await _invalidate(current_user.id)
     return db_target
 
 @router.delete("/{target_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -116,14 +133,14 @@ async def update_target(
 async def delete_target(
     target_id: int,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    db_target = db.query(Target).filter(Target.id == target_id, Target.user_id == current_user.id).first()
+    result = await db.execute(select(Target).where(Target.id == target_id, Target.user_id == current_user.id))
+    db_target = result.scalars().first()
     if not db_target:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Target não encontrado")
 
-    db.delete(db_target)
-    db.commit()
+    await db_target.delete(db)
 
-    await cache.invalidate_prefix(f"targets:{current_user.id}:")
+    await _invalidate(current_user.id)
     return None 
\ No newline at end of file
@@ -3,15 +3,18 @@ Securet Flow SSC - Users Endpoints
 User management endpoints
 """
 
-from fastapi import APIRouter, HTTPException, status, Query, Depends
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, HTTPException, status, Query, Depends, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 import logging
 
 from app.core.database import get_db
 from app.models.user import User
 from app.schemas.auth import UserCreate, UserUpdate, UserResponse
 from app.core.security import require_permission, get_current_user
+from app.core.pagination import decode_cursor, fetch_page
+from app.core.principal import principal_cache
 
 
 logger = logging.getLogger(__name__)
@@ -20,15 +23,17 @@ router = APIRouter()
 @router.get("/", response_model=List[UserResponse])
 @require_permission("read:users")
 async def get_users(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="Cursor opaco retornado em X-Next-Cursor"),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     """Get all users with pagination"""
+    after = decode_cursor(cursor)
     try:
-        users = db.query(User).offset(skip).limit(limit).all()
-        return users
+        return await fetch_page(db, select(User), User, limit, skip=skip, after=after, response=response)
     except Exception as e:
         logger.error(f"Error getting users: {e}")
         raise HTTPException(
@@ -38,10 +43,11 @@ async def get_users(
 
 @router.post("/", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 @require_permission("write:users")
-async def create_user(user_in: UserCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def create_user(user_in: UserCreate, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
     """Create a new user"""
     try:
-        exists = db.query(User).filter((User.username == user_in.username) | (User.email == user_in.email)).first()
+        result = await db.execute(select(User).where((User.username == user_in.username) | (User.email == user_in.email)))
+        exists = result.scalars().first()
         if exists:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Username or email already exists")
         from app.core.auth import get_password_hash
@@ -55,13 +61,13 @@ async def create_user(user_in: UserCreate, db: Session = Depends(get_db), curren
             role_id=user_in.role_id,
         )
         db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
+        await db.commit()
+        await db.refresh(db_user)
         return db_user
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error creating user: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal server error")
 
@@ -69,12 +75,13 @@ async def create_user(user_in: UserCreate, db: Session = Depends(get_db), curren
 @require_permission("read:users")
 async def get_user(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     """Get user by ID"""
     try:
-        user = db.query(User).filter(User.id == user_id).first()
+        result = await db.execute(select(User).where(User.id == user_id))
+        user = result.scalars().first()
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -92,12 +99,14 @@ async def get_user(
 
 @router.put("/{user_id}", response_model=UserResponse)
 @require_permission("write:users")
-async def update_user(user_id: int, user_in: UserUpdate, db: Session = Depends(get_db), current_user: User = Depends(get_current_user)):
+async def update_user(user_id: int, user_in: UserUpdate, db: AsyncSession = Depends(get_db), current_user: User = Depends(get_current_user)):
     """Update user"""
     try:
-        user = db.query(User).filter(User.id == user_id).first()
+        result = await db.execute(select(User).where(User.id == user_id))
+        user = result.scalars().first()
         if not user:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+        previous_username = user.username
         if user_in.username is not None:
             user.username = user_in.username
         if user_in.email is not None:
@@ -110,13 +119,14 @@ async def update_user(user_id: int, user_in: UserUpdate, db: Session = Depends(g
             user.department = user_in.department
         if user_in.role_id is not None:
             user.role_id = user_in.role_id
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
+        await principal_cache.invalidate(previous_username, user.username)
         return user
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error updating user {user_id}: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal server error")
 
@@ -124,24 +134,26 @@ async def update_user(user_id: int, user_in: UserUpdate, db: Session = Depends(g
 @require_permission("write:users")
 async def delete_user(
     user_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user),
 ):
     """Delete user"""
     try:
-        user = db.query(User).filter(User.id == user_id).first()
+        result = await db.execute(select(User).where(User.id == user_id))
+        user = result.scalars().first()
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found"
             )
-        db.delete(user)
-        db.commit()
+        await db.delete(user)
+        await db.commit()
+        await principal_cache.invalidate(user.username)
         return {"message": "User deleted successfully"}
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error deleting user {user_id}: {e}")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
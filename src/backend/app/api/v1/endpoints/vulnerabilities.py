@@ -3,13 +3,18 @@ Securet Flow SSC - Vulnerabilities Endpoints
 Vulnerability management endpoints
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
+from datetime import datetime
 import logging
 
 from app.core.database import get_db
 from app.core.security import get_current_user, require_permission
+from app.core.cache import cache
+from app.core.pagination import decode_cursor
+from app.core.serialization import raw_response
 from app.models.vulnerability import Vulnerability
 from app.schemas.vulnerability import (
     VulnerabilityCreate,
@@ -17,32 +22,38 @@ from app.schemas.vulnerability import (
     VulnerabilityResponse,
 )
 from app.models.user import User
+from app.schemas.bulk import BulkCreateRequest, BulkCreateResponse, BulkItemError, BulkUpdateResponse, VulnerabilityStatusBulk
+from app.services.bulk import existing_target_ids, insert_rows, set_vulnerability_status, validate_items
+from app.services.cached_queries import (
+    DASHBOARD, VULNERABILITIES, user_namespaces, vulnerability_detail, vulnerability_page, vulnerability_query,
+)
+from app.services.export import export_response
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+async def _invalidate(*owner_ids: Optional[int]) -> None:
+    """Listagens/detalhes de vulnerabilidades (globais) e os dashboards dos donos"""
+    dashboards = {ns for owner_id in owner_ids for ns in user_namespaces(owner_id, DASHBOARD)}
+    await cache.invalidate(VULNERABILITIES, *sorted(dashboards))
+
 @router.get("/", response_model=List[VulnerabilityResponse])
 @require_permission("read:vulnerabilities")
 async def get_vulnerabilities(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Cursor opaco retornado em X-Next-Cursor"),
     severity: Optional[str] = Query(None),
     status_q: Optional[str] = Query(None, alias="status"),
     target_id: Optional[int] = Query(None),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get all vulnerabilities with filters"""
+    after = decode_cursor(cursor)
     try:
-        query = db.query(Vulnerability)
-        if severity:
-            query = query.filter(Vulnerability.severity == severity)
-        if status_q:
-            query = query.filter(Vulnerability.status == status_q)
-        if target_id:
-            query = query.filter(Vulnerability.target_id == target_id)
-        vulns = query.offset(skip).limit(limit).all()
-        return vulns
+        page = await vulnerability_page(db, limit, skip, after, severity, status_q, target_id)
+        return raw_response(page)
     except Exception as e:
         logger.error(f"Error getting vulnerabilities: {e}")
         raise HTTPException(
@@ -50,12 +61,26 @@ async def get_vulnerabilities(
             detail="Internal server error"
         )
 
+@router.get("/export")
+@require_permission("read:vulnerabilities")
+async def export_vulnerabilities(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    severity: Optional[str] = Query(None),
+    status_q: Optional[str] = Query(None, alias="status"),
+    target_id: Optional[int] = Query(None),
+    accept_encoding: Optional[str] = Header(None),
+    current_user: User = Depends(get_current_user),
+):
+    """Exporta todas as vulnerabilidades filtradas em streaming (NDJSON ou CSV, gzip se aceito)"""
+    query = vulnerability_query(severity, status_q, target_id).order_by(Vulnerability.created_at, Vulnerability.id)
+    return export_response(query, format, accept_encoding, "vulnerabilities")
+
 @router.post("/", response_model=VulnerabilityResponse, status_code=status.HTTP_201_CREATED)
 @require_permission("write:vulnerabilities")
 async def create_vulnerability(
     vuln_in: VulnerabilityCreate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     try:
         vuln = Vulnerability(
@@ -72,40 +97,102 @@ async def create_vulnerability(
             user_id=current_user.id if current_user else None,
         )
         db.add(vuln)
-        db.commit()
-        db.refresh(vuln)
+        await db.commit()
+        await db.refresh(vuln)
+        await _invalidate(vuln.user_id)
         return vuln
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"Error creating vulnerability: {e}")
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal server error")
 
+@router.post("/bulk", response_model=BulkCreateResponse)
+@require_permission("write:vulnerabilities")
+async def bulk_create_vulnerabilities(
+    payload: BulkCreateRequest,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Create vulnerabilities in bulk (one transaction, multi-row INSERT); invalid items are reported by index"""
+    accepted, errors = validate_items(VulnerabilityCreate, payload.items)
+    try:
+        known = await existing_target_ids(db, [item.target_id for _, item in accepted if item.target_id])
+        now = datetime.utcnow()
+        rows = []
+        for index, item in accepted:
+            if item.target_id and item.target_id not in known:
+                errors.append(BulkItemError(index=index, errors=["target_id: Target not found"]))
+                continue
+            rows.append({
+                **item.model_dump(),
+                "status": item.status or "open",
+                "user_id": current_user.id,
+                "discovered_date": now,
+                "created_at": now,
+                "updated_at": now,
+            })
+        ids = await insert_rows(db, Vulnerability.__table__, rows)
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Error creating vulnerabilities in bulk: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal server error")
+    if ids:
+        await _invalidate(current_user.id)
+    errors.sort(key=lambda error: error.index)
+    return BulkCreateResponse(created=len(ids), ids=ids, errors=errors)
+
+@router.post("/bulk/status", response_model=BulkUpdateResponse)
+@require_permission("write:vulnerabilities")
+async def bulk_update_vulnerability_status(
+    payload: VulnerabilityStatusBulk,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Move many vulnerabilities to one status (e.g. resolved); unknown ids are reported by index"""
+    try:
+        owners, errors = await set_vulnerability_status(db, payload.ids, payload.status)
+        await db.commit()
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Error updating vulnerabilities in bulk: {e}")
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Internal server error")
+    if owners:
+        await _invalidate(*set(owners.values()))
+    return BulkUpdateResponse(updated=len(owners), errors=errors)
+
 @router.get("/{vuln_id}", response_model=VulnerabilityResponse)
 @require_permission("read:vulnerabilities")
-async def get_vulnerability(vuln_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    vuln = db.query(Vulnerability).filter(Vulnerability.id == vuln_id).first()
+async def get_vulnerability(vuln_id: int, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    vuln = await vulnerability_detail(db, vuln_id)
     if not vuln:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Vulnerability not found")
-    return vuln
+    return raw_response(vuln)
 
 @router.put("/{vuln_id}", response_model=VulnerabilityResponse)
 @require_permission("write:vulnerabilities")
-async def update_vulnerability(vuln_id: int, vuln_in: VulnerabilityUpdate, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    vuln = db.query(Vulnerability).filter(Vulnerability.id == vuln_id).first()
+async def update_vulnerability(vuln_id: int, vuln_in: VulnerabilityUpdate, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    result = await db.execute(select(Vulnerability).where(Vulnerability.id == vuln_id))
+    vuln = result.scalars().first()
     if not vuln:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Vulnerability not found")
+    owner_id = vuln.user_id
     for field, value in vuln_in.model_dump(exclude_unset=True).items():
         setattr(vuln, field, value)
-    db.commit()
-    db.refresh(vuln)
+    await db.commit()
+    await db.refresh(vuln)
+    await _invalidate(owner_id, vuln.user_id)
     return vuln
 
 @router.delete("/{vuln_id}")
 @require_permission("write:vulnerabilities")
-async def delete_vulnerability(vuln_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    vuln = db.query(Vulnerability).filter(Vulnerability.id == vuln_id).first()
+async def delete_vulnerability(vuln_id: int, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    result = await db.execute(select(Vulnerability).where(Vulnerability.id == vuln_id))
+    vuln = result.scalars().first()
     if not vuln:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Vulnerability not found")
-    db.delete(vuln)
-    db.commit()
+    owner_id = vuln.user_id
+    await db.delete(vuln)
+    await db.commit()
+    await _invalidate(owner_id)
     return {"message": "Vulnerability deleted successfully"} 
\ No newline at end of file
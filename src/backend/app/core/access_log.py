@@ -0,0 +1,121 @@
+"""
+Securet Flow SSC - Access Log
+Um registro estruturado por requisição, com amostragem das requisições rápidas e bem-sucedidas
+"""
+
+import logging
+import random
+import time
+from contextvars import ContextVar, Token
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger("app.access")
+
+# Campos estruturados do registro (LogRecord.__dict__), na ordem de saída
+FIELDS = ("method", "route", "status", "duration_ms", "user_id", "db_ms", "db_queries", "client")
+
+
+class RequestStats:
+    """Acumulado durante a requisição; mutável, então endpoints e threads do pool enxergam o mesmo objeto"""
+
+    __slots__ = ("user_id", "db_seconds", "db_queries")
+
+    def __init__(self):
+        self.user_id: Optional[int] = None
+        self.db_seconds = 0.0
+        self.db_queries = 0
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("access_log_request", default=None)
+
+
+def begin() -> Tuple[RequestStats, Token]:
+    stats = RequestStats()
+    return stats, _current.set(stats)
+
+
+def end(token: Token) -> None:
+    _current.reset(token)
+
+
+def set_user(user_id: int) -> None:
+    stats = _current.get()
+    if stats is not None:
+        stats.user_id = user_id
+
+
+def track_db_time(engine: Engine) -> None:
+    """Soma o tempo de cursor de cada query ao RequestStats da requisição corrente.
+
+    Para engines async, passe ``async_engine.sync_engine`` (o contexto chega ao greenlet).
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("access_log_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _end(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["access_log_start"].pop()
+        stats = _current.get()
+        if stats is not None:
+            stats.db_seconds += time.perf_counter() - started
+            stats.db_queries += 1
+
+
+class AccessLog:
+    """Decide se a requisição é registrada e em qual nível.
+
+    Erros (status >= 400) e requisições acima de ``slow_ms`` são sempre registrados;
+    as demais com probabilidade ``sample_rate``. Nada é formatado se o registro for
+    descartado ou o nível estiver desligado.
+    """
+
+    def __init__(self, sample_rate: float = None, slow_ms: float = None):
+        self.sample_rate = settings.ACCESS_LOG_SAMPLE_RATE if sample_rate is None else sample_rate
+        self.slow_seconds = (settings.ACCESS_LOG_SLOW_MS if slow_ms is None else slow_ms) / 1000
+
+    def level_for(self, status: int, duration: float) -> Optional[int]:
+        if status >= 500:
+            level = logging.ERROR
+        elif status >= 400 or duration >= self.slow_seconds:
+            level = logging.WARNING
+        elif self.sample_rate >= 1 or random.random() < self.sample_rate:
+            level = logging.INFO
+        else:
+            return None
+        return level if logger.isEnabledFor(level) else None
+
+    def record(
+        self,
+        scope: Dict[str, Any],
+        route: Callable[[Dict[str, Any]], Optional[str]],
+        status: int,
+        duration: float,
+        stats: RequestStats,
+    ) -> None:
+        level = self.level_for(status, duration)
+        if level is None:
+            return
+        client = scope.get("client")
+        template = route(scope) or scope["path"]
+        logger.log(
+            level,
+            "%s %s %s %.1fms",
+            scope["method"], template, status, duration * 1000,
+            extra={
+                "method": scope["method"],
+                "route": template,
+                "status": status,
+                "duration_ms": round(duration * 1000, 3),
+                "user_id": stats.user_id,
+                "db_ms": round(stats.db_seconds * 1000, 3),
+                "db_queries": stats.db_queries,
+                "client": client[0] if client else None,
+            },
+        )
@@ -1,15 +1,15 @@
 from datetime import datetime, timedelta
-from typing import Optional, TYPE_CHECKING
+from typing import Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core import access_log
 from app.core.config import settings
 from app.core.database import get_db
-
-if TYPE_CHECKING:
-    from app.models.user import User
+from app.core.principal import Principal, principal_cache
 
 # Configuração de senha
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -49,6 +49,7 @@ def get_password_hash(password: str) -> str:
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Cria token de acesso JWT"""
     to_encode = data.copy()
+    to_encode.setdefault("ver", settings.JWT_TOKEN_VERSION)
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
@@ -60,47 +61,67 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
-def verify_token(token: str) -> Optional[str]:
-    """Verifica e decodifica o token JWT"""
+def decode_token(token: str) -> Optional[dict]:
+    """Verifica e decodifica o token JWT, retornando as claims"""
     try:
         verification_key = _get_verification_key()
         payload = jwt.decode(token, verification_key, algorithms=[settings.JWT_ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
+        if payload.get("sub") is None:
             return None
-        return username
+        return payload
     except JWTError:
         return None
 
 
+def verify_token(token: str) -> Optional[str]:
+    """Verifica e decodifica o token JWT"""
+    payload = decode_token(token)
+    if payload is None:
+        return None
+    return payload["sub"]
+
+
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> "User":
-    """Obtém o usuário atual baseado no token JWT"""
+    db: AsyncSession = Depends(get_db)
+) -> Principal:
+    """Obtém o usuário atual baseado no token JWT.
+
+    O principal é resolvido pelo cache (LRU local -> Redis) e só consulta o
+    banco em caso de miss; endpoints que precisam alterar o usuário devem
+    carregar a instância ORM explicitamente.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    try:
-        token = credentials.credentials
-        username = verify_token(token)
-        if username is None:
-            raise credentials_exception
-    except JWTError:
+    payload = decode_token(credentials.credentials)
+    if payload is None:
         raise credentials_exception
+    username = payload["sub"]
+    version = int(payload.get("ver", 0))
+
+    principal = await principal_cache.get(username, version)
+    if principal is not None:
+        access_log.set_user(principal.id)
+        return principal
     
     from app.models.user import User
-    user = db.query(User).filter(User.username == username).first()
+    generation = await principal_cache.generation(username)
+    result = await db.execute(select(User).where(User.username == username))
+    user = result.scalars().first()
     if user is None:
         raise credentials_exception
     
-    return user
+    principal = Principal.from_user(user)
+    await principal_cache.set(username, version, principal, generation)
+    access_log.set_user(principal.id)
+    return principal
 
 
-async def get_current_active_user(current_user: "User" = Depends(get_current_user)) -> "User":
+async def get_current_active_user(current_user: Principal = Depends(get_current_user)) -> Principal:
     """Obtém o usuário atual ativo"""
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
@@ -1,21 +1,125 @@
+import asyncio
+import functools
+import inspect
 import json
 import hashlib
-from typing import Any, Callable, Optional
-import asyncio
+import logging
+import math
+import random
+import secrets
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
 import redis.asyncio as redis
+from prometheus_client import Counter, Histogram
 
 from app.core.config import settings
+from app.core.serialization import pack, unpack
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "cache:invalidate"
+
+CACHE_REQUESTS = Counter(
+    "cache_requests_total", "Leituras do cache por resultado", ["cache", "result"]
+)
+CACHE_LATENCY = Histogram(
+    "cache_request_duration_seconds", "Latência das leituras do cache (inclui o loader em misses)",
+    ["cache", "result"], buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+
+_MISS = object()
+
+
+class _Abandoned(Exception):
+    """O líder do single-flight foi cancelado: quem esperava recalcula por conta própria"""
+
+
+class LocalLRU:
+    """Tier em processo: LRU limitado com TTL curto, na frente do Redis.
+
+    Cada entrada guarda a época do seu namespace; invalidar um namespace só
+    incrementa a época (O(1)), e entradas de épocas anteriores viram miss.
+    """
+
+    def __init__(self, size: int = 2048, ttl: float = 5.0):
+        self.size = size
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, Tuple[float, str, int, Any]]" = OrderedDict()
+        self._epochs: Dict[str, int] = {}
+
+    def epoch(self, namespace: str) -> int:
+        return self._epochs.get(namespace, 0)
+
+    def get(self, key: str, namespace: str) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISS
+        expires_at, ns, epoch, value = entry
+        if expires_at < time.monotonic() or epoch != self.epoch(ns):
+            del self._entries[key]
+            return _MISS
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, namespace: str, value: Any, epoch: int) -> None:
+        # época capturada antes do loader: invalidação durante o cálculo descarta o valor
+        if self.size <= 0 or epoch != self.epoch(namespace):
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, namespace, epoch, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, *namespaces: str) -> None:
+        for namespace in namespaces:
+            self._epochs[namespace] = self.epoch(namespace) + 1
+
+    def clear(self) -> None:
+        self._entries.clear()
 
 
 class RedisCache:
-    def __init__(self, url: str):
+    """Cache JSON no Redis com invalidação por geração.
+
+    Entradas de um namespace (ex.: ``targets:{user_id}``) guardam a geração
+    vigente quando foram gravadas; ``invalidate`` troca a geração por um token
+    novo, tornando todas obsoletas com um único SET, independente de quantas
+    chaves existam. As entradas antigas expiram pelo próprio TTL.
+
+    ``read_through`` (usado por ``@cached``) adiciona um LRU em processo na
+    frente do Redis, coalescência de misses concorrentes e renovação antecipada
+    probabilística (XFetch) antes da expiração.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        generation_ttl: int = 86400,
+        lru_size: int = 2048,
+        lru_ttl: float = 5.0,
+        early_refresh_beta: float = 1.0,
+        compress_min: int = 4096,
+    ):
         self.client = redis.from_url(url, decode_responses=True)
+        # Entradas versionadas são binárias (cabeçalho JSON + payload possivelmente comprimido)
+        self.binary = redis.from_url(url)
+        self.compress_min = compress_min
+        self.generation_ttl = generation_ttl
+        self.early_refresh_beta = early_refresh_beta
+        self.local = LocalLRU(lru_size, lru_ttl)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._listener: Optional[asyncio.Task] = None
 
     @staticmethod
     def _make_key(prefix: str, *parts: Any) -> str:
         raw = prefix + ":" + ":".join(map(lambda p: hashlib.sha256(str(p).encode()).hexdigest(), parts))
         return raw
 
+    @staticmethod
+    def _generation_key(namespace: str) -> str:
+        return f"cache:gen:{namespace}"
+
     async def get_json(self, key: str) -> Optional[Any]:
         data = await self.client.get(key)
         if not data:
@@ -25,10 +129,242 @@ class RedisCache:
     async def set_json(self, key: str, value: Any, ttl_seconds: int) -> None:
         await self.client.setex(key, ttl_seconds, json.dumps(value))
 
-    async def invalidate_prefix(self, prefix: str) -> None:
-        pattern = prefix + "*"
-        async for k in self.client.scan_iter(pattern):
-            await self.client.delete(k)
+    async def _read(self, namespace: str, key: str) -> Tuple[Optional[Dict], Optional[str]]:
+        generation, data = await self.binary.mget(self._generation_key(namespace), key)
+        if not generation:
+            # Namespace sem geração (novo ou expirado): nenhuma entrada é válida
+            return None, await self._ensure_generation(namespace)
+        generation = generation.decode()
+        if not data:
+            return None, generation
+        entry, value = unpack(data)
+        if entry.get("g") != generation:
+            return None, generation
+        entry["v"] = value
+        return entry, generation
+
+    async def get_versioned(self, namespace: str, key: str) -> Tuple[Optional[Any], Optional[str]]:
+        """Lê a entrada e a geração do namespace em um round-trip.
+
+        Retorna ``(valor, geração)``; o valor é None se ausente ou de uma geração
+        anterior. Repasse a geração para ``set_versioned``: se o namespace for
+        invalidado enquanto o valor é calculado, a gravação já nasce obsoleta.
+        """
+        entry, generation = await self._read(namespace, key)
+        return (entry["v"] if entry else None), generation
+
+    async def set_versioned(
+        self,
+        namespace: str,
+        key: str,
+        value: Any,
+        ttl_seconds: int,
+        generation: Optional[str] = None,
+        compute_seconds: float = 0.0,
+    ) -> None:
+        if generation is None:
+            generation = await self._ensure_generation(namespace)
+        meta = {"g": generation, "d": compute_seconds, "e": time.time() + ttl_seconds}
+        await self.binary.setex(key, ttl_seconds, pack(meta, value, self.compress_min))
+
+    async def _ensure_generation(self, namespace: str) -> str:
+        """Cria a geração do namespace se ausente, sem sobrescrever a de outro worker"""
+        pipe = self.client.pipeline(transaction=False)
+        pipe.set(self._generation_key(namespace), secrets.token_hex(8), nx=True, ex=self.generation_ttl)
+        pipe.get(self._generation_key(namespace))
+        _, generation = await pipe.execute()
+        return generation
+
+    async def invalidate(self, *namespaces: str) -> None:
+        """Torna obsoletas todas as entradas dos namespaces: O(1) por namespace, um round-trip.
+
+        Também avisa os outros processos para descartarem seu LRU local.
+        """
+        if not namespaces:
+            return
+        self.local.invalidate(*namespaces)
+        pipe = self.client.pipeline(transaction=False)
+        for namespace in namespaces:
+            pipe.set(self._generation_key(namespace), secrets.token_hex(8), ex=self.generation_ttl)
+        pipe.publish(INVALIDATION_CHANNEL, json.dumps(namespaces))
+        await pipe.execute()
+
+    def _early_refresh(self, entry: Dict) -> bool:
+        """XFetch: quanto mais perto da expiração e mais caro o cálculo, maior a chance de renovar antes"""
+        delta = entry.get("d") or 0.0
+        if not delta or self.early_refresh_beta <= 0:
+            return False
+        return time.time() - delta * self.early_refresh_beta * math.log(1.0 - random.random()) >= entry["e"]
+
+    def _ensure_listener(self) -> None:
+        if self.local.size <= 0:
+            return
+        loop = asyncio.get_running_loop()
+        task = self._listener
+        if task is not None and not task.done() and task.get_loop() is loop:
+            return
+        # Novo loop (ou listener morto): entradas locais podem ter perdido invalidações
+        self.local.clear()
+        self._listener = loop.create_task(self._listen())
+
+    async def _listen(self) -> None:
+        """Aplica no LRU local as invalidações publicadas por outros processos"""
+        while True:
+            pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                # mensagens perdidas durante a (re)conexão: descarta o que estiver em memória
+                self.local.clear()
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        self.local.invalidate(*json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Cache invalidation listener failed: {e}")
+                await asyncio.sleep(1.0)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+    async def close(self) -> None:
+        """Encerra o listener e libera as conexões (reabertas sob demanda no próximo uso)"""
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._listener = None
+        await self.client.connection_pool.disconnect()
+        await self.binary.connection_pool.disconnect()
+
+    async def read_through(
+        self,
+        name: str,
+        namespace: str,
+        key: str,
+        ttl_seconds: int,
+        loader: Callable[[], Awaitable[Any]],
+        lru: bool = True,
+    ) -> Any:
+        """LRU local -> Redis -> loader, com um único loader por chave em voo no processo"""
+        start = time.perf_counter()
+        if lru:
+            value = self.local.get(key, namespace)
+            if value is not _MISS:
+                self._observe(name, "local_hit", start)
+                return value
+            self._ensure_listener()
+
+        while True:
+            leader = self._inflight.get(key)
+            if leader is None:
+                break
+            try:
+                value = await asyncio.shield(leader)
+            except _Abandoned:
+                continue
+            self._observe(name, "coalesced", start)
+            return value
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value, result = await self._load(namespace, key, ttl_seconds, loader, lru)
+        except asyncio.CancelledError:
+            future.set_exception(_Abandoned())
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(value)
+        finally:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+            if future.done() and not future.cancelled():
+                future.exception()  # marca como lida quando ninguém estava esperando
+        self._observe(name, result, start)
+        return value
+
+    async def _load(
+        self, namespace: str, key: str, ttl_seconds: int, loader: Callable[[], Awaitable[Any]], lru: bool
+    ) -> Tuple[Any, str]:
+        epoch = self.local.epoch(namespace)
+        redis_ok = True
+        try:
+            entry, generation = await self._read(namespace, key)
+        except Exception as e:
+            logger.warning(f"Cache read failed: {e}")
+            entry, generation, redis_ok = None, None, False
+
+        if entry is not None and not self._early_refresh(entry):
+            if lru:
+                self.local.set(key, namespace, entry["v"], epoch)
+            return entry["v"], "redis_hit"
+
+        started = time.perf_counter()
+        value = await loader()
+        compute_seconds = time.perf_counter() - started
+        if redis_ok:
+            try:
+                await self.set_versioned(namespace, key, value, ttl_seconds, generation, compute_seconds)
+            except Exception as e:
+                logger.warning(f"Cache write failed: {e}")
+        if lru:
+            self.local.set(key, namespace, value, epoch)
+        return value, ("early_refresh" if entry is not None else "miss")
+
+    @staticmethod
+    def _observe(name: str, result: str, start: float) -> None:
+        CACHE_REQUESTS.labels(name, result).inc()
+        CACHE_LATENCY.labels(name, result).observe(time.perf_counter() - start)
+
+
+def cached(
+    namespace: str,
+    ttl: int,
+    *,
+    name: Optional[str] = None,
+    lru: bool = True,
+    ignore: Tuple[str, ...] = ("db",),
+    backend: Optional[RedisCache] = None,
+):
+    """Read-through cache para funções assíncronas que devolvem valores JSON ou ``RawJSON``.
+
+    ``namespace`` é formatado com os argumentos da chamada (ex.: ``"scans:{user_id}"``)
+    e é a unidade de invalidação (``cache.invalidate(...)``); os demais argumentos,
+    exceto os de ``ignore`` (a sessão do banco), compõem a chave. O valor
+    devolvido é compartilhado entre chamadas pelo LRU local: não deve ser mutado.
+    """
+
+    def decorator(fn: Callable[..., Awaitable[Any]]):
+        sig = inspect.signature(fn)
+        key_params = [p for p in sig.parameters if p not in ignore]
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            store = backend or cache
+            bound = sig.bind(*args, **kwargs)
+            bound.apply_defaults()
+            ns = namespace.format(**bound.arguments)
+            key = store._make_key(f"{ns}:{label}", *(bound.arguments[p] for p in key_params))
+            return await store.read_through(label, ns, key, ttl, lambda: fn(*args, **kwargs), lru=lru)
+
+        return wrapper
+
+    return decorator
 
 
-cache = RedisCache(settings.REDIS_URL) 
\ No newline at end of file
+cache = RedisCache(
+    settings.REDIS_URL,
+    generation_ttl=settings.CACHE_GENERATION_TTL,
+    lru_size=settings.CACHE_LRU_SIZE,
+    lru_ttl=settings.CACHE_LRU_TTL,
+    early_refresh_beta=settings.CACHE_EARLY_REFRESH_BETA,
+    compress_min=settings.CACHE_COMPRESS_MIN_BYTES,
+)
@@ -73,6 +73,13 @@ class Settings(BaseSettings):
     )    # PEM
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("JWT_EXPIRATION", "30"))
     REFRESH_TOKEN_EXPIRE_DAYS: int = int(os.getenv("JWT_REFRESH_EXPIRATION", "7"))
+    # Versão dos tokens emitidos (claim "ver"); incrementar descarta todos os principals em cache
+    JWT_TOKEN_VERSION: int = int(os.getenv("JWT_TOKEN_VERSION", "1"))
+    
+    # Principal cache (LRU local + Redis)
+    PRINCIPAL_CACHE_TTL: int = int(os.getenv("PRINCIPAL_CACHE_TTL", "300"))
+    PRINCIPAL_LRU_SIZE: int = int(os.getenv("PRINCIPAL_LRU_SIZE", "1024"))
+    PRINCIPAL_LRU_TTL: int = int(os.getenv("PRINCIPAL_LRU_TTL", "10"))
     
     # CORS
     ALLOWED_ORIGINS: List[str] = [
@@ -90,6 +97,30 @@ class Settings(BaseSettings):
     
     # Redis
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379")
+    # Validade da geração de cada namespace do cache; deve superar o maior TTL de entrada
+    CACHE_GENERATION_TTL: int = int(os.getenv("CACHE_GENERATION_TTL", "86400"))
+    # Tier local (por processo) do @cached; invalidações chegam via pub/sub, o TTL limita o pior caso
+    CACHE_LRU_SIZE: int = int(os.getenv("CACHE_LRU_SIZE", "2048"))
+    CACHE_LRU_TTL: float = float(os.getenv("CACHE_LRU_TTL", "5"))
+    # Renovação antecipada probabilística (XFetch); 0 desliga
+    CACHE_EARLY_REFRESH_BETA: float = float(os.getenv("CACHE_EARLY_REFRESH_BETA", "1.0"))
+    # TTL (s) das leituras cacheadas de scans, vulnerabilidades e relatórios
+    CACHE_READ_TTL: int = int(os.getenv("CACHE_READ_TTL", "30"))
+    # Payloads do cache a partir deste tamanho (bytes) são gravados comprimidos (zlib); 0 desliga
+    CACHE_COMPRESS_MIN_BYTES: int = int(os.getenv("CACHE_COMPRESS_MIN_BYTES", "4096"))
+    
+    # Dashboard
+    DASHBOARD_CACHE_TTL: int = int(os.getenv("DASHBOARD_CACHE_TTL", "60"))
+    # Lê os contadores de user_stats (O(1)) em vez do agregado sobre scans/targets/vulnerabilities
+    DASHBOARD_USE_COUNTERS: bool = os.getenv("DASHBOARD_USE_COUNTERS", "false").lower() == "true"
+    
+    # Exportação (NDJSON/CSV): linhas por fetch do cursor do servidor e por chunk da resposta
+    EXPORT_CHUNK_ROWS: int = int(os.getenv("EXPORT_CHUNK_ROWS", "2000"))
+    EXPORT_GZIP_LEVEL: int = int(os.getenv("EXPORT_GZIP_LEVEL", "6"))
+    
+    # Endpoints em lote (/targets/bulk, /vulnerabilities/bulk): itens por chamada e linhas por statement
+    BULK_MAX_ITEMS: int = int(os.getenv("BULK_MAX_ITEMS", "10000"))
+    BULK_BATCH_SIZE: int = int(os.getenv("BULK_BATCH_SIZE", "1000"))
     
     # Ollama
     OLLAMA_BASE_URL: str = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
@@ -99,10 +130,38 @@ class Settings(BaseSettings):
     # Rate Limiting
     RATE_LIMIT_PER_MINUTE: int = int(os.getenv("RATE_LIMIT_PER_MINUTE", "60"))
     RATE_LIMIT_PER_HOUR: int = int(os.getenv("RATE_LIMIT_PER_HOUR", "1000"))
+    # Escritas em /scans (criar, iniciar, parar...) por usuário
+    RATE_LIMIT_SCANS_PER_HOUR: int = int(os.getenv("RATE_LIMIT_SCANS_PER_HOUR", "10"))
+    # Pré-checagem local: abaixo desta fração do limite, até LOCAL_BATCH requisições por
+    # processo são admitidas sem Redis e contabilizadas na próxima sincronização
+    RATE_LIMIT_LOCAL_FRACTION: float = float(os.getenv("RATE_LIMIT_LOCAL_FRACTION", "0.5"))
+    RATE_LIMIT_LOCAL_BATCH: int = int(os.getenv("RATE_LIMIT_LOCAL_BATCH", "8"))
+    RATE_LIMIT_SYNC_SECONDS: float = float(os.getenv("RATE_LIMIT_SYNC_SECONDS", "1.0"))
+    
+    # DAST engine
+    DAST_MAX_CONCURRENCY: int = int(os.getenv("DAST_MAX_CONCURRENCY", "4"))
+    DAST_MAX_PER_TARGET: int = int(os.getenv("DAST_MAX_PER_TARGET", "1"))
+    DAST_MAX_QUEUE: int = int(os.getenv("DAST_MAX_QUEUE", "200"))
+    DAST_JOB_TIMEOUT: int = int(os.getenv("DAST_JOB_TIMEOUT", "3600"))
+    DAST_KILL_GRACE_SECONDS: float = float(os.getenv("DAST_KILL_GRACE_SECONDS", "5"))
+    DAST_JOB_TTL: int = int(os.getenv("DAST_JOB_TTL", "604800"))  # 7 dias
+    DAST_STREAM_KEEPALIVE_SECONDS: float = float(os.getenv("DAST_STREAM_KEEPALIVE_SECONDS", "15"))
+    # Templates de comando ({target} = URL alvo, {report} = arquivo de relatório temporário)
+    DAST_ZAP_CMD: str = os.getenv("DAST_ZAP_CMD", "zap.sh -cmd -quickurl {target} -quickprogress -quickout {report}")
+    DAST_NUCLEI_CMD: str = os.getenv("DAST_NUCLEI_CMD", "nuclei -u {target} -jsonl -silent -stats -stats-json -stats-interval 2")
     
     # Logging
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
     LOG_FORMAT: str = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+    # Access log: erros e lentas sempre; as demais amostradas (1.0 = todas)
+    ACCESS_LOG_SAMPLE_RATE: float = float(os.getenv("ACCESS_LOG_SAMPLE_RATE", "1.0"))
+    ACCESS_LOG_SLOW_MS: float = float(os.getenv("ACCESS_LOG_SLOW_MS", "500"))
+    # Envio ao Loki (LOKI_URL): lote fecha por quantidade, bytes ou tempo; fila cheia descarta
+    LOKI_BATCH_SIZE: int = int(os.getenv("LOKI_BATCH_SIZE", "500"))
+    LOKI_BATCH_BYTES: int = int(os.getenv("LOKI_BATCH_BYTES", str(1024 * 1024)))
+    LOKI_FLUSH_SECONDS: float = float(os.getenv("LOKI_FLUSH_SECONDS", "1.0"))
+    LOKI_QUEUE_SIZE: int = int(os.getenv("LOKI_QUEUE_SIZE", "10000"))
+    LOKI_TIMEOUT: float = float(os.getenv("LOKI_TIMEOUT", "5"))
     
     class Config:
         env_file = ".env"
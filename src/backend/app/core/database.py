@@ -3,12 +3,17 @@ Securet Flow SSC - Database Configuration
 Database connection and session management
 """
 
-from typing import Generator
-from sqlalchemy import create_engine, text
+import os
+from typing import AsyncGenerator, Generator, Optional
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.orm import declarative_base
 import logging
 
+from app.core.access_log import track_db_time
 from app.core.config import settings
 
 logger = logging.getLogger(__name__)
@@ -28,9 +33,73 @@ SessionLocal = sessionmaker(
     bind=engine,
 )
 
+# Drivers async equivalentes aos drivers sync da DATABASE_URL
+_ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def get_async_database_url(url: str) -> str:
+    """Converte a DATABASE_URL sync para o driver async correspondente"""
+    parsed = make_url(url)
+    driver = _ASYNC_DRIVERS.get(parsed.drivername)
+    if driver is None:
+        return url
+    return parsed.set(drivername=driver).render_as_string(hide_password=False)
+
+
+# Create async engine (asyncpg) used by the API endpoints
+async_engine = create_async_engine(
+    get_async_database_url(settings.DATABASE_URL),
+    echo=settings.DEBUG,
+    pool_pre_ping=True,
+    pool_recycle=300,
+)
+
+# Tempo de banco por requisição (access log)
+track_db_time(engine)
+track_db_time(async_engine.sync_engine)
+
+# Create async session factory
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 # Base class for models
 Base = declarative_base()
 
+# Diretório com alembic.ini e alembic/ (src/backend)
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+INITIAL_REVISION = "0001"
+
+
+def run_migrations(bind: Optional[Engine] = None, revision: str = "head") -> None:
+    """Aplica as migrações Alembic até ``revision``.
+
+    Bancos criados pelo antigo ``create_all`` (tabelas sem alembic_version)
+    são marcados na revisão inicial antes do upgrade.
+    """
+    from alembic import command
+    from alembic.config import Config
+
+    bind = bind or engine
+    cfg = Config(os.path.join(_BACKEND_DIR, "alembic.ini"))
+    cfg.set_main_option("script_location", os.path.join(_BACKEND_DIR, "alembic"))
+
+    with bind.connect() as conn:
+        tables = set(inspect(conn).get_table_names())
+    with bind.connect() as conn:
+        cfg.attributes["connection"] = conn
+        if "users" in tables and "alembic_version" not in tables:
+            command.stamp(cfg, INITIAL_REVISION)
+        command.upgrade(cfg, revision)
+        conn.commit()
+
+
 async def init_db():
     """Initialize database (sync under the hood)"""
     try:
@@ -40,9 +109,11 @@ async def init_db():
         from app.models import scan as _scan  # noqa: F401
         from app.models import report as _report  # noqa: F401
         from app.models import role as _role  # noqa: F401
+        from app.models import vulnerability as _vulnerability  # noqa: F401
+        from app.models import user_stats as _user_stats  # noqa: F401
 
-        # Create all tables
-        Base.metadata.create_all(bind=engine)
+        # Schema versionado pelo Alembic (alembic/versions)
+        run_migrations()
         logger.info("Database initialized successfully")
 
         # Seed básico de roles
@@ -70,15 +141,26 @@ async def init_db():
         raise
 
 async def close_db():
-    """Close database connections (sync engine disposal)"""
+    """Close database connections (sync and async engines)"""
     try:
+        await async_engine.dispose()
         engine.dispose()
         logger.info("Database connections closed")
     except Exception as e:
         logger.error(f"Database closure failed: {e}")
 
-# Sync version for current endpoints
-def get_db() -> Generator[Session, None, None]:
+async def get_db() -> AsyncGenerator[AsyncSession, None]:
+    """Get database session (async version, used by the API endpoints)"""
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+        except Exception as e:
+            await db.rollback()
+            logger.error(f"Database session error: {e}")
+            raise
+
+# Sync version for scripts, seeding and Celery workers
+def get_sync_db() -> Generator[Session, None, None]:
     """Get database session (sync version)"""
     db = SessionLocal()
     try:
@@ -92,10 +174,10 @@ def get_db() -> Generator[Session, None, None]:
 
 # Health check function
 async def check_db_health() -> bool:
-    """Check database health (sync)"""
+    """Check database health (async)"""
     try:
-        with engine.connect() as conn:
-            conn.execute(text("SELECT 1"))
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
         return True
     except Exception as e:
         logger.error(f"Database health check failed: {e}")
@@ -3,38 +3,144 @@ Securet Flow SSC - Logging Configuration
 Centralized logging setup
 """
 
+import gzip
+import json
 import logging
 import logging.config
+import logging.handlers
+import queue
 import sys
+import threading
+import time
 from pathlib import Path
+import orjson
+from prometheus_client import Counter
+from app.core.access_log import FIELDS
 from app.core.config import settings
 import os
 
-class LokiHandler(logging.Handler):
-    def __init__(self, loki_url: str):
-        super().__init__()
+class StructuredFormatter(logging.Formatter):
+    """Uma linha JSON por registro, com os campos estruturados do access log quando presentes"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": self.formatTime(record, self.datefmt),
+            "level": record.levelname,
+            "name": record.name,
+            "message": record.getMessage(),
+        }
+        for field in FIELDS:
+            if field in record.__dict__:
+                entry[field] = record.__dict__[field]
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return orjson.dumps(entry).decode()
+
+
+LOKI_RECORDS = Counter(
+    "loki_records_total", "Registros de log enviados ao Loki por resultado", ["result"]
+)
+
+
+class LokiHandler(logging.handlers.QueueHandler):
+    """Envio ao Loki sem bloquear quem loga.
+
+    ``emit`` só formata e enfileira (fila limitada; se cheia o registro é descartado
+    e contado). Uma thread agrupa os registros por quantidade/bytes/tempo e faz um
+    push gzip por lote. ``close`` (chamado pelo ``logging.shutdown``) envia o que restou.
+    """
+
+    _STOP = object()
+
+    def __init__(
+        self,
+        loki_url: str,
+        batch_size: int = None,
+        batch_bytes: int = None,
+        flush_seconds: float = None,
+        queue_size: int = None,
+        timeout: float = None,
+    ):
+        super().__init__(queue.Queue(maxsize=queue_size or settings.LOKI_QUEUE_SIZE))
         self.loki_url = loki_url
+        self.batch_size = batch_size or settings.LOKI_BATCH_SIZE
+        self.batch_bytes = batch_bytes or settings.LOKI_BATCH_BYTES
+        self.flush_seconds = flush_seconds or settings.LOKI_FLUSH_SECONDS
+        self.timeout = timeout or settings.LOKI_TIMEOUT
+        self.dropped = 0
         try:
             import requests  # type: ignore
-            self.requests = requests
+            self.session = requests.Session()
         except Exception:
-            self.requests = None
+            self.session = None
+        self._thread = threading.Thread(target=self._run, name="loki-shipper", daemon=True)
+        if self.session is not None:
+            self._thread.start()
+
+    def prepare(self, record: logging.LogRecord):
+        # Só o necessário para o push: (timestamp em ns, linha formatada)
+        return str(int(record.created * 1e9)), self.format(record)
+
+    def enqueue(self, entry) -> None:
+        try:
+            self.queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+            LOKI_RECORDS.labels("dropped").inc()
 
     def emit(self, record: logging.LogRecord) -> None:
-        if not self.requests:
+        # Logs do próprio envio (urllib3/requests) voltariam para a fila em loop
+        if self.session is None or record.thread == self._thread.ident:
             return
+        super().emit(record)
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            values, size = [], 0
+            entry = self.queue.get()
+            deadline = time.monotonic() + self.flush_seconds
+            while True:
+                if entry is self._STOP:
+                    stopping = True
+                    break
+                values.append(entry)
+                size += len(entry[1])
+                if len(values) >= self.batch_size or size >= self.batch_bytes:
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    entry = self.queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+            if values:
+                self._push(values)
+
+    def _push(self, values) -> None:
+        payload = {"streams": [{"stream": {"app": "securetflow"}, "values": values}]}
+        body = gzip.compress(json.dumps(payload, separators=(",", ":")).encode(), compresslevel=5)
         try:
-            payload = {
-                "streams": [
-                    {
-                        "stream": {"app": "securetflow"},
-                        "values": [[str(int(record.created * 1e9)), self.format(record)]],
-                    }
-                ]
-            }
-            self.requests.post(self.loki_url, json=payload, timeout=0.5)
+            response = self.session.post(
+                self.loki_url,
+                data=body,
+                headers={"Content-Type": "application/json", "Content-Encoding": "gzip"},
+                timeout=self.timeout,
+            )
+            response.raise_for_status()
+            LOKI_RECORDS.labels("sent").inc(len(values))
         except Exception:
-            pass
+            self.dropped += len(values)
+            LOKI_RECORDS.labels("failed").inc(len(values))
+
+    def close(self) -> None:
+        if self.session is not None and self._thread.is_alive():
+            # Bloqueante de propósito: o STOP precisa entrar mesmo com a fila cheia
+            self.queue.put(self._STOP)
+            self._thread.join(self.timeout + self.flush_seconds)
+            self.session.close()
+        super().close()
 
 
 def setup_logging():
@@ -59,6 +165,10 @@ def setup_logging():
             "json": {
                 "format": '{"timestamp": "%(asctime)s", "level": "%(levelname)s", "name": "%(name)s", "message": "%(message)s"}',
                 "datefmt": "%Y-%m-%dT%H:%M:%S"
+            },
+            "structured": {
+                "()": "app.core.logging.StructuredFormatter",
+                "datefmt": "%Y-%m-%dT%H:%M:%S"
             }
         },
         "handlers": {
@@ -76,6 +186,20 @@ def setup_logging():
                 "maxBytes": 10485760,  # 10MB
                 "backupCount": 5
             },
+            "access_console": {
+                "class": "logging.StreamHandler",
+                "level": "INFO",
+                "formatter": "structured",
+                "stream": sys.stdout
+            },
+            "access_file": {
+                "class": "logging.handlers.RotatingFileHandler",
+                "level": "INFO",
+                "formatter": "structured",
+                "filename": str(log_dir / "securet-flow-access.log"),
+                "maxBytes": 10485760,  # 10MB
+                "backupCount": 5
+            },
             "error_file": {
                 "class": "logging.handlers.RotatingFileHandler",
                 "level": "ERROR",
@@ -96,14 +220,21 @@ def setup_logging():
                 "level": "DEBUG",
                 "propagate": False
             },
+            # Um registro JSON por requisição (PlatformMiddleware); não propaga para "app"
+            "app.access": {
+                "handlers": ["access_console", "access_file"] + (["loki_access"] if loki_url else []),
+                "level": "INFO",
+                "propagate": False
+            },
             "uvicorn": {
                 "handlers": ["console", "file"],
                 "level": "INFO",
                 "propagate": False
             },
+            # Substituído pelo app.access (uma linha por requisição já basta)
             "uvicorn.access": {
                 "handlers": ["console", "file"],
-                "level": "INFO",
+                "level": "WARNING",
                 "propagate": False
             }
         }
@@ -116,13 +247,19 @@ def setup_logging():
             "formatter": "default",
             "loki_url": loki_url,
         }
+        logging_config["handlers"]["loki_access"] = {
+            "()": "app.core.logging.LokiHandler",
+            "level": "INFO",
+            "formatter": "structured",
+            "loki_url": loki_url,
+        }
     
     # Apply configuration
     logging.config.dictConfig(logging_config)
     
     # Set specific logger levels
     logging.getLogger("uvicorn").setLevel(logging.INFO)
-    logging.getLogger("uvicorn.access").setLevel(logging.INFO)
+    logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
     
     # Create logger
     logger = logging.getLogger(__name__)
@@ -1,126 +1,126 @@
 """
 Securet Flow SSC - Middleware
-Security and utility middlewares
+Pipeline ASGI único: rate limiting, timing, mapeamento de erros, security headers e access log
 """
 
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import JSONResponse
-import time
 import logging
-from typing import Dict, Any
+import time
+from typing import List, Optional, Tuple
+
 import redis.asyncio as redis
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
+from app.core import access_log
 from app.core.config import settings
+from app.core.rate_limit import Identities, RateLimiter, RouteTemplates, rule_for
 
 logger = logging.getLogger(__name__)
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
-    """Add security headers to all responses"""
-    
-    async def dispatch(self, request: Request, call_next):
-        response = await call_next(request)
-        
-        # Add security headers
-        for header, value in settings.SECURITY_HEADERS.items():
-            response.headers[header] = value
-        
-        return response
-
-class RateLimitMiddleware(BaseHTTPMiddleware):
-    """Rate limiting middleware"""
-    
-    def __init__(self, app, redis_client: redis.Redis = None):
-        super().__init__(app)
-        self.redis = redis_client
-    
-    async def dispatch(self, request: Request, call_next):
-        if not self.redis:
-            return await call_next(request)
-        
-        # Get client IP
-        client_ip = request.client.host
-        
-        # Check rate limit
-        if await self._is_rate_limited(client_ip, request.url.path):
-            return JSONResponse(
-                status_code=429,
-                content={"detail": "Rate limit exceeded"}
-            )
-        
-        response = await call_next(request)
-        return response
-    
-    async def _is_rate_limited(self, client_ip: str, path: str) -> bool:
-        """Check if client is rate limited"""
-        try:
-            # Simple rate limiting
-            if path.startswith("/api/v1/scans"):
-                limit = 10  # 10 requests per hour for scans
-                window = 3600
-            else:
-                limit = settings.RATE_LIMIT_PER_MINUTE
-                window = 60
-            
-            key = f"rate_limit:{client_ip}:{path}"
-            current = await self.redis.get(key)
-            
-            if current and int(current) >= limit:
-                return True
-            
-            # Increment counter
-            pipe = self.redis.pipeline()
-            pipe.incr(key)
-            pipe.expire(key, window)
-            await pipe.execute()
-            
-            return False
-        except Exception as e:
-            logger.error(f"Rate limiting error: {e}")
-            return False
-
-class LoggingMiddleware(BaseHTTPMiddleware):
-    """Request logging middleware"""
-    
-    async def dispatch(self, request: Request, call_next):
-        start_time = time.time()
-        
-        # Log request
-        logger.info(
-            f"Request: {request.method} {request.url.path} - "
-            f"Client: {request.client.host}"
-        )
-        
-        response = await call_next(request)
-        
-        # Calculate duration
-        duration = time.time() - start_time
-        
-        # Log response
-        logger.info(
-            f"Response: {response.status_code} - "
-            f"Duration: {duration:.3f}s"
+# Calculados uma vez: cada resposta só estende a lista de headers com estas tuplas
+SECURITY_HEADERS: List[Tuple[bytes, bytes]] = [
+    (name.lower().encode("latin-1"), value.encode("latin-1"))
+    for name, value in {
+        "X-Content-Type-Options": "nosniff",
+        "X-Frame-Options": "DENY",
+        "X-XSS-Protection": "1; mode=block",
+        "Strict-Transport-Security": "max-age=31536000; includeSubDomains",
+        "Referrer-Policy": "strict-origin-when-cross-origin",
+        "Permissions-Policy": "geolocation=(), microphone=(), camera=(), fullscreen=(self)",
+        "Content-Security-Policy": (
+            "default-src 'self'; "
+            "base-uri 'self'; frame-ancestors 'none'; object-src 'none'; "
+            "script-src 'self'; style-src 'self' 'unsafe-inline'; "
+            "img-src 'self' data:; font-src 'self' data:; "
+            "connect-src 'self' http: https: ws: wss:; "
+            "form-action 'self'"
+        ),
+    }.items()
+]
+
+
+def _header(scope: Scope, name: bytes) -> Optional[str]:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+class PlatformMiddleware:
+    """Middleware ASGI puro (sem BaseHTTPMiddleware): não cria tasks nem re-empacota o corpo,
+    então respostas em streaming passam chunk a chunk.
+
+    Ordem por requisição: rate limit -> app -> headers de segurança + X-Response-Time
+    no ``http.response.start``; exceções antes da resposta começar viram 500 JSON.
+    Ao final, um registro no access log (amostrado, ver ``AccessLog``).
+    """
+
+    def __init__(self, app: ASGIApp, redis_client: redis.Redis = None):
+        self.app = app
+        self.limiter = RateLimiter(
+            redis_client,
+            local_fraction=settings.RATE_LIMIT_LOCAL_FRACTION,
+            local_batch=settings.RATE_LIMIT_LOCAL_BATCH,
+            sync_seconds=settings.RATE_LIMIT_SYNC_SECONDS,
+        ) if redis_client else None
+        self.routes = RouteTemplates()
+        self.identities = Identities()
+        self.access_log = access_log.AccessLog()
+
+    async def _rate_limited(self, scope: Scope) -> Optional[JSONResponse]:
+        bucket, limit, window = rule_for(scope["method"], self.routes.resolve(scope))
+        client = scope.get("client")
+        identity = self.identities.resolve(_header(scope, b"authorization"), client[0] if client else None)
+        decision = await self.limiter.hit(bucket, identity, limit, window)
+        if decision.allowed:
+            return None
+        return JSONResponse(
+            status_code=429,
+            content={"detail": "Rate limit exceeded"},
+            headers={
+                "Retry-After": str(decision.retry_after),
+                "X-RateLimit-Limit": str(decision.limit),
+                "X-RateLimit-Remaining": "0",
+            },
         )
-        
-        # Add response time header
-        response.headers["X-Response-Time"] = f"{duration:.3f}s"
-        
-        return response
-
-class ErrorHandlingMiddleware(BaseHTTPMiddleware):
-    """Global error handling middleware"""
-    
-    async def dispatch(self, request: Request, call_next):
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 0
+        stats, token = access_log.begin()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", ()))
+                headers.extend(SECURITY_HEADERS)
+                headers.append((b"x-response-time", f"{time.perf_counter() - start:.3f}s".encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
         try:
-            response = await call_next(request)
-            return response
+            denied = await self._rate_limited(scope) if self.limiter else None
+            if denied is not None:
+                await denied(scope, receive, send_wrapper)
+            else:
+                await self.app(scope, receive, send_wrapper)
         except Exception as e:
+            if status:
+                # Resposta já começou: não há como trocar o status, só interromper
+                raise
             logger.error(f"Unhandled error: {e}")
-            
-            return JSONResponse(
+            await JSONResponse(
                 status_code=500,
                 content={
                     "detail": "Internal server error",
                     "error_id": f"err_{int(time.time())}"
                 }
-            ) 
\ No newline at end of file
+            )(scope, receive, send_wrapper)
+        finally:
+            access_log.end(token)
+            self.access_log.record(scope, self.routes.resolve, status or 500, time.perf_counter() - start, stats)
@@ -0,0 +1,139 @@
+"""
+Securet Flow SSC - Pagination
+Paginação por cursor (keyset) em (created_at, id), com o offset legado preservado
+"""
+
+import base64
+import functools
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import Select, null, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.serialization import RawJSON, dump_models, dump_rows
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+CursorKey = Tuple[datetime, int]
+
+
+def encode_cursor(created_at: datetime, id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[CursorKey]:
+    """Decodifica o cursor opaco; cursor inválido vira 400"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cursor inválido")
+
+
+def keyset(query: Select, model: Any, limit: int, skip: int = 0, after: Optional[CursorKey] = None) -> Select:
+    """Ordena por (created_at, id) e aplica o cursor, ou o offset quando não há cursor.
+
+    Busca ``limit + 1`` linhas para saber se existe próxima página sem um COUNT.
+    """
+    query = query.order_by(model.created_at, model.id)
+    if after is not None:
+        # Comparação de tupla: usa o índice composto (…, created_at, id) como range scan
+        query = query.where(tuple_(model.created_at, model.id) > tuple_(*after))
+    elif skip:
+        query = query.offset(skip)
+    return query.limit(limit + 1)
+
+
+def page_rows(rows: List[Any], limit: int, response: Optional[Response] = None) -> List[Any]:
+    """Corta a linha extra e publica o cursor da próxima página em ``X-Next-Cursor``"""
+    if len(rows) <= limit:
+        return rows
+    rows = rows[:limit]
+    if response is not None:
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.created_at, last.id)
+    return rows
+
+
+async def fetch_page(
+    db: AsyncSession,
+    query: Select,
+    model: Any,
+    limit: int,
+    skip: int = 0,
+    after: Optional[CursorKey] = None,
+    response: Optional[Response] = None,
+) -> List[Any]:
+    result = await db.execute(keyset(query, model, limit, skip, after))
+    return page_rows(list(result.scalars().all()), limit, response)
+
+
+def page_payload(rows: List[Any], limit: int, schema: Any) -> RawJSON:
+    """Página cacheável: itens já codificados com o schema de resposta e o cursor em ``X-Next-Cursor``"""
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return RawJSON(dump_models(schema, rows), headers)
+
+
+async def fetch_page_payload(
+    db: AsyncSession,
+    query: Select,
+    model: Any,
+    schema: Any,
+    limit: int,
+    skip: int = 0,
+    after: Optional[CursorKey] = None,
+) -> RawJSON:
+    result = await db.execute(keyset(query, model, limit, skip, after))
+    return page_payload(list(result.scalars().all()), limit, schema)
+
+
+@functools.lru_cache(maxsize=None)
+def schema_columns(model: Any, schema: Any) -> Tuple[Any, ...]:
+    """Colunas do model na ordem dos campos do schema de resposta.
+
+    Campos sem coluna (ex.: ``ScanResponse.config``) saem como NULL, que é o default
+    deles; um campo sem coluna e com outro default não tem como ser servido pelo caminho rápido.
+    """
+    columns = []
+    for name, info in schema.model_fields.items():
+        column = model.__table__.columns.get(name)
+        if column is not None:
+            columns.append(getattr(model, name).label(name))
+        elif info.is_required() or info.get_default() is not None:
+            raise ValueError(f"{schema.__name__}.{name} não tem coluna em {model.__name__}")
+        else:
+            columns.append(null().label(name))
+    return tuple(columns)
+
+
+def select_schema(model: Any, schema: Any) -> Select:
+    """``select`` Core só com as colunas que o schema expõe (caminho rápido de listagem)"""
+    return select(*schema_columns(model, schema))
+
+
+async def fetch_rows_payload(
+    db: AsyncSession,
+    query: Select,
+    model: Any,
+    limit: int,
+    skip: int = 0,
+    after: Optional[CursorKey] = None,
+) -> RawJSON:
+    """Como ``fetch_page_payload``, para queries de ``select_schema``: tuplas codificadas com orjson"""
+    result = await db.execute(keyset(query, model, limit, skip, after))
+    rows = result.all()
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(rows[-1].created_at, rows[-1].id)
+    return RawJSON(dump_rows(rows), headers)
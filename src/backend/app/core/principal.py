@@ -0,0 +1,267 @@
+"""
+Securet Flow SSC - Principal Cache
+Cache do usuário autenticado (principal) com LRU local na frente do Redis
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, fields
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import redis.asyncio as redis
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_DATETIME_FIELDS = ("last_login", "created_at", "updated_at")
+
+INVALIDATION_CHANNEL = "principal:invalidate"
+
+# Grava o principal só se a geração do usuário não mudou desde a leitura do banco
+GUARDED_SET_LUA = """
+if (redis.call('GET', KEYS[2]) or '0') ~= ARGV[1] then
+    return 0
+end
+redis.call('HSET', KEYS[1], ARGV[2], ARGV[3])
+redis.call('EXPIRE', KEYS[1], ARGV[4])
+return 1
+"""
+
+# (geração local, geração no Redis) observada antes de ler o banco
+Generation = Tuple[int, str]
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Snapshot imutável do usuário autenticado (sem sessão ORM associada)"""
+    id: int
+    username: str
+    email: str
+    full_name: Optional[str] = None
+    is_active: bool = True
+    is_superuser: bool = False
+    role_id: Optional[int] = None
+    department: Optional[str] = None
+    last_login: Optional[datetime] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    @classmethod
+    def from_user(cls, user: Any) -> "Principal":
+        return cls(**{f.name: getattr(user, f.name) for f in fields(cls)})
+
+    def to_json(self) -> str:
+        data = asdict(self)
+        for name in _DATETIME_FIELDS:
+            if data[name] is not None:
+                data[name] = data[name].isoformat()
+        return json.dumps(data)
+
+    @classmethod
+    def from_json(cls, raw: str) -> "Principal":
+        data = json.loads(raw)
+        for name in _DATETIME_FIELDS:
+            if data.get(name):
+                data[name] = datetime.fromisoformat(data[name])
+        return cls(**data)
+
+
+class PrincipalCache:
+    """Resolve principals por (sub, versão do token).
+
+    Camada 1: LRU em processo com TTL curto (limita a janela de staleness
+    entre workers). Camada 2: hash Redis ``principal:{sub}`` com um campo por
+    versão de token, de forma que invalidar um usuário é um único DEL.
+
+    Invalidações são publicadas em ``principal:invalidate`` para os outros
+    processos descartarem seu LRU, e incrementam a geração do usuário
+    (``principal:gen:{sub}``): um ``set`` baseado em leitura anterior à
+    invalidação é recusado em vez de regravar o principal obsoleto.
+    """
+
+    def __init__(
+        self,
+        redis_client: Optional[redis.Redis] = None,
+        lru_size: int = 1024,
+        lru_ttl: float = 10.0,
+        redis_ttl: int = 300,
+    ):
+        self.redis = redis_client
+        self.lru_size = lru_size
+        self.lru_ttl = lru_ttl
+        self.redis_ttl = redis_ttl
+        self._lru: "OrderedDict[Tuple[str, int], Tuple[float, Principal]]" = OrderedDict()
+        self._generations: Dict[str, int] = {}
+        self._listener: Optional[asyncio.Task] = None
+        self._guarded_set = redis_client.register_script(GUARDED_SET_LUA) if redis_client is not None else None
+
+    @staticmethod
+    def _redis_key(sub: str) -> str:
+        return f"principal:{sub}"
+
+    @staticmethod
+    def _generation_key(sub: str) -> str:
+        return f"principal:gen:{sub}"
+
+    def _drop_local(self, subs: Iterable[str]) -> None:
+        targets = set(subs)
+        for sub in targets:
+            self._generations[sub] = self._generations.get(sub, 0) + 1
+        for key in [k for k in self._lru if k[0] in targets]:
+            del self._lru[key]
+
+    def _lru_get(self, key: Tuple[str, int]) -> Optional[Principal]:
+        entry = self._lru.get(key)
+        if entry is None:
+            return None
+        expires_at, principal = entry
+        if expires_at < time.monotonic():
+            del self._lru[key]
+            return None
+        self._lru.move_to_end(key)
+        return principal
+
+    def _lru_set(self, key: Tuple[str, int], principal: Principal) -> None:
+        if self.lru_size <= 0:
+            return
+        self._lru[key] = (time.monotonic() + self.lru_ttl, principal)
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    async def get(self, sub: str, version: int) -> Optional[Principal]:
+        key = (sub, version)
+        principal = self._lru_get(key)
+        if principal is not None:
+            return principal
+        if self.redis is None:
+            return None
+        self._ensure_listener()
+        try:
+            raw = await self.redis.hget(self._redis_key(sub), str(version))
+        except Exception as e:
+            logger.warning(f"Principal cache read failed: {e}")
+            return None
+        if not raw:
+            return None
+        principal = Principal.from_json(raw)
+        self._lru_set(key, principal)
+        return principal
+
+    async def generation(self, sub: str) -> Generation:
+        """Geração atual do usuário; passe-a para ``set`` depois de ler o banco"""
+        remote = "0"
+        if self.redis is not None:
+            try:
+                remote = await self.redis.get(self._generation_key(sub)) or "0"
+            except Exception as e:
+                logger.warning(f"Principal cache read failed: {e}")
+        return self._generations.get(sub, 0), remote
+
+    async def set(
+        self, sub: str, version: int, principal: Principal, generation: Optional[Generation] = None
+    ) -> None:
+        if generation is not None and generation[0] != self._generations.get(sub, 0):
+            return  # invalidado neste processo durante a leitura do banco
+        if self.redis is None:
+            self._lru_set((sub, version), principal)
+            return
+        try:
+            key = self._redis_key(sub)
+            if generation is None:
+                pipe = self.redis.pipeline()
+                pipe.hset(key, str(version), principal.to_json())
+                pipe.expire(key, self.redis_ttl)
+                await pipe.execute()
+            elif not await self._guarded_set(
+                keys=[key, self._generation_key(sub)],
+                args=[generation[1], str(version), principal.to_json(), self.redis_ttl],
+            ):
+                return  # invalidado em outro processo durante a leitura do banco
+        except Exception as e:
+            logger.warning(f"Principal cache write failed: {e}")
+        self._lru_set((sub, version), principal)
+
+    async def invalidate(self, *subs: Optional[str]) -> None:
+        """Remove os principals dos usuários informados (todas as versões), em todos os processos"""
+        targets = sorted({s for s in subs if s})
+        if not targets:
+            return
+        self._drop_local(targets)
+        if self.redis is None:
+            return
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.delete(*(self._redis_key(s) for s in targets))
+            for sub in targets:
+                pipe.incr(self._generation_key(sub))
+                # deve sobreviver a qualquer leitura do banco em andamento
+                pipe.expire(self._generation_key(sub), self.redis_ttl)
+            pipe.publish(INVALIDATION_CHANNEL, json.dumps(targets))
+            await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Principal cache invalidation failed: {e}")
+
+    def _ensure_listener(self) -> None:
+        if self.lru_size <= 0:
+            return
+        loop = asyncio.get_running_loop()
+        task = self._listener
+        if task is not None and not task.done() and task.get_loop() is loop:
+            return
+        # Novo loop (ou listener morto): o LRU pode ter perdido invalidações
+        self._lru.clear()
+        self._listener = loop.create_task(self._listen())
+
+    async def _listen(self) -> None:
+        """Aplica no LRU local as invalidações publicadas por outros processos"""
+        while True:
+            pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                # mensagens perdidas durante a (re)conexão: descarta o que estiver em memória
+                self._lru.clear()
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        self._drop_local(json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Principal invalidation listener failed: {e}")
+                await asyncio.sleep(1.0)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+    async def close(self) -> None:
+        """Encerra o listener (reaberto sob demanda no próximo uso)"""
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._listener = None
+
+
+def _build_principal_cache() -> PrincipalCache:
+    try:
+        client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+    except Exception:
+        client = None
+    return PrincipalCache(
+        client,
+        lru_size=settings.PRINCIPAL_LRU_SIZE,
+        lru_ttl=settings.PRINCIPAL_LRU_TTL,
+        redis_ttl=settings.PRINCIPAL_CACHE_TTL,
+    )
+
+
+principal_cache = _build_principal_cache()
@@ -0,0 +1,196 @@
+"""
+Securet Flow SSC - Rate Limiting
+Janela deslizante (sliding window counter) atômica no Redis via Lua, com pré-checagem local
+"""
+
+import logging
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+import redis.asyncio as redis
+from starlette.routing import Match
+
+from app.core.auth import decode_token
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# KEYS: janela atual, janela anterior
+# ARGV: limite, duração da janela (s), fração decorrida da janela atual,
+#       requisições já admitidas localmente (contabilizadas sempre), custo desta requisição
+# Retorna {admitida (0/1), uso estimado após a decisão}
+SLIDING_WINDOW_LUA = """
+local limit = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local elapsed = tonumber(ARGV[3])
+local admitted = tonumber(ARGV[4])
+local cost = tonumber(ARGV[5])
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+if admitted > 0 then
+    current = redis.call('INCRBY', KEYS[1], admitted)
+    redis.call('EXPIRE', KEYS[1], window * 2)
+end
+local used = previous * (1 - elapsed) + current
+if used + cost > limit then
+    return {0, tostring(used)}
+end
+redis.call('INCRBY', KEYS[1], cost)
+redis.call('EXPIRE', KEYS[1], window * 2)
+return {1, tostring(used + cost)}
+"""
+
+
+@dataclass(frozen=True)
+class Decision:
+    allowed: bool
+    limit: int
+    remaining: int
+    retry_after: int = 0
+
+
+class _LocalWindow:
+    """O que este processo sabe de um bucket desde a última ida ao Redis"""
+
+    __slots__ = ("window_start", "known", "pending", "synced_at")
+
+    def __init__(self, window_start: int, known: float, synced_at: float):
+        self.window_start = window_start
+        self.known = known
+        self.pending = 0
+        self.synced_at = synced_at
+
+
+def rule_for(method: str, template: Optional[str]) -> Tuple[str, int, int]:
+    """(bucket, limite, janela em segundos) da requisição"""
+    if template and template.startswith("/api/v1/scans") and method not in SAFE_METHODS:
+        return "scans:write", settings.RATE_LIMIT_SCANS_PER_HOUR, 3600
+    # Rotas inexistentes compartilham um bucket: paths arbitrários não criam chaves novas
+    return template or "unmatched", settings.RATE_LIMIT_PER_MINUTE, 60
+
+
+class RateLimiter:
+    """Uma chamada Lua atômica por decisão (INCR + janela anterior + EXPIRE no mesmo script).
+
+    A pré-checagem local admite sem Redis enquanto o último uso conhecido do bucket
+    mais o que foi admitido localmente estiver abaixo de ``local_fraction`` do limite,
+    por no máximo ``local_batch`` requisições ou ``sync_seconds``; essas admissões vão
+    para o Redis na próxima chamada. O excesso possível fica limitado a
+    ``processos x local_batch`` por bucket.
+    """
+
+    def __init__(
+        self,
+        client: redis.Redis,
+        local_fraction: float = 0.5,
+        local_batch: int = 8,
+        sync_seconds: float = 1.0,
+        max_buckets: int = 10_000,
+    ):
+        self.redis = client
+        self.local_fraction = local_fraction
+        self.local_batch = local_batch
+        self.sync_seconds = sync_seconds
+        self.max_buckets = max_buckets
+        self._script = client.register_script(SLIDING_WINDOW_LUA)
+        self._local: "OrderedDict[str, _LocalWindow]" = OrderedDict()
+
+    def _local_check(self, key: str, limit: int, window_start: int) -> Optional[Decision]:
+        state = self._local.get(key)
+        if (
+            state is None
+            or state.window_start != window_start
+            or state.pending >= self.local_batch
+            or time.monotonic() - state.synced_at >= self.sync_seconds
+            or state.known + state.pending + 1 > limit * self.local_fraction
+        ):
+            return None
+        state.pending += 1
+        return Decision(True, limit, int(limit - state.known - state.pending))
+
+    async def hit(self, bucket: str, identity: str, limit: int, window: int) -> Decision:
+        now = time.time()
+        window_start = int(now // window) * window
+        key = f"{bucket}:{identity}"
+
+        decision = self._local_check(key, limit, window_start)
+        if decision is not None:
+            return decision
+
+        state = self._local.pop(key, None)
+        admitted = state.pending if state is not None else 0
+        tag = f"rate_limit:{{{key}}}"
+        try:
+            allowed, used = await self._script(
+                keys=[f"{tag}:{window_start}", f"{tag}:{window_start - window}"],
+                args=[limit, window, (now - window_start) / window, admitted, 1],
+            )
+        except Exception as e:
+            # Redis indisponível: não bloqueia a API (fail-open)
+            logger.error(f"Rate limiting error: {e}")
+            return Decision(True, limit, limit)
+
+        used = float(used)
+        self._local[key] = _LocalWindow(window_start, used, time.monotonic())
+        if len(self._local) > self.max_buckets:
+            self._local.popitem(last=False)
+        if allowed:
+            return Decision(True, limit, max(0, int(limit - used)))
+        return Decision(False, limit, 0, max(1, math.ceil(window_start + window - now)))
+
+
+class RouteTemplates:
+    """Resolve o template da rota (``/api/v1/scans/{scan_id}``) antes do roteamento, com LRU por path"""
+
+    def __init__(self, size: int = 4096):
+        self.size = size
+        self._cache: "OrderedDict[Tuple[str, str], Optional[str]]" = OrderedDict()
+
+    def resolve(self, scope: Dict[str, Any]) -> Optional[str]:
+        key = (scope["method"], scope["path"])
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        template = None
+        for route in scope["app"].router.routes:
+            match, _ = route.matches(scope)
+            if match is not Match.NONE:
+                template = getattr(route, "path", None)
+                if match is Match.FULL:
+                    break
+        self._cache[key] = template
+        if len(self._cache) > self.size:
+            self._cache.popitem(last=False)
+        return template
+
+
+class Identities:
+    """Usuário do bearer token (assinatura verificada) ou IP do cliente; tokens verificados ficam em LRU"""
+
+    def __init__(self, size: int = 4096):
+        self.size = size
+        self._subjects: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+
+    def _subject(self, token: str) -> Optional[str]:
+        cached = self._subjects.get(token)
+        if cached is not None and cached[1] > time.time():
+            return cached[0]
+        payload = decode_token(token)
+        if payload is None:
+            return None
+        self._subjects[token] = (payload["sub"], float(payload.get("exp") or 0))
+        if len(self._subjects) > self.size:
+            self._subjects.popitem(last=False)
+        return payload["sub"]
+
+    def resolve(self, authorization: Optional[str], client_host: Optional[str]) -> str:
+        if authorization and authorization[:7].lower() == "bearer ":
+            subject = self._subject(authorization[7:].strip())
+            if subject:
+                return f"user:{subject}"
+        return f"ip:{client_host or 'unknown'}"
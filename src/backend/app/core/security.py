@@ -1,6 +1,6 @@
 from typing import Callable, Optional
 from functools import wraps
-from fastapi import Depends, HTTPException, status
+from fastapi import HTTPException, status
 
 # Reexport do get_current_user do módulo auth
 from app.core.auth import get_current_user  # noqa: F401
@@ -42,10 +42,15 @@ def require_permission(required: Optional[str] = None) -> Callable:
     """Decorator de autorização baseado em permissão simples.
     - Se required=None, apenas exige autenticação.
     - Caso contrário, verifica permissões pelo role_id do usuário.
+
+    O endpoint decorado deve declarar ``current_user = Depends(get_current_user)``;
+    o FastAPI resolve a assinatura original (via ``__wrapped__``) e o principal
+    chega aqui já resolvido, sem uma segunda dependência.
     """
     def decorator(func: Callable) -> Callable:
         @wraps(func)
-        async def wrapper(*args, current_user=Depends(get_current_user), **kwargs):
+        async def wrapper(*args, **kwargs):
+            current_user = kwargs.get("current_user")
             if current_user is None:
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
@@ -56,6 +61,6 @@ def require_permission(required: Optional[str] = None) -> Callable:
                     status_code=status.HTTP_403_FORBIDDEN,
                     detail="Insufficient permissions",
                 )
-            return await func(*args, current_user=current_user, **kwargs)
+            return await func(*args, **kwargs)
         return wrapper
     return decorator 
\ No newline at end of file
@@ -0,0 +1,79 @@
+"""
+Securet Flow SSC - Serialization
+Codificação das entradas do cache (orjson/pydantic-core + zlib) e respostas JSON pré-codificadas
+"""
+
+import functools
+import zlib
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Sequence, Tuple
+
+import orjson
+from fastapi import Response
+from pydantic import TypeAdapter
+
+# Tipos do payload de uma entrada: valor JSON genérico ou corpo de resposta já codificado
+JSON_VALUE = "json"
+RAW_JSON = "raw"
+
+
+@dataclass(frozen=True)
+class RawJSON:
+    """Corpo de resposta já codificado; servido como está, sem revalidar o response_model"""
+
+    body: bytes
+    headers: Dict[str, str] = field(default_factory=dict)
+
+
+@functools.lru_cache(maxsize=None)
+def list_adapter(schema: Any) -> TypeAdapter:
+    return TypeAdapter(List[schema])
+
+
+def dump_models(schema: Any, rows: List[Any]) -> bytes:
+    """Valida linhas ORM com o schema de resposta e codifica direto para bytes (pydantic-core)"""
+    adapter = list_adapter(schema)
+    return adapter.dump_json(adapter.validate_python(rows, from_attributes=True))
+
+
+def dump_model(schema: Any, row: Any) -> bytes:
+    return schema.model_validate(row).model_dump_json().encode()
+
+
+def dump_rows(rows: Sequence[Any]) -> bytes:
+    """Linhas Core (``select`` de ``schema_columns``) direto para JSON, sem instanciar ORM nem Pydantic.
+
+    Mesmo formato do pydantic para os tipos das colunas: datetimes ISO 8601 (UTC como ``Z``),
+    floats, JSON aninhado e NULL.
+    """
+    return orjson.dumps([row._asdict() for row in rows], option=orjson.OPT_UTC_Z)
+
+
+def raw_response(raw: RawJSON, status_code: int = 200) -> Response:
+    return Response(content=raw.body, status_code=status_code, media_type="application/json", headers=raw.headers)
+
+
+def pack(meta: Dict[str, Any], value: Any, compress_min: int = 4096) -> bytes:
+    """``meta`` em JSON + ``\\n`` + payload; o payload é comprimido (zlib) a partir de ``compress_min`` bytes"""
+    if isinstance(value, RawJSON):
+        meta = {**meta, "t": RAW_JSON, "h": value.headers}
+        body = value.body
+    else:
+        meta = {**meta, "t": JSON_VALUE}
+        body = orjson.dumps(value)
+    if compress_min > 0 and len(body) >= compress_min:
+        meta["z"] = 1
+        body = zlib.compress(body, 1)
+    # orjson escapa quebras de linha: o primeiro \n sempre separa o cabeçalho
+    return orjson.dumps(meta) + b"\n" + body
+
+
+def unpack(data: bytes) -> Tuple[Dict[str, Any], Any]:
+    header, _, body = data.partition(b"\n")
+    meta = orjson.loads(header)
+    if meta.get("z"):
+        body = zlib.decompress(body)
+    if meta.get("t") == RAW_JSON:
+        return meta, RawJSON(body, meta.get("h") or {})
+    return meta, orjson.loads(body)
+
@@ -3,17 +3,20 @@ Securet Flow SSC - Main Application
 FastAPI application entry point
 """
 
-from fastapi import FastAPI, Request
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from contextlib import asynccontextmanager
 import logging
 
 from app.core.config import settings
-from app.core.database import init_db, close_db
+from app.core.cache import cache
+from app.core.principal import principal_cache
+from app.core.database import SessionLocal, init_db, close_db
 from app.api.v1.api import api_router
 from app.core.logging import setup_logging
-from app.core.middleware import RateLimitMiddleware, LoggingMiddleware, ErrorHandlingMiddleware
+from app.core.middleware import PlatformMiddleware
+from app.services.platform_metrics import register_collector
 import redis.asyncio as redis
 
 # Prometheus metrics
@@ -30,18 +33,13 @@ async def lifespan(app: FastAPI):
     logger.info("Starting Securet Flow SSC application...")
     await init_db()
     logger.info("Application started successfully")
-    
-    # Start metrics
-    try:
-        Instrumentator().instrument(app).expose(app, include_in_schema=False)
-        logger.info("Prometheus metrics exposed at /metrics")
-    except Exception as e:
-        logger.warning(f"Prometheus instrumentation failed: {e}")
 
     yield
     
     # Shutdown
     logger.info("Shutting down Securet Flow SSC application...")
+    await cache.close()
+    await principal_cache.close()
     await close_db()
     logger.info("Application shutdown complete")
 
@@ -69,23 +67,30 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
-# Logging & Error handling
-app.add_middleware(LoggingMiddleware)
-app.add_middleware(ErrorHandlingMiddleware)
-
-# Rate limiting (Redis)
+# Rate limiting, timing, erros e security headers (um único middleware ASGI)
 try:
     redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
-    app.add_middleware(RateLimitMiddleware, redis_client=redis_client)
     logger.info("Rate limiting middleware enabled")
 except Exception as e:
+    redis_client = None
     logger.error(f"Failed to initialize Redis for rate limiting: {e}")
+app.add_middleware(PlatformMiddleware, redis_client=redis_client)
 
 # Include API router
 app.include_router(api_router, prefix="/api/v1")
 
+# Prometheus metrics (middleware precisa ser registrado antes do app iniciar)
+try:
+    Instrumentator().instrument(app).expose(app, include_in_schema=False)
+    # Targets, vulnerabilidades e scans da plataforma (securetflow_*)
+    register_collector(settings.REDIS_URL, SessionLocal)
+    logger.info("Prometheus metrics exposed at /metrics")
+except Exception as e:
+    logger.warning(f"Prometheus instrumentation failed: {e}")
+
 @app.get("/")
 async def root():
     """Root endpoint"""
@@ -103,34 +108,6 @@ async def health_check():
         "timestamp": "2024-01-01T00:00:00Z"
     }
 
-@app.middleware("http")
-async def add_security_headers(request: Request, call_next):
-    """Add security headers to all responses"""
-    response = await call_next(request)
-    
-    # Security headers
-    response.headers["X-Content-Type-Options"] = "nosniff"
-    response.headers["X-Frame-Options"] = "DENY"
-    response.headers["X-XSS-Protection"] = "1; mode=block"
-    response.headers["Strict-Transport-Security"] = "max-age=31536000; includeSubDomains"
-    response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-    response.headers["Permissions-Policy"] = (
-        "geolocation=(), microphone=(), camera=(), fullscreen=(self)"
-    )
-
-    # Content Security Policy (CSP)
-    csp = (
-        "default-src 'self'; "
-        "base-uri 'self'; frame-ancestors 'none'; object-src 'none'; "
-        "script-src 'self'; style-src 'self' 'unsafe-inline'; "
-        "img-src 'self' data:; font-src 'self' data:; "
-        "connect-src 'self' http: https: ws: wss:; "
-        "form-action 'self'"
-    )
-    response.headers["Content-Security-Policy"] = csp
-    
-    return response
-
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
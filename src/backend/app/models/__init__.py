@@ -3,5 +3,6 @@ from .scan import Scan, ScanResult
 from .target import Target
 from .report import Report
 from .role import Role
+from .user_stats import UserStats
 
-__all__ = ['User', 'Scan', 'ScanResult', 'Target', 'Report', 'Role'] 
\ No newline at end of file
+__all__ = ['User', 'Scan', 'ScanResult', 'Target', 'Report', 'Role', 'UserStats'] 
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -6,6 +6,12 @@ from app.core.database import Base
 
 class Report(Base):
     __tablename__ = "reports"
+    # Índices casados com as queries de endpoints/ (ver alembic/versions)
+    __table_args__ = (
+        Index("ix_reports_created_at_id", "created_at", "id"),
+        Index("ix_reports_report_type_created_at_id", "report_type", "created_at", "id"),
+        Index("ix_reports_scan_id_created_at_id", "scan_id", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(200), nullable=False)
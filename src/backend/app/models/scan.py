@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -6,6 +6,18 @@ from app.core.database import Base
 
 class Scan(Base):
     __tablename__ = "scans"
+    # Índices casados com as queries de endpoints/ (ver alembic/versions)
+    __table_args__ = (
+        # listagem keyset e "scans recentes" do dashboard
+        Index("ix_scans_user_id_created_at_id", "user_id", "created_at", "id"),
+        # contagens do dashboard por status
+        Index("ix_scans_user_id_status", "user_id", "status"),
+        # scans em execução: fração pequena da tabela
+        Index(
+            "ix_scans_running_user_id", "user_id",
+            postgresql_where=text("status = 'running'"), sqlite_where=text("status = 'running'"),
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False)
@@ -28,7 +40,7 @@ class ScanResult(Base):
     __tablename__ = "scan_results"
     
     id = Column(Integer, primary_key=True, index=True)
-    scan_id = Column(Integer, ForeignKey("scans.id"))
+    scan_id = Column(Integer, ForeignKey("scans.id"), index=True)
     tool_name = Column(String(50), nullable=False)
     result_data = Column(Text)
     status = Column(String(20), default="pending")
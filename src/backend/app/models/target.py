@@ -3,7 +3,7 @@ Securet Flow SSC - Target Model
 Target database model and operations
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, JSON, ForeignKey, ARRAY
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, JSON, ForeignKey, ARRAY, Index
 from sqlalchemy.sql import func
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
@@ -19,6 +19,12 @@ logger = logging.getLogger(__name__)
 class Target(Base):
     """Target model"""
     __tablename__ = "targets"
+    # Índices casados com as queries de endpoints/ (ver alembic/versions)
+    __table_args__ = (
+        Index("ix_targets_user_id_created_at_id", "user_id", "created_at", "id"),
+        # resolução do alvo na ingestão DAST
+        Index("ix_targets_user_id_host", "user_id", "host"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False)
@@ -48,14 +54,14 @@ class Target(Base):
     
     @classmethod
     async def get_all(cls, db: AsyncSession, skip: int = 0, limit: int = 100, 
-                     category: Optional[str] = None, status: Optional[str] = None) -> List["Target"]:
+                     user_id: Optional[int] = None, protocol: Optional[str] = None) -> List["Target"]:
         """Get all targets with filters"""
         query = select(cls)
         
-        if category:
-            query = query.where(cls.category == category)
-        if status:
-            query = query.where(cls.status == status)
+        if user_id is not None:
+            query = query.where(cls.user_id == user_id)
+        if protocol:
+            query = query.where(cls.protocol == protocol)
         
         result = await db.execute(query.offset(skip).limit(limit))
         return result.scalars().all()
@@ -63,7 +69,7 @@ class Target(Base):
     @classmethod
     async def get_by_owner(cls, db: AsyncSession, owner_id: int) -> List["Target"]:
         """Get targets by owner"""
-        result = await db.execute(select(cls).where(cls.owner_id == owner_id))
+        result = await db.execute(select(cls).where(cls.user_id == owner_id))
         return result.scalars().all()
     
     @classmethod
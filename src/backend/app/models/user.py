@@ -3,7 +3,7 @@ Securet Flow SSC - User Model
 User database model and operations
 """
 
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -11,6 +11,9 @@ from app.core.database import Base
 
 class User(Base):
     __tablename__ = "users"
+    # Índices casados com as queries de endpoints/ (ver alembic/versions);
+    # username e email já têm índice único
+    __table_args__ = (Index("ix_users_created_at_id", "created_at", "id"),)
     
     id = Column(Integer, primary_key=True, index=True)
     username = Column(String(50), unique=True, index=True, nullable=False)
@@ -19,7 +22,7 @@ class User(Base):
     full_name = Column(String(100))
     is_active = Column(Boolean, default=True)
     is_superuser = Column(Boolean, default=False)
-    role_id = Column(Integer, ForeignKey("roles.id"), nullable=True)
+    role_id = Column(Integer, ForeignKey("roles.id"), nullable=True, index=True)
     department = Column(String(100))
     last_login = Column(DateTime)
     created_at = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, text
+
+from app.core.database import Base
+
+
+class UserStats(Base):
+    """Contadores do dashboard por usuário.
+
+    Mantidos por triggers no banco (ver alembic/versions/0004) a cada escrita em
+    scans, targets e vulnerabilities; sem FK para users de propósito, para que
+    a ordem de remoção das linhas não importe.
+    """
+    __tablename__ = "user_stats"
+
+    user_id = Column(Integer, primary_key=True, autoincrement=False)
+    total_scans = Column(Integer, nullable=False, server_default=text("0"))
+    active_scans = Column(Integer, nullable=False, server_default=text("0"))
+    completed_scans = Column(Integer, nullable=False, server_default=text("0"))
+    total_targets = Column(Integer, nullable=False, server_default=text("0"))
+    vulns_critical = Column(Integer, nullable=False, server_default=text("0"))
+    vulns_high = Column(Integer, nullable=False, server_default=text("0"))
+    vulns_medium = Column(Integer, nullable=False, server_default=text("0"))
+    vulns_low = Column(Integer, nullable=False, server_default=text("0"))
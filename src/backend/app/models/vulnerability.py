@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Float, JSON
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Float, JSON, Index, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -6,6 +6,21 @@ from app.core.database import Base
 
 class Vulnerability(Base):
     __tablename__ = "vulnerabilities"
+    # Índices casados com as queries de endpoints/ (ver alembic/versions):
+    # cada filtro de GET /vulnerabilities + a ordenação keyset (created_at, id)
+    __table_args__ = (
+        Index("ix_vulnerabilities_created_at_id", "created_at", "id"),
+        Index("ix_vulnerabilities_severity_created_at_id", "severity", "created_at", "id"),
+        Index("ix_vulnerabilities_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_vulnerabilities_target_id_created_at_id", "target_id", "created_at", "id"),
+        # contagem por severidade do dashboard (coberta pelo índice)
+        Index("ix_vulnerabilities_user_id_severity", "user_id", "severity"),
+        # vulnerabilidades abertas por severidade: fatia quente e pequena da tabela
+        Index(
+            "ix_vulnerabilities_open_severity", "severity", "created_at", "id",
+            postgresql_where=text("status = 'open'"), sqlite_where=text("status = 'open'"),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(255), nullable=False)
@@ -18,6 +33,9 @@ class Vulnerability(Base):
     solution = Column(Text)
     references = Column(JSON)
     cve = Column(String(50))
+    url = Column(String(2048))
+    # Hash estável (dono, alvo, título, url, cve) usado para deduplicar achados importados
+    fingerprint = Column(String(64), unique=True, index=True)
 
     target_id = Column(Integer, ForeignKey("targets.id"), nullable=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
@@ -4,6 +4,7 @@ from .target import TargetCreate, TargetUpdate, TargetResponse
 from .role import RoleCreate, RoleUpdate, RoleResponse
 from .vulnerability import VulnerabilityCreate, VulnerabilityUpdate, VulnerabilityResponse
 from .report import ReportCreate, ReportUpdate, ReportResponse
+from .bulk import BulkCreateRequest, BulkCreateResponse, BulkItemError, BulkUpdateResponse, VulnerabilityStatusBulk
 
 __all__ = [
     'Token', 'UserCreate', 'UserResponse',
@@ -11,5 +12,6 @@ __all__ = [
     'TargetCreate', 'TargetUpdate', 'TargetResponse',
     'RoleCreate', 'RoleUpdate', 'RoleResponse',
     'VulnerabilityCreate', 'VulnerabilityUpdate', 'VulnerabilityResponse',
-    'ReportCreate', 'ReportUpdate', 'ReportResponse'
+    'ReportCreate', 'ReportUpdate', 'ReportResponse',
+    'BulkCreateRequest', 'BulkCreateResponse', 'BulkItemError', 'BulkUpdateResponse', 'VulnerabilityStatusBulk'
 ] 
\ No newline at end of file
@@ -0,0 +1,25 @@
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List
+
+from app.core.config import settings
+
+class BulkCreateRequest(BaseModel):
+    # Itens validados um a um no endpoint: um item inválido não derruba o lote
+    items: List[Dict[str, Any]] = Field(min_length=1, max_length=settings.BULK_MAX_ITEMS)
+
+class BulkItemError(BaseModel):
+    index: int  # posição do item (ou do id) na requisição
+    errors: List[str]
+
+class BulkCreateResponse(BaseModel):
+    created: int
+    ids: List[int]  # na ordem dos itens aceitos
+    errors: List[BulkItemError] = []
+
+class VulnerabilityStatusBulk(BaseModel):
+    ids: List[int] = Field(min_length=1, max_length=settings.BULK_MAX_ITEMS)
+    status: str = Field(pattern="^(open|in-progress|resolved|false-positive)$")
+
+class BulkUpdateResponse(BaseModel):
+    updated: int
+    errors: List[BulkItemError] = []
@@ -12,6 +12,7 @@ class VulnerabilityBase(BaseModel):
     solution: Optional[str] = None
     references: Optional[List[str]] = None
     cve: Optional[str] = None
+    url: Optional[str] = None
     target_id: Optional[int] = None
 
 class VulnerabilityCreate(VulnerabilityBase):
@@ -27,6 +28,7 @@ class VulnerabilityUpdate(BaseModel):
     solution: Optional[str] = None
     references: Optional[List[str]] = None
     cve: Optional[str] = None
+    url: Optional[str] = None
     target_id: Optional[int] = None
 
 class VulnerabilityResponse(VulnerabilityBase):
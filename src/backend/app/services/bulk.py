@@ -0,0 +1,91 @@
+"""
+Securet Flow SSC - Bulk Operations
+Validação em lote com erros por item, INSERT multi-row e transições de status em massa
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import Table, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.serialization import list_adapter
+from app.models.target import Target
+from app.models.vulnerability import Vulnerability
+from app.schemas.bulk import BulkItemError
+
+
+def _message(loc: Sequence[Any], msg: str) -> str:
+    return f"{'.'.join(map(str, loc))}: {msg}" if loc else msg
+
+
+def validate_items(schema: Any, items: List[Dict[str, Any]]) -> Tuple[List[Tuple[int, BaseModel]], List[BulkItemError]]:
+    """Valida o lote inteiro de uma vez; só refaz a validação dos válidos quando algum item falha.
+
+    Retorna ``[(índice, modelo)]`` dos itens aceitos e os erros dos rejeitados.
+    """
+    adapter = list_adapter(schema)
+    try:
+        return list(enumerate(adapter.validate_python(items))), []
+    except ValidationError as e:
+        failed: Dict[int, List[str]] = {}
+        for error in e.errors():
+            index, *loc = error["loc"]
+            failed.setdefault(index, []).append(_message(loc, error["msg"]))
+    accepted = [i for i in range(len(items)) if i not in failed]
+    models = adapter.validate_python([items[i] for i in accepted])
+    errors = [BulkItemError(index=i, errors=messages) for i, messages in sorted(failed.items())]
+    return list(zip(accepted, models)), errors
+
+
+async def insert_rows(db: AsyncSession, table: Table, rows: List[Dict[str, Any]], batch_size: Optional[int] = None) -> List[int]:
+    """INSERT multi-row (insertmanyvalues) com RETURNING id na ordem de ``rows``; não faz commit"""
+    batch_size = batch_size or settings.BULK_BATCH_SIZE
+    stmt = insert(table).returning(table.c.id, sort_by_parameter_order=True)
+    ids: List[int] = []
+    for start in range(0, len(rows), batch_size):
+        result = await db.execute(stmt, rows[start:start + batch_size])
+        ids.extend(result.scalars().all())
+    return ids
+
+
+async def existing_target_ids(db: AsyncSession, target_ids: Sequence[int]) -> set:
+    found = set()
+    target_ids = list(set(target_ids))
+    for start in range(0, len(target_ids), settings.BULK_BATCH_SIZE):
+        chunk = target_ids[start:start + settings.BULK_BATCH_SIZE]
+        found.update((await db.execute(select(Target.id).where(Target.id.in_(chunk)))).scalars())
+    return found
+
+
+async def set_vulnerability_status(
+    db: AsyncSession, ids: Sequence[int], status: str, batch_size: Optional[int] = None
+) -> Tuple[Dict[int, Optional[int]], List[BulkItemError]]:
+    """UPDATE ... WHERE id IN (...) RETURNING por lote; não faz commit.
+
+    Retorna ``{id: user_id}`` das linhas atualizadas (para invalidar os dashboards
+    dos donos) e um erro por id inexistente, com o índice da sua primeira ocorrência.
+    """
+    batch_size = batch_size or settings.BULK_BATCH_SIZE
+    positions = {}
+    for index, vuln_id in enumerate(ids):
+        positions.setdefault(vuln_id, index)
+    unique = list(positions)
+    now = datetime.utcnow()
+    table = Vulnerability.__table__
+    owners: Dict[int, Optional[int]] = {}
+    for start in range(0, len(unique), batch_size):
+        stmt = (
+            update(table)
+            .where(table.c.id.in_(unique[start:start + batch_size]))
+            .values(status=status, updated_at=now)
+            .returning(table.c.id, table.c.user_id)
+        )
+        owners.update((await db.execute(stmt)).tuples().all())
+    errors = [
+        BulkItemError(index=positions[vuln_id], errors=["Vulnerability not found"])
+        for vuln_id in unique if vuln_id not in owners
+    ]
+    return owners, errors
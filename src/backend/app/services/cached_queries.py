@@ -0,0 +1,116 @@
+"""
+Securet Flow SSC - Cached Queries
+Leituras dos endpoints via @cached (corpos JSON pré-codificados) e os namespaces que as escritas invalidam
+"""
+
+from typing import Any, List, Optional
+
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import cached
+from app.core.config import settings
+from app.core.pagination import CursorKey, fetch_page_payload, fetch_rows_payload, select_schema
+from app.core.serialization import RawJSON, dump_model
+from app.models.report import Report
+from app.models.scan import Scan
+from app.models.target import Target
+from app.models.vulnerability import Vulnerability
+from app.schemas import ReportResponse, ScanResponse, TargetResponse, VulnerabilityResponse
+
+# Namespaces de invalidação (cache.invalidate): por usuário ou globais
+SCANS = "scans:{user_id}"
+TARGETS = "targets:{user_id}"
+DASHBOARD = "dashboard:{user_id}"
+VULNERABILITIES = "vulnerabilities"
+REPORTS = "reports"
+
+
+def user_namespaces(user_id: Optional[int], *templates: str) -> List[str]:
+    if user_id is None:
+        return []
+    return [t.format(user_id=user_id) for t in templates]
+
+
+def _dump(schema: Any, row: Any) -> Optional[RawJSON]:
+    return RawJSON(dump_model(schema, row)) if row is not None else None
+
+
+@cached(SCANS, ttl=settings.CACHE_READ_TTL)
+async def scan_page(db: AsyncSession, user_id: int, limit: int, skip: int, after: Optional[CursorKey]) -> RawJSON:
+    query = select_schema(Scan, ScanResponse).where(Scan.user_id == user_id)
+    return await fetch_rows_payload(db, query, Scan, limit, skip=skip, after=after)
+
+
+@cached(SCANS, ttl=settings.CACHE_READ_TTL)
+async def scan_detail(db: AsyncSession, user_id: int, scan_id: int) -> Optional[RawJSON]:
+    scan = await db.scalar(select(Scan).where(Scan.id == scan_id, Scan.user_id == user_id))
+    return _dump(ScanResponse, scan)
+
+
+@cached(TARGETS, ttl=30)
+async def target_page(db: AsyncSession, user_id: int, limit: int, skip: int, after: Optional[CursorKey]) -> RawJSON:
+    query = select(Target).where(Target.user_id == user_id)
+    return await fetch_page_payload(db, query, Target, TargetResponse, limit, skip=skip, after=after)
+
+
+@cached(TARGETS, ttl=60)
+async def target_detail(db: AsyncSession, user_id: int, target_id: int) -> Optional[RawJSON]:
+    target = await db.scalar(select(Target).where(Target.id == target_id, Target.user_id == user_id))
+    return _dump(TargetResponse, target)
+
+
+def vulnerability_query(
+    severity: Optional[str] = None, status: Optional[str] = None, target_id: Optional[int] = None
+) -> Select:
+    """Colunas de ``VulnerabilityResponse`` com os filtros de GET /vulnerabilities (listagem e exportação)"""
+    query = select_schema(Vulnerability, VulnerabilityResponse)
+    if severity:
+        query = query.where(Vulnerability.severity == severity)
+    if status:
+        query = query.where(Vulnerability.status == status)
+    if target_id:
+        query = query.where(Vulnerability.target_id == target_id)
+    return query
+
+
+@cached(VULNERABILITIES, ttl=settings.CACHE_READ_TTL)
+async def vulnerability_page(
+    db: AsyncSession,
+    limit: int,
+    skip: int,
+    after: Optional[CursorKey],
+    severity: Optional[str] = None,
+    status: Optional[str] = None,
+    target_id: Optional[int] = None,
+) -> RawJSON:
+    # Páginas de até 1000 linhas: colunas via Core direto para orjson, sem ORM/Pydantic por linha
+    query = vulnerability_query(severity, status, target_id)
+    return await fetch_rows_payload(db, query, Vulnerability, limit, skip=skip, after=after)
+
+
+@cached(VULNERABILITIES, ttl=settings.CACHE_READ_TTL)
+async def vulnerability_detail(db: AsyncSession, vuln_id: int) -> Optional[RawJSON]:
+    return _dump(VulnerabilityResponse, await db.get(Vulnerability, vuln_id))
+
+
+@cached(REPORTS, ttl=settings.CACHE_READ_TTL)
+async def report_page(
+    db: AsyncSession,
+    limit: int,
+    skip: int,
+    after: Optional[CursorKey],
+    report_type: Optional[str] = None,
+    scan_id: Optional[int] = None,
+) -> RawJSON:
+    query = select(Report)
+    if report_type:
+        query = query.where(Report.report_type == report_type)
+    if scan_id:
+        query = query.where(Report.scan_id == scan_id)
+    return await fetch_page_payload(db, query, Report, ReportResponse, limit, skip=skip, after=after)
+
+
+@cached(REPORTS, ttl=settings.CACHE_READ_TTL)
+async def report_detail(db: AsyncSession, report_id: int) -> Optional[RawJSON]:
+    return _dump(ReportResponse, await db.get(Report, report_id))
@@ -0,0 +1,95 @@
+"""
+Securet Flow SSC - Dashboard Stats
+Estatísticas do dashboard em uma única query agregada, com cache por usuário no Redis
+"""
+
+import logging
+from typing import Dict, Optional
+
+from sqlalchemy import Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import cached
+from app.core.config import settings
+from app.models.scan import Scan
+from app.models.target import Target
+from app.models.user_stats import UserStats
+from app.models.vulnerability import Vulnerability
+from app.services.cached_queries import DASHBOARD
+
+logger = logging.getLogger(__name__)
+
+SEVERITIES = ("critical", "high", "medium", "low")
+RECENT_SCANS = 10
+
+
+def stats_query(user_id: int) -> Select:
+    """Contagens de scans, targets e vulnerabilidades do usuário em um único SELECT.
+
+    Cada subquery é um agregado com FILTER sobre um índice (user_id, ...), e o
+    produto das três linhas únicas vira uma linha só.
+    """
+    scans = select(
+        func.count().label("total_scans"),
+        func.count().filter(Scan.status == "running").label("active_scans"),
+        func.count().filter(Scan.status == "completed").label("completed_scans"),
+    ).select_from(Scan).where(Scan.user_id == user_id).subquery("scan_counts")
+    targets = select(
+        func.count().label("total_targets"),
+    ).select_from(Target).where(Target.user_id == user_id).subquery("target_counts")
+    vulns = select(
+        *[func.count().filter(Vulnerability.severity == s).label(f"vulns_{s}") for s in SEVERITIES]
+    ).select_from(Vulnerability).where(Vulnerability.user_id == user_id).subquery("vuln_counts")
+    return select(scans, targets, vulns)
+
+
+def counters_query(user_id: int) -> Select:
+    """Mesma linha lida da tabela user_stats mantida pelos triggers"""
+    return select(UserStats).where(UserStats.user_id == user_id)
+
+
+def recent_scans_query(user_id: int) -> Select:
+    return select(Scan).where(Scan.user_id == user_id).order_by(Scan.created_at.desc()).limit(RECENT_SCANS)
+
+
+def _counts(row) -> Dict:
+    get = (lambda name: getattr(row, name, 0) or 0) if row is not None else (lambda name: 0)
+    return {
+        "totalScans": get("total_scans"),
+        "activeScans": get("active_scans"),
+        "completedScans": get("completed_scans"),
+        "totalTargets": get("total_targets"),
+        "vulnerabilities": {s: get(f"vulns_{s}") for s in SEVERITIES},
+    }
+
+
+def _scan_dict(scan: Scan) -> Dict:
+    return {
+        "id": scan.id,
+        "name": scan.name,
+        "status": scan.status,
+        "scan_type": scan.scan_type,
+        "created_at": scan.created_at.isoformat() if scan.created_at else None,
+        "started_at": scan.started_at.isoformat() if scan.started_at else None,
+        "completed_at": scan.completed_at.isoformat() if scan.completed_at else None,
+    }
+
+
+async def compute_stats(db: AsyncSession, user_id: int, use_counters: Optional[bool] = None) -> Dict:
+    """Estatísticas direto do banco: 1 query de contagens + 1 de scans recentes"""
+    if use_counters is None:
+        use_counters = settings.DASHBOARD_USE_COUNTERS
+    if use_counters:
+        row = await db.scalar(counters_query(user_id))
+    else:
+        row = (await db.execute(stats_query(user_id))).first()
+    stats = _counts(row)
+    recent = await db.scalars(recent_scans_query(user_id))
+    stats["recentScans"] = [_scan_dict(scan) for scan in recent]
+    return stats
+
+
+@cached(DASHBOARD, ttl=settings.DASHBOARD_CACHE_TTL, name="dashboard")
+async def get_stats(db: AsyncSession, user_id: int) -> Dict:
+    """Estatísticas do usuário, servidas do cache até uma escrita invalidar o namespace do dashboard"""
+    return await compute_stats(db, user_id)
@@ -0,0 +1,338 @@
+"""
+Securet Flow SSC - DAST Execution Engine
+Execução real de ferramentas DAST (ZAP/Nuclei) em subprocessos com pool limitado
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+import shlex
+import signal
+import tempfile
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+SEVERITIES = ("critical", "high", "medium", "low", "info")
+
+_PERCENT_RE = re.compile(r"(\d{1,3}(?:\.\d+)?)\s*%")
+_ZAP_RISK = {"3": "high", "2": "medium", "1": "low", "0": "info"}
+
+ProgressCallback = Callable[[int], None]
+FindingCallback = Callable[[Dict[str, Any]], None]
+
+
+class DASTToolError(Exception):
+    """Falha ao executar uma ferramenta DAST"""
+
+
+class DASTQueueFull(Exception):
+    """Fila de jobs DAST atingiu o limite configurado"""
+
+
+def _normalize_severity(value: Any) -> str:
+    sev = str(value or "info").strip().lower()
+    # ZAP: "High (Medium)" -> "high"
+    sev = sev.split(" ", 1)[0]
+    if sev == "informational":
+        sev = "info"
+    return sev if sev in SEVERITIES else "info"
+
+
+def _nuclei_finding(data: Dict[str, Any]) -> Dict[str, Any]:
+    info = data.get("info") or {}
+    classification = info.get("classification") or {}
+    cves = classification.get("cve-id") or []
+    return {
+        "id": data.get("template-id"),
+        "severity": _normalize_severity(info.get("severity")),
+        "title": info.get("name") or data.get("template-id"),
+        "url": data.get("matched-at") or data.get("host"),
+        "cve": (cves[0].upper() if isinstance(cves, list) and cves else None),
+        "description": info.get("description"),
+        "tool": "nuclei",
+    }
+
+
+def _zap_finding(data: Dict[str, Any]) -> Dict[str, Any]:
+    risk = data.get("risk") or data.get("riskdesc") or _ZAP_RISK.get(str(data.get("riskcode")))
+    return {
+        "id": f"ZAP-{data.get('pluginId') or data.get('pluginid')}",
+        "severity": _normalize_severity(risk),
+        "title": data.get("alert") or data.get("name"),
+        "url": data.get("url") or data.get("uri"),
+        "cve": None,
+        "description": data.get("description") or data.get("desc"),
+        "tool": "zap",
+    }
+
+
+def parse_report(data: Any) -> List[Dict[str, Any]]:
+    """Converte um relatório JSON do ZAP (``-quickout report.json``) em achados"""
+    findings: List[Dict[str, Any]] = []
+    if not isinstance(data, dict):
+        return findings
+    sites = data.get("site") or []
+    if isinstance(sites, dict):
+        sites = [sites]
+    for site in sites:
+        for alert in site.get("alerts") or []:
+            instances = alert.get("instances") or [{}]
+            for instance in instances:
+                finding = _zap_finding({**alert, "uri": instance.get("uri") or site.get("@name")})
+                findings.append(finding)
+    return findings
+
+
+def parse_line(line: str) -> Optional[Tuple[str, Any]]:
+    """Interpreta uma linha de saída de ferramenta DAST.
+
+    Retorna ``("finding", dict)``, ``("progress", int)`` ou ``None``. Aceita
+    JSONL do Nuclei (``-jsonl`` e ``-stats-json``), alertas ZAP serializados
+    em JSON e linhas de texto com percentual (ex.: ``-quickprogress``).
+    """
+    line = line.strip()
+    if not line:
+        return None
+    if line.startswith("{"):
+        try:
+            data = json.loads(line)
+        except ValueError:
+            data = None
+        if isinstance(data, dict):
+            if "template-id" in data:
+                return "finding", _nuclei_finding(data)
+            if "alert" in data or "pluginId" in data or "pluginid" in data:
+                return "finding", _zap_finding(data)
+            pct = data.get("percent", data.get("progress"))
+            if pct is not None:
+                try:
+                    return "progress", max(0, min(100, int(float(pct))))
+                except (TypeError, ValueError):
+                    return None
+            return None
+    match = _PERCENT_RE.search(line)
+    if match:
+        return "progress", max(0, min(100, int(float(match.group(1)))))
+    return None
+
+
+class ToolRunner:
+    """Executa uma ferramenta CLI em um subprocesso, lendo stdout de forma incremental"""
+
+    def __init__(self, name: str, command: str, kill_grace: float = 5.0):
+        self.name = name
+        self.command = command
+        self.kill_grace = kill_grace
+
+    def build_argv(self, target_url: str, report_path: str = "") -> List[str]:
+        # Sem shell: alvo e relatório são substituídos em cada argumento já separado
+        return [
+            arg.replace("{target}", target_url).replace("{report}", report_path)
+            for arg in shlex.split(self.command)
+        ]
+
+    async def run(
+        self,
+        target_url: str,
+        on_progress: Optional[ProgressCallback] = None,
+        on_finding: Optional[FindingCallback] = None,
+    ) -> int:
+        with tempfile.TemporaryDirectory(prefix=f"dast-{self.name}-") as workdir:
+            report_path = os.path.join(workdir, "report.json")
+            returncode = await self._run(self.build_argv(target_url, report_path), on_progress, on_finding)
+            if on_finding and os.path.exists(report_path):
+                with open(report_path, "r", encoding="utf-8") as f:
+                    try:
+                        report = json.load(f)
+                    except ValueError:
+                        report = None
+                for finding in parse_report(report):
+                    on_finding(finding)
+        return returncode
+
+    async def _run(
+        self,
+        argv: List[str],
+        on_progress: Optional[ProgressCallback],
+        on_finding: Optional[FindingCallback],
+    ) -> int:
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *argv,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+                stdin=asyncio.subprocess.DEVNULL,
+                start_new_session=True,  # grupo próprio: cancelamento mata os filhos também
+                limit=1024 * 1024,
+            )
+        except FileNotFoundError as e:
+            raise DASTToolError(f"{self.name}: executável não encontrado ({argv[0]})") from e
+
+        try:
+            assert proc.stdout is not None
+            async for raw in proc.stdout:
+                event = parse_line(raw.decode("utf-8", errors="replace"))
+                if event is None:
+                    continue
+                kind, value = event
+                if kind == "progress" and on_progress:
+                    on_progress(value)
+                elif kind == "finding" and on_finding:
+                    on_finding(value)
+            returncode = await proc.wait()
+        except BaseException:
+            await self._kill(proc)
+            raise
+
+        if returncode != 0:
+            raise DASTToolError(f"{self.name}: finalizou com código {returncode}")
+        return returncode
+
+    async def _kill(self, proc: asyncio.subprocess.Process) -> None:
+        if proc.returncode is not None:
+            return
+        for sig, wait in ((signal.SIGTERM, self.kill_grace), (signal.SIGKILL, None)):
+            try:
+                os.killpg(proc.pid, sig)
+            except ProcessLookupError:
+                return
+            try:
+                await asyncio.wait_for(asyncio.shield(proc.wait()), timeout=wait)
+                return
+            except asyncio.TimeoutError:
+                continue
+
+
+def get_runner(tool: str) -> ToolRunner:
+    commands = {
+        "zap": settings.DAST_ZAP_CMD,
+        "nuclei": settings.DAST_NUCLEI_CMD,
+    }
+    if tool not in commands:
+        raise DASTToolError(f"Ferramenta DAST desconhecida: {tool}")
+    return ToolRunner(tool, commands[tool], kill_grace=settings.DAST_KILL_GRACE_SECONDS)
+
+
+def expand_tools(tool: str) -> List[str]:
+    return ["zap", "nuclei"] if tool == "both" else [tool]
+
+
+async def run_tools(
+    target_url: str,
+    tool: str,
+    on_progress: Optional[ProgressCallback] = None,
+    on_finding: Optional[FindingCallback] = None,
+) -> Dict[str, Any]:
+    """Executa as ferramentas do job em sequência e agrega os achados"""
+    summary = {sev: 0 for sev in SEVERITIES}
+    findings: List[Dict[str, Any]] = []
+    tools = expand_tools(tool)
+
+    for idx, name in enumerate(tools):
+        runner = get_runner(name)
+
+        def _progress(pct: int, idx: int = idx) -> None:
+            if on_progress:
+                on_progress(int((idx * 100 + pct) / len(tools)))
+
+        def _finding(finding: Dict[str, Any]) -> None:
+            summary[finding["severity"]] += 1
+            findings.append(finding)
+            if on_finding:
+                on_finding(finding)
+
+        await runner.run(target_url, _progress, _finding)
+
+    if on_progress:
+        on_progress(100)
+    return {"summary": summary, "findings": findings}
+
+
+class DASTEngine:
+    """Pool limitado de execução de jobs DAST.
+
+    Cada job aguarda primeiro a vaga do seu alvo (host) e só então a vaga
+    global, de forma que jobs enfileirados para um alvo ocupado não seguram
+    slots globais. Submissões acima de ``max_queue`` são rejeitadas.
+    """
+
+    def __init__(self, max_concurrency: int, max_per_target: int, max_queue: int):
+        self.max_concurrency = max_concurrency
+        self.max_per_target = max_per_target
+        self.max_queue = max_queue
+        self._global = asyncio.Semaphore(max_concurrency)
+        # host -> [semáforo, jobs que o referenciam]
+        self._per_target: Dict[str, List[Any]] = {}
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self.running = 0
+
+    @staticmethod
+    def target_key(target_url: str) -> str:
+        parsed = urlparse(target_url)
+        return (parsed.hostname or target_url).lower()
+
+    def _acquire_target(self, key: str) -> asyncio.Semaphore:
+        entry = self._per_target.get(key)
+        if entry is None:
+            entry = self._per_target[key] = [asyncio.Semaphore(self.max_per_target), 0]
+        entry[1] += 1
+        return entry[0]
+
+    def _release_target(self, key: str) -> None:
+        entry = self._per_target[key]
+        entry[1] -= 1
+        if entry[1] == 0:
+            del self._per_target[key]
+
+    @property
+    def pending(self) -> int:
+        return len(self._tasks) - self.running
+
+    def submit(self, job_id: str, target_url: str, job_fn: Callable[[], Awaitable[None]]) -> asyncio.Task:
+        if self.pending >= self.max_queue:
+            raise DASTQueueFull(f"Fila DAST cheia ({self.max_queue} jobs pendentes)")
+        key = self.target_key(target_url)
+        target_sem = self._acquire_target(key)
+        task = asyncio.create_task(self._execute(target_sem, job_fn))
+        self._tasks[job_id] = task
+        # Callback em vez de finally: cobre também tasks canceladas antes de iniciar
+        task.add_done_callback(lambda _: self._finish(job_id, key))
+        return task
+
+    def _finish(self, job_id: str, key: str) -> None:
+        self._tasks.pop(job_id, None)
+        self._release_target(key)
+
+    async def _execute(self, target_sem: asyncio.Semaphore, job_fn: Callable[[], Awaitable[None]]) -> None:
+        async with target_sem:
+            async with self._global:
+                self.running += 1
+                try:
+                    await job_fn()
+                finally:
+                    self.running -= 1
+
+    async def cancel(self, job_id: str) -> bool:
+        task = self._tasks.get(job_id)
+        if task is None or task.done():
+            return False
+        task.cancel()
+        try:
+            await task
+        except (asyncio.CancelledError, Exception):
+            pass
+        return True
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "running": self.running,
+            "pending": self.pending,
+            "max_concurrency": self.max_concurrency,
+            "max_per_target": self.max_per_target,
+        }
@@ -0,0 +1,123 @@
+"""
+Securet Flow SSC - DAST Event Hub
+Fan-out dos eventos de jobs DAST (Redis pub/sub) para assinantes locais
+"""
+
+import asyncio
+import json
+import logging
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional, Set
+
+import redis.asyncio as redis
+
+from app.services.dast_store import DASTJobStore
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription:
+    """Fila local de eventos de um assinante (um stream SSE)"""
+
+    def __init__(self, owner_id: Any, job_id: Optional[str], max_queue: int):
+        self.owner_id = owner_id
+        self.job_id = job_id
+        self.queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue(maxsize=max_queue)
+        self.dropped = 0
+
+    def push(self, event: Dict[str, Any]) -> None:
+        if self.job_id is not None and event.get("job_id") != self.job_id:
+            return
+        if self.queue.full():
+            # Assinante lento: descarta o evento mais antigo em vez de bloquear o hub
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class DASTEventHub:
+    """Uma conexão pub/sub por processo, compartilhada por todos os assinantes.
+
+    Cada usuário com ao menos um assinante local tem o seu canal assinado; os
+    eventos recebidos são distribuídos às filas locais. Qualquer worker pode
+    servir qualquer assinante, pois os eventos são publicados no Redis por
+    quem executa o job (engine in-process ou worker Celery).
+    """
+
+    def __init__(self, redis_client: redis.Redis, max_queue: int = 256):
+        self.redis = redis_client
+        self.max_queue = max_queue
+        self._subs: Dict[str, Set[Subscription]] = {}
+        self._pubsub = None
+        self._listener: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+
+    @asynccontextmanager
+    async def subscribe(self, owner_id: Any, job_id: Optional[str] = None) -> AsyncIterator[Subscription]:
+        sub = Subscription(owner_id, job_id, self.max_queue)
+        channel = DASTJobStore.events_channel(owner_id)
+        await self._add(channel, sub)
+        try:
+            yield sub
+        finally:
+            await self._remove(channel, sub)
+
+    async def _add(self, channel: str, sub: Subscription) -> None:
+        async with self._lock:
+            subs = self._subs.get(channel)
+            if subs is None:
+                subs = self._subs[channel] = set()
+                if self._pubsub is None:
+                    self._pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+                await self._pubsub.subscribe(channel)
+            subs.add(sub)
+            if self._listener is None or self._listener.done():
+                self._listener = asyncio.create_task(self._listen())
+
+    async def _remove(self, channel: str, sub: Subscription) -> None:
+        async with self._lock:
+            subs = self._subs.get(channel)
+            if not subs:
+                return
+            subs.discard(sub)
+            if subs:
+                return
+            del self._subs[channel]
+            if self._subs:
+                await self._pubsub.unsubscribe(channel)
+                return
+            # Último assinante do processo: libera a conexão pub/sub
+            if self._listener is not None:
+                self._listener.cancel()
+                self._listener = None
+            pubsub, self._pubsub = self._pubsub, None
+            try:
+                await pubsub.aclose()
+            except Exception as e:
+                logger.warning(f"DAST event hub close failed: {e}")
+
+    async def _listen(self) -> None:
+        pubsub = self._pubsub
+        while True:
+            try:
+                message = await pubsub.get_message(timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"DAST event hub read failed: {e}")
+                await asyncio.sleep(1.0)
+                continue
+            if message is None or message.get("type") != "message":
+                continue
+            try:
+                event = json.loads(message["data"])
+            except (TypeError, ValueError):
+                continue
+            for sub in list(self._subs.get(message["channel"], ())):
+                sub.push(event)
@@ -1,12 +1,19 @@
 import asyncio
 import time
 import uuid
-from typing import Dict, Optional
+from typing import AsyncIterator, Dict, Optional
 import logging
 import os
 
+from app.core.cache import cache
 from app.core.config import settings
-import redis.asyncio as redis
+from app.core.database import AsyncSessionLocal
+from app.services.dast_engine import DASTEngine, DASTQueueFull, DASTToolError, run_tools
+from app.services.dast_events import DASTEventHub
+from app.services.cached_queries import DASHBOARD, SCANS, VULNERABILITIES, user_namespaces
+from app.services.dast_ingest import ingest_job
+from app.services.dast_store import TERMINAL_STATUSES, DASTJobStore, JobRecorder, build_store
+from app.services.platform_metrics import ScanMetrics
 
 logger = logging.getLogger(__name__)
 
@@ -17,94 +24,171 @@ if USE_CELERY:
     except Exception:
         run_dast_job = None
 
-class DASTJob:
-    def __init__(self, target_url: str, tool: str):
-        self.id = str(uuid.uuid4())
-        self.target_url = target_url
-        self.tool = tool  # "zap" | "nuclei" | "both"
-        self.status = "queued"
-        self.progress = 0
-        self.result: Optional[Dict] = None
-        self.created_at = int(time.time())
+def _owner_pk(owner_id: Optional[str]) -> Optional[int]:
+    try:
+        return int(owner_id) if owner_id else None
+    except ValueError:
+        return None
+
+
+async def _ingest(job_id: str, owner_id: Optional[str], target_url: str, tool: str, findings: list) -> Dict:
+    """Persiste os achados do job; falhas não alteram o resultado do scan"""
+    try:
+        async with AsyncSessionLocal() as db:
+            ingested = await ingest_job(db, job_id, _owner_pk(owner_id), target_url, tool, findings)
+        await cache.invalidate(VULNERABILITIES, *user_namespaces(_owner_pk(owner_id), SCANS, DASHBOARD))
+        return ingested
+    except Exception as e:
+        logger.error(f"DAST job {job_id}: findings ingestion failed: {e}")
+        return {}
+
+
+async def execute_job(store: DASTJobStore, job_id: str, target_url: str, tool: str) -> str:
+    """Executa as ferramentas do job registrando progresso, achados e estado final no store.
+
+    Compartilhado pelo engine in-process e pela task Celery; retorna o status final.
+    """
+    if not await store.transition(job_id, "running"):
+        return "cancelled"  # cancelado (ou expirado) antes de iniciar
+    (owner_id,) = await store.get_fields(job_id, "owner_id")
+    # Métricas pelo mesmo cliente do store (a task Celery usa um cliente por execução)
+    metrics = ScanMetrics(store.redis)
+    await metrics.started("dast")
+    started = time.monotonic()
+    recorder = JobRecorder(store, job_id, owner_id)
+    flusher = asyncio.create_task(recorder.run())
+    status, error, ingested = "completed", None, {}
+    try:
+        result = await asyncio.wait_for(
+            run_tools(target_url, tool, recorder.on_progress, recorder.on_finding),
+            timeout=settings.DAST_JOB_TIMEOUT,
+        )
+        # Antes do status final: quem recebe "completed" já encontra as vulnerabilidades no banco
+        ingested = await _ingest(job_id, owner_id, target_url, tool, result["findings"])
+    except asyncio.CancelledError:
+        status = "cancelled"
+        raise
+    except asyncio.TimeoutError:
+        status, error = "failed", f"Timeout após {settings.DAST_JOB_TIMEOUT}s"
+        logger.error(f"DAST job {job_id} timed out")
+    except DASTToolError as e:
+        status, error = "failed", str(e)
+        logger.error(f"DAST job {job_id} failed: {e}")
+    except Exception as e:
+        status, error = "failed", "Erro interno"
+        logger.error(f"DAST job {job_id} failed: {e}")
+    finally:
+        flusher.cancel()
+        try:
+            await recorder.flush()
+            fields = {"progress": 100, **ingested} if status == "completed" else {"error": error}
+            await store.transition(job_id, status, **fields)
+        except Exception as e:
+            logger.error(f"DAST job {job_id}: failed to persist final state: {e}")
+        await metrics.finished("dast", status, time.monotonic() - started, active=True)
+    return status
+
 
 class DASTService:
     def __init__(self):
-        self.jobs: Dict[str, DASTJob] = {}
-        try:
-            self.redis = redis.from_url(settings.REDIS_URL, decode_responses=True)
-        except Exception:
-            self.redis = None
+        self.store = build_store()
+        self.events = DASTEventHub(self.store.redis)
+        self.engine = DASTEngine(
+            max_concurrency=settings.DAST_MAX_CONCURRENCY,
+            max_per_target=settings.DAST_MAX_PER_TARGET,
+            max_queue=settings.DAST_MAX_QUEUE,
+        )
 
-    async def submit(self, target_url: str, tool: str = "zap") -> str:
-        job = DASTJob(target_url, tool)
-        self.jobs[job.id] = job
+    async def submit(self, target_url: str, tool: str = "zap", owner_id: Optional[int] = None) -> str:
+        """Enfileira um job; levanta DASTQueueFull se o pool estiver saturado"""
+        job_id = str(uuid.uuid4())
+        await self.store.create(job_id, owner_id, target_url, tool)
         if USE_CELERY and run_dast_job:
-            job.status = "running"
-            task = run_dast_job.delay(target_url, tool)
-            asyncio.create_task(self._watch_celery(job, task))
-        else:
-            asyncio.create_task(self._run(job))
-        return job.id
+            task = run_dast_job.delay(job_id, target_url, tool)
+            await self.store.set_fields(job_id, celery_task_id=task.id)
+            return job_id
+        try:
+            self.engine.submit(job_id, target_url, lambda: self._run(job_id, target_url, tool))
+        except DASTQueueFull:
+            await self.store.delete(job_id, owner_id)
+            raise
+        return job_id
 
-    async def status(self, job_id: str) -> Optional[Dict]:
-        job = self.jobs.get(job_id)
-        if not job:
+    async def status(self, job_id: str, owner_id: Optional[int] = None) -> Optional[Dict]:
+        data = await self.store.get(job_id)
+        if not data or (owner_id is not None and data["owner_id"] != str(owner_id)):
             return None
-        return {
-            "id": job.id,
-            "target": job.target_url,
-            "tool": job.tool,
-            "status": job.status,
-            "progress": job.progress,
-            "result": job.result,
-        }
-
-    async def cancel(self, job_id: str) -> bool:
-        job = self.jobs.get(job_id)
-        if not job or job.status in ("completed", "failed"):
+        return data
+
+    async def owns(self, job_id: str, owner_id: int) -> bool:
+        (owner,) = await self.store.get_fields(job_id, "owner_id")
+        return owner is not None and owner == str(owner_id)
+
+    async def stream(self, owner_id: int, job_id: Optional[str] = None, keepalive: float = 15.0) -> AsyncIterator[Optional[Dict]]:
+        """Eventos de um job (ou de todos os jobs do usuário); ``None`` indica keepalive.
+
+        A assinatura é feita antes do snapshot inicial, então nenhum evento se
+        perde entre os dois (o cliente pode receber algum em duplicidade).
+        """
+        async with self.events.subscribe(owner_id, job_id) as sub:
+            if job_id is not None:
+                snapshot = await self.status(job_id, owner_id)
+                if snapshot is None:
+                    return
+                yield {"type": "snapshot", "job_id": job_id, "job": snapshot}
+                if snapshot["status"] in TERMINAL_STATUSES:
+                    return
+            while True:
+                event = await sub.get(timeout=keepalive)
+                yield event
+                if (
+                    job_id is not None
+                    and event is not None
+                    and event["type"] == "status"
+                    and event["status"] in TERMINAL_STATUSES
+                ):
+                    return
+
+    async def list_jobs(self, owner_id: int, skip: int = 0, limit: int = 50) -> Dict:
+        total, items = await self.store.list_for_user(owner_id, skip, limit)
+        return {"total": total, "items": items}
+
+    async def cancel(self, job_id: str, owner_id: Optional[int] = None) -> bool:
+        owner, celery_task_id = await self.store.get_fields(job_id, "owner_id", "celery_task_id")
+        if owner is None or (owner_id is not None and owner != str(owner_id)):
             return False
-        job.status = "cancelled"
+        if not await self.store.request_cancel(job_id):
+            return False  # já terminou
+        if celery_task_id and run_dast_job:
+            run_dast_job.app.control.revoke(celery_task_id, terminate=True, signal="SIGTERM")
+        else:
+            # Se o job roda neste worker, cancela já; senão o worker dono recebe o evento
+            # "cancelled" publicado por request_cancel no canal do usuário
+            await self.engine.cancel(job_id)
         return True
 
-    async def _run(self, job: DASTJob) -> None:
-        try:
-            job.status = "running"
-            for i in range(1, 11):
-                if job.status == "cancelled":
-                    return
-                job.progress = i * 10
-                await asyncio.sleep(0.5)
-            # Stub result
-            job.result = {
-                "summary": {
-                    "critical": 0,
-                    "high": 1 if job.tool in ("zap", "both") else 0,
-                    "medium": 2,
-                    "low": 1,
-                },
-                "findings": [
-                    {"id": "ZAP-001", "severity": "High", "title": "XSS Refletido", "url": job.target_url},
-                ],
-            }
-            job.status = "completed"
-        except Exception as e:
-            job.status = "failed"
-            logger.error(f"DAST job failed: {e}")
+    async def _run(self, job_id: str, target_url: str, tool: str) -> None:
+        (owner_id,) = await self.store.get_fields(job_id, "owner_id")
+        # Assinado antes de o job iniciar: cancelamentos anteriores são barrados pela
+        # transição para "running", os posteriores chegam como evento de status
+        async with self.events.subscribe(owner_id, job_id) as sub:
+            watcher = asyncio.create_task(self._watch_cancel(sub, asyncio.current_task()))
+            try:
+                await execute_job(self.store, job_id, target_url, tool)
+            finally:
+                watcher.cancel()
 
-    async def _watch_celery(self, job: DASTJob, task):
-        try:
-            while not task.ready():
-                if job.status == "cancelled":
-                    return
-                await asyncio.sleep(0.5)
-            if task.successful():
-                job.result = task.get()
-                job.status = "completed"
-            else:
-                job.status = "failed"
-        except Exception as e:
-            job.status = "failed"
-            logger.error(f"DAST celery watcher failed: {e}")
+    @staticmethod
+    async def _watch_cancel(sub, task: asyncio.Task) -> None:
+        # Cancelamentos pedidos em outro worker chegam pelo canal pub/sub do usuário
+        while True:
+            event = await sub.get()
+            if event is None or event.get("type") != "status":
+                continue
+            if event["status"] == "cancelled":
+                task.cancel()
+            if event["status"] in TERMINAL_STATUSES:
+                return
 
 
-dast_service = DASTService() 
\ No newline at end of file
+dast_service = DASTService()
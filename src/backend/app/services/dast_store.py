@@ -0,0 +1,287 @@
+"""
+Securet Flow SSC - DAST Job Store
+Estado durável dos jobs DAST no Redis, compartilhado entre workers
+"""
+
+import asyncio
+import json
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import redis.asyncio as redis
+
+from app.core.config import settings
+from app.services.dast_engine import SEVERITIES
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ("completed", "failed", "cancelled")
+
+# Transição de status atômica: nunca sai de um estado terminal e publica o evento no canal do dono
+# KEYS[1] = hash do job; ARGV[1] = novo status; ARGV[2] = TTL (0 = manter); ARGV[3] = evento JSON;
+# ARGV[4..] = pares campo/valor
+_TRANSITION_SCRIPT = """
+local current = redis.call('HGET', KEYS[1], 'status')
+if not current then return -1 end
+if current == 'completed' or current == 'failed' or current == 'cancelled' then return 0 end
+redis.call('HSET', KEYS[1], 'status', ARGV[1])
+for i = 4, #ARGV, 2 do
+  redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+local ttl = tonumber(ARGV[2])
+if ttl > 0 then
+  redis.call('EXPIRE', KEYS[1], ttl)
+  redis.call('EXPIRE', KEYS[2], ttl)
+end
+local owner = redis.call('HGET', KEYS[1], 'owner_id')
+redis.call('PUBLISH', 'dast:events:user:' .. owner, ARGV[3])
+return 1
+"""
+
+
+def _encode(value: Any) -> str:
+    return "" if value is None else str(value)
+
+
+def _int_or_none(value: Optional[str]) -> Optional[int]:
+    return int(value) if value else None
+
+
+class DASTJobStore:
+    """Jobs DAST em Redis.
+
+    - ``dast:job:{id}``: hash com status, progresso, erro e contadores por severidade
+    - ``dast:job:{id}:findings``: stream com um achado (JSON) por entrada
+    - ``dast:user:{owner}:jobs``: sorted set (score = created_at) usado como índice por usuário
+
+    Todas as chaves expiram após ``ttl`` segundos; o índice por usuário é podado
+    na inserção e entradas de jobs já expirados são removidas na leitura.
+    """
+
+    def __init__(self, redis_client: redis.Redis, ttl: int = 7 * 24 * 3600):
+        self.redis = redis_client
+        self.ttl = ttl
+        self._transition = redis_client.register_script(_TRANSITION_SCRIPT)
+
+    @staticmethod
+    def _job_key(job_id: str) -> str:
+        return f"dast:job:{job_id}"
+
+    @staticmethod
+    def _findings_key(job_id: str) -> str:
+        return f"dast:job:{job_id}:findings"
+
+    @staticmethod
+    def _user_key(owner_id: Any) -> str:
+        return f"dast:user:{owner_id}:jobs"
+
+    @staticmethod
+    def events_channel(owner_id: Any) -> str:
+        """Canal pub/sub com os eventos de todos os jobs de um usuário"""
+        return f"dast:events:user:{_encode(owner_id)}"
+
+    async def create(self, job_id: str, owner_id: Any, target_url: str, tool: str) -> Dict[str, Any]:
+        now = int(time.time())
+        fields = {
+            "id": job_id,
+            "owner_id": _encode(owner_id),
+            "target": target_url,
+            "tool": tool,
+            "status": "queued",
+            "progress": 0,
+            "error": "",
+            "created_at": now,
+            "updated_at": now,
+        }
+        user_key = self._user_key(owner_id)
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.hset(self._job_key(job_id), mapping=fields)
+        pipe.expire(self._job_key(job_id), self.ttl)
+        pipe.zadd(user_key, {job_id: now})
+        pipe.zremrangebyscore(user_key, "-inf", now - self.ttl)
+        pipe.expire(user_key, self.ttl)
+        await pipe.execute()
+        return fields
+
+    async def delete(self, job_id: str, owner_id: Any) -> None:
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.delete(self._job_key(job_id), self._findings_key(job_id))
+        pipe.zrem(self._user_key(owner_id), job_id)
+        await pipe.execute()
+
+    async def get_fields(self, job_id: str, *names: str) -> List[Optional[str]]:
+        values = await self.redis.hmget(self._job_key(job_id), list(names))
+        return [v if v != "" else None for v in values]
+
+    async def set_fields(self, job_id: str, **fields: Any) -> None:
+        fields["updated_at"] = int(time.time())
+        await self.redis.hset(self._job_key(job_id), mapping={k: _encode(v) for k, v in fields.items()})
+
+    async def transition(self, job_id: str, status: str, **fields: Any) -> bool:
+        """Muda o status se o job existir e ainda não estiver em estado terminal"""
+        fields["updated_at"] = int(time.time())
+        if status in TERMINAL_STATUSES:
+            fields["finished_at"] = fields["updated_at"]
+        ttl = self.ttl if status in TERMINAL_STATUSES else 0
+        event = {"type": "status", "job_id": job_id, "status": status}
+        if "error" in fields:
+            event["error"] = fields["error"]
+        if "progress" in fields:
+            event["progress"] = fields["progress"]
+        args: List[Any] = [status, ttl, json.dumps(event)]
+        for name, value in fields.items():
+            args.extend((name, _encode(value)))
+        result = await self._transition(keys=[self._job_key(job_id), self._findings_key(job_id)], args=args)
+        return int(result) == 1
+
+    async def record(
+        self,
+        job_id: str,
+        progress: Optional[int] = None,
+        findings: Iterable[Dict[str, Any]] = (),
+        owner_id: Any = None,
+    ) -> None:
+        """Grava progresso e achados novos em um único round-trip.
+
+        Com ``owner_id``, o mesmo lote é publicado como um único evento ``update``.
+        """
+        findings = list(findings)
+        findings_key = self._findings_key(job_id)
+        job_key = self._job_key(job_id)
+        pipe = self.redis.pipeline(transaction=False)
+        mapping: Dict[str, Any] = {"updated_at": int(time.time())}
+        if progress is not None:
+            mapping["progress"] = progress
+        pipe.hset(job_key, mapping=mapping)
+        for finding in findings:
+            pipe.xadd(findings_key, {"f": json.dumps(finding)})
+            pipe.hincrby(job_key, f"sev:{finding.get('severity', 'info')}", 1)
+        if findings:
+            pipe.expire(findings_key, self.ttl)
+        if owner_id is not None:
+            event = {"type": "update", "job_id": job_id, "progress": progress, "findings": findings}
+            pipe.publish(self.events_channel(owner_id), json.dumps(event))
+        await pipe.execute()
+
+    async def request_cancel(self, job_id: str) -> bool:
+        """Marca o job como cancelado; o worker que o executa observa a flag"""
+        return await self.transition(job_id, "cancelled", cancel_requested=1)
+
+    async def cancel_requested(self, job_id: str) -> bool:
+        return bool(await self.redis.hget(self._job_key(job_id), "cancel_requested"))
+
+    async def get(self, job_id: str, with_findings: bool = True) -> Optional[Dict[str, Any]]:
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.hgetall(self._job_key(job_id))
+        if with_findings:
+            pipe.xrange(self._findings_key(job_id))
+        replies = await pipe.execute()
+        if not replies[0]:
+            return None
+        return self._to_status(replies[0], replies[1] if with_findings else None)
+
+    async def list_for_user(self, owner_id: Any, skip: int = 0, limit: int = 50) -> Tuple[int, List[Dict[str, Any]]]:
+        """Jobs do usuário, mais recentes primeiro (sem os achados)"""
+        user_key = self._user_key(owner_id)
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.zcard(user_key)
+        pipe.zrevrange(user_key, skip, skip + limit - 1)
+        total, job_ids = await pipe.execute()
+        if not job_ids:
+            return total, []
+
+        pipe = self.redis.pipeline(transaction=False)
+        for job_id in job_ids:
+            pipe.hgetall(self._job_key(job_id))
+        rows = await pipe.execute()
+
+        items, expired = [], []
+        for job_id, row in zip(job_ids, rows):
+            if row:
+                items.append(self._to_status(row, None))
+            else:
+                expired.append(job_id)
+        if expired:
+            await self.redis.zrem(user_key, *expired)
+            total -= len(expired)
+        return total, items
+
+    @staticmethod
+    def _to_status(row: Dict[str, str], entries: Optional[List[Any]]) -> Dict[str, Any]:
+        status = row.get("status", "queued")
+        data: Dict[str, Any] = {
+            "id": row.get("id"),
+            "owner_id": row.get("owner_id") or None,
+            "target": row.get("target"),
+            "tool": row.get("tool"),
+            "status": status,
+            "progress": int(row.get("progress") or 0),
+            "error": row.get("error") or None,
+            "created_at": _int_or_none(row.get("created_at")),
+            "finished_at": _int_or_none(row.get("finished_at")),
+            "scan_id": _int_or_none(row.get("scan_id")),
+        }
+        summary = {sev: int(row.get(f"sev:{sev}", 0)) for sev in SEVERITIES}
+        if entries is None:
+            data["summary"] = summary
+        elif status == "queued":
+            data["result"] = None
+        else:
+            data["result"] = {
+                "summary": summary,
+                "findings": [json.loads(fields["f"]) for _, fields in entries],
+            }
+        return data
+
+
+class JobRecorder:
+    """Coalesce os callbacks síncronos do runner em gravações em lote no Redis.
+
+    Os callbacks apenas acumulam em memória; uma task de flush grava o último
+    progresso e os achados pendentes sempre que há algo novo.
+    """
+
+    def __init__(self, store: DASTJobStore, job_id: str, owner_id: Any = None):
+        self.store = store
+        self.job_id = job_id
+        self.owner_id = owner_id
+        self._progress: Optional[int] = None
+        self._findings: List[Dict[str, Any]] = []
+        self._dirty = asyncio.Event()
+
+    def on_progress(self, pct: int) -> None:
+        self._progress = pct
+        self._dirty.set()
+
+    def on_finding(self, finding: Dict[str, Any]) -> None:
+        self._findings.append(finding)
+        self._dirty.set()
+
+    async def run(self) -> None:
+        while True:
+            await self._dirty.wait()
+            self._dirty.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.warning(f"DAST job {self.job_id}: progress write failed: {e}")
+
+    async def flush(self) -> None:
+        progress, findings = self._progress, self._findings
+        if progress is None and not findings:
+            return
+        self._progress, self._findings = None, []
+        try:
+            await self.store.record(self.job_id, progress=progress, findings=findings, owner_id=self.owner_id)
+        except Exception:
+            # Devolve o lote para a próxima tentativa
+            self._findings = findings + self._findings
+            if self._progress is None:
+                self._progress = progress
+            raise
+
+
+def build_store(url: Optional[str] = None) -> DASTJobStore:
+    client = redis.from_url(url or settings.REDIS_URL, decode_responses=True)
+    return DASTJobStore(client, ttl=settings.DAST_JOB_TTL)
@@ -1,5 +1,7 @@
 from celery import Celery
+import asyncio
 import os
+import signal
 
 CELERY_BROKER_URL = os.getenv("CELERY_BROKER_URL", "redis://redis:6379/0")
 CELERY_BACKEND_URL = os.getenv("CELERY_BACKEND_URL", "redis://redis:6379/1")
@@ -10,13 +12,30 @@ celery_app = Celery(
     backend=CELERY_BACKEND_URL,
 )
 
-@celery_app.task(name="dast.run")
-def run_dast_job(target_url: str, tool: str = "zap") -> dict:
-    # Placeholder: aqui conectaremos ZAP/Nuclei
-    # Simula execução
-    import time
-    time.sleep(2)
-    return {
-        "summary": {"critical": 0, "high": 1 if tool in ("zap", "both") else 0, "medium": 2, "low": 1},
-        "findings": [{"id": "STUB-1", "severity": "High", "title": "Demo", "url": target_url}],
-    } 
\ No newline at end of file
+@celery_app.task(name="dast.run", bind=True)
+def run_dast_job(self, job_id: str, target_url: str, tool: str = "zap") -> dict:
+    # Mesmo runner usado pelo engine in-process; progresso e achados vão direto para o job store
+    from app.core.cache import cache
+    from app.core.database import async_engine
+    from app.services.dast_service import execute_job
+    from app.services.dast_store import build_store
+
+    async def _main() -> dict:
+        # revoke(terminate=True) envia SIGTERM: cancela a task para o runner matar o grupo de processos
+        task = asyncio.current_task()
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, task.cancel)
+        except (NotImplementedError, RuntimeError):
+            pass
+        # Cliente Redis por execução: cada asyncio.run usa um event loop novo
+        store = build_store()
+        try:
+            status = await execute_job(store, job_id, target_url, tool)
+        finally:
+            await store.redis.aclose()
+            # Conexões do pool ficam presas ao loop desta execução
+            await async_engine.dispose()
+            await cache.close()
+        return {"job_id": job_id, "status": status}
+
+    return asyncio.run(_main())
@@ -0,0 +1,101 @@
+"""
+Securet Flow SSC - Export
+Exportação em streaming (NDJSON/CSV) com cursor do servidor e gzip opcional
+"""
+
+import csv
+import io
+import zlib
+from datetime import datetime
+from typing import AsyncIterator, Callable, List, Sequence
+
+import orjson
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+# Células iniciadas por estes caracteres viram fórmula no Excel/LibreOffice (CSV injection);
+# títulos e URLs vêm de scanners e podem ser controlados pelo alvo
+_FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def _ndjson(columns: List[str]) -> Callable[[Sequence], bytes]:
+    def encode(rows: Sequence) -> bytes:
+        return b"".join(orjson.dumps(row._asdict(), option=orjson.OPT_UTC_Z) + b"\n" for row in rows)
+
+    return encode
+
+
+def _csv_cell(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (list, dict)):
+        return orjson.dumps(value).decode()
+    if isinstance(value, str) and value.startswith(_FORMULA_PREFIXES):
+        return "'" + value
+    return str(value)
+
+
+def _csv(columns: List[str]) -> Callable[[Sequence], bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(columns)
+    pending = [buffer.getvalue()]  # o cabeçalho sai junto com o primeiro chunk
+
+    def encode(rows: Sequence) -> bytes:
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows([_csv_cell(v) for v in row] for row in rows)
+        data = (pending.pop() if pending else "") + buffer.getvalue()
+        return data.encode()
+
+    return encode
+
+
+ENCODERS = {"ndjson": _ndjson, "csv": _csv}
+
+
+async def export_rows(query: Select, fmt: str, gzip: bool = False) -> AsyncIterator[bytes]:
+    """Emite a query em chunks de ``EXPORT_CHUNK_ROWS`` linhas com memória constante.
+
+    Usa sessão própria (o streaming continua depois que o endpoint retorna) e
+    ``yield_per``/``stream_results``: o driver busca do cursor do servidor por
+    partes em vez de materializar o resultado inteiro.
+    """
+    compressor = zlib.compressobj(settings.EXPORT_GZIP_LEVEL, zlib.DEFLATED, 31) if gzip else None
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(query.execution_options(yield_per=settings.EXPORT_CHUNK_ROWS))
+        encode = ENCODERS[fmt](list(result.keys()))
+        empty = True
+        async for rows in result.partitions():
+            empty = False
+            chunk = encode(rows)
+            if compressor is not None:
+                # flush por chunk: o cliente recebe as linhas à medida que chegam do banco
+                chunk = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            yield chunk
+        if empty:
+            chunk = encode([])  # cabeçalho do CSV mesmo sem linhas
+            yield compressor.compress(chunk) if compressor is not None else chunk
+    if compressor is not None:
+        yield compressor.flush()
+
+
+def export_response(query: Select, fmt: str, accept_encoding: str, filename: str) -> StreamingResponse:
+    gzip = "gzip" in (accept_encoding or "").lower()
+    headers = {
+        "Content-Disposition": f'attachment; filename="{filename}.{fmt}"',
+        "Vary": "Accept-Encoding",
+    }
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(export_rows(query, fmt, gzip), media_type=FORMATS[fmt], headers=headers)
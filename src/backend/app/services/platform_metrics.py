@@ -0,0 +1,244 @@
+"""
+Securet Flow SSC - Platform Metrics
+Métricas da plataforma a partir de contadores incrementais (sem varrer tabelas a cada leitura)
+"""
+
+import logging
+import math
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import redis.asyncio as redis
+from sqlalchemy import Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import cache
+from app.models.user_stats import UserStats
+from app.services.dashboard_stats import SEVERITIES
+
+logger = logging.getLogger(__name__)
+
+METRICS_KEY = "metrics:scans"
+KINDS = ("scan", "dast")
+OUTCOMES = ("completed", "failed", "cancelled")
+# Limites superiores (segundos) dos buckets do histograma de duração
+DURATION_BUCKETS = (30.0, 60.0, 120.0, 300.0, 600.0, 900.0, 1800.0, 3600.0, 7200.0, math.inf)
+
+
+def _bucket(seconds: float) -> float:
+    return next(le for le in DURATION_BUCKETS if seconds <= le)
+
+
+def _le(bound: float) -> str:
+    return "+Inf" if math.isinf(bound) else repr(bound)
+
+
+class ScanMetrics:
+    """Contadores de scans (regulares e DAST) em um hash Redis compartilhado entre workers.
+
+    Campos: ``active:{kind}``, ``finished:{kind}:{outcome}`` e, por tipo, o
+    histograma de duração (``duration:{kind}:bucket:{le}`` não cumulativo,
+    ``duration:{kind}:sum`` e ``duration:{kind}:count``). Cada evento é um único
+    round-trip pipelinado; falhas de Redis são registradas e ignoradas.
+    """
+
+    def __init__(self, redis_client: redis.Redis, key: str = METRICS_KEY):
+        self.redis = redis_client
+        self.key = key
+
+    async def started(self, kind: str) -> None:
+        try:
+            await self.redis.hincrby(self.key, f"active:{kind}", 1)
+        except Exception as e:
+            logger.warning(f"Scan metrics update failed: {e}")
+
+    async def finished(self, kind: str, outcome: str, duration: Optional[float], active: bool = False) -> None:
+        """Registra o fim de um scan; ``active`` indica que ele foi contado em ``started``"""
+        try:
+            pipe = self.redis.pipeline(transaction=False)
+            if active:
+                pipe.hincrby(self.key, f"active:{kind}", -1)
+            pipe.hincrby(self.key, f"finished:{kind}:{outcome}", 1)
+            if duration is not None and outcome == "completed":
+                duration = max(0.0, float(duration))
+                pipe.hincrby(self.key, f"duration:{kind}:bucket:{_le(_bucket(duration))}", 1)
+                pipe.hincrbyfloat(self.key, f"duration:{kind}:sum", duration)
+                pipe.hincrby(self.key, f"duration:{kind}:count", 1)
+            await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Scan metrics update failed: {e}")
+
+    async def raw(self) -> Dict[str, str]:
+        return await self.redis.hgetall(self.key)
+
+
+def parse(raw: Dict) -> Dict:
+    """Converte o hash de contadores em valores por tipo de scan"""
+    values = {(k.decode() if isinstance(k, bytes) else k): float(v) for k, v in raw.items()}
+    stats = {}
+    for kind in KINDS:
+        buckets, cumulative = [], 0.0
+        for le in DURATION_BUCKETS:
+            cumulative += values.get(f"duration:{kind}:bucket:{_le(le)}", 0.0)
+            buckets.append((le, cumulative))
+        stats[kind] = {
+            # decrementos de workers que morreram no meio de um job não podem negativar o gauge
+            "active": max(0, int(values.get(f"active:{kind}", 0))),
+            "finished": {o: int(values.get(f"finished:{kind}:{o}", 0)) for o in OUTCOMES},
+            "duration_sum": values.get(f"duration:{kind}:sum", 0.0),
+            "duration_count": int(values.get(f"duration:{kind}:count", 0)),
+            "buckets": buckets,
+        }
+    return stats
+
+
+def quantile(q: float, buckets: List[Tuple[float, float]]) -> Optional[float]:
+    """Estimativa de quantil por interpolação linear no bucket (mesma regra do histogram_quantile)"""
+    total = buckets[-1][1] if buckets else 0
+    if not total:
+        return None
+    rank = q * total
+    lower, below = 0.0, 0.0
+    for le, count in buckets:
+        if count >= rank:
+            if math.isinf(le):
+                return lower  # acima do maior limite finito: devolve o limite
+            if count == below:
+                return le
+            return lower + (le - lower) * (rank - below) / (count - below)
+        lower, below = le, count
+    return lower
+
+
+def _merge_buckets(stats: Dict) -> List[Tuple[float, float]]:
+    return [
+        (le, sum(stats[kind]["buckets"][i][1] for kind in KINDS))
+        for i, le in enumerate(DURATION_BUCKETS)
+    ]
+
+
+def totals_query() -> Select:
+    """Totais da plataforma somando os contadores por usuário (uma linha por usuário, não por achado)"""
+    return select(
+        func.coalesce(func.sum(UserStats.total_targets), 0).label("total_targets"),
+        func.coalesce(func.sum(UserStats.active_scans), 0).label("active_scans"),
+        *[func.coalesce(func.sum(getattr(UserStats, f"vulns_{s}")), 0).label(f"vulns_{s}") for s in SEVERITIES],
+    )
+
+
+def _format_duration(seconds: Optional[float]) -> Optional[str]:
+    if seconds is None:
+        return None
+    minutes, secs = divmod(int(round(seconds)), 60)
+    return f"{minutes}m {secs}s"
+
+
+def summarize(totals, stats: Dict) -> Dict:
+    """Payload de GET /monitoring/metrics a partir dos totais e dos contadores de scans"""
+    completed = sum(stats[k]["finished"]["completed"] for k in KINDS)
+    failed = sum(stats[k]["finished"]["failed"] for k in KINDS)
+    count = sum(stats[k]["duration_count"] for k in KINDS)
+    mean = sum(stats[k]["duration_sum"] for k in KINDS) / count if count else None
+    buckets = _merge_buckets(stats)
+    vulns = {s: int(getattr(totals, f"vulns_{s}")) for s in SEVERITIES}
+    return {
+        "total_targets": int(totals.total_targets),
+        "active_scans": int(totals.active_scans) + stats["dast"]["active"],
+        "total_vulnerabilities": sum(vulns.values()),
+        "critical_vulnerabilities": vulns["critical"],
+        "vulnerabilities_by_severity": vulns,
+        # cancelados não contam como falha
+        "scan_success_rate": round(100.0 * completed / (completed + failed), 1) if completed + failed else None,
+        "average_scan_duration": _format_duration(mean),
+        "scan_duration_seconds": {
+            "mean": mean,
+            "p50": quantile(0.5, buckets),
+            "p95": quantile(0.95, buckets),
+            "p99": quantile(0.99, buckets),
+        },
+        "scans": {
+            # scans regulares ativos vêm do user_stats, como no collector Prometheus
+            "scan": {"active": int(totals.active_scans), **stats["scan"]["finished"]},
+            "dast": {"active": stats["dast"]["active"], **stats["dast"]["finished"]},
+        },
+    }
+
+
+async def snapshot(db: AsyncSession, metrics: Optional[ScanMetrics] = None) -> Dict:
+    metrics = metrics or scan_metrics
+    totals = (await db.execute(totals_query())).one()
+    return summarize(totals, parse(await metrics.raw()))
+
+
+class PlatformCollector:
+    """Collector Prometheus: lê os mesmos contadores a cada scrape (síncrono, roda no handler de /metrics)"""
+
+    def __init__(self, redis_url: str, session_factory):
+        self.redis_url = redis_url
+        self.session_factory = session_factory
+        self._redis = None
+
+    def _client(self):
+        if self._redis is None:
+            import redis as sync_redis
+            self._redis = sync_redis.from_url(self.redis_url, decode_responses=True)
+        return self._redis
+
+    def describe(self) -> Iterable:
+        return []
+
+    def collect(self) -> Iterable:
+        from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, HistogramMetricFamily
+
+        try:
+            with self.session_factory() as db:
+                totals = db.execute(totals_query()).one()
+            stats = parse(self._client().hgetall(METRICS_KEY))
+        except Exception as e:
+            logger.warning(f"Platform metrics collection failed: {e}")
+            return
+
+        yield GaugeMetricFamily("securetflow_targets", "Targets cadastrados", value=int(totals.total_targets))
+
+        vulns = GaugeMetricFamily("securetflow_vulnerabilities", "Vulnerabilidades por severidade", labels=["severity"])
+        for s in SEVERITIES:
+            vulns.add_metric([s], int(getattr(totals, f"vulns_{s}")))
+        yield vulns
+
+        active = GaugeMetricFamily("securetflow_scans_active", "Scans em execução", labels=["kind"])
+        active.add_metric(["scan"], int(totals.active_scans))
+        active.add_metric(["dast"], stats["dast"]["active"])
+        yield active
+
+        finished = CounterMetricFamily("securetflow_scans_finished", "Scans finalizados por resultado", labels=["kind", "outcome"])
+        for kind in KINDS:
+            for outcome, count in stats[kind]["finished"].items():
+                finished.add_metric([kind, outcome], count)
+        yield finished
+
+        duration = HistogramMetricFamily(
+            "securetflow_scan_duration_seconds", "Duração dos scans concluídos", labels=["kind"]
+        )
+        for kind in KINDS:
+            duration.add_metric(
+                [kind],
+                buckets=[(_le(le), count) for le, count in stats[kind]["buckets"]],
+                sum_value=stats[kind]["duration_sum"],
+            )
+        yield duration
+
+
+_collector: Optional[PlatformCollector] = None
+
+
+def register_collector(redis_url: str, session_factory) -> None:
+    """Registra o collector no registry padrão do prometheus_client (idempotente)"""
+    global _collector
+    if _collector is not None:
+        return
+    from prometheus_client import REGISTRY
+
+    _collector = PlatformCollector(redis_url, session_factory)
+    REGISTRY.register(_collector)
+
+
+scan_metrics = ScanMetrics(cache.client)
@@ -0,0 +1,120 @@
+"""
+Securet Flow SSC - Auth Throughput Benchmark
+Mede a vazão de GETs autenticados com e sem o cache de principals.
+
+Uso:
+    python -m benchmarks.bench_auth_throughput --requests 5000 --concurrency 50
+    python -m benchmarks.bench_auth_throughput --redis-url redis://localhost:6379/15
+
+Modos:
+  - db:    sem cache, um SELECT em users por requisição (comportamento antigo)
+  - redis: somente Redis (LRU desabilitado), quando --redis-url é informado
+  - lru:   LRU local na frente do Redis (caminho normal, zero I/O por requisição)
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from typing import Optional
+
+import redis.asyncio as redis
+from fastapi import Depends, FastAPI
+from httpx import AsyncClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core import auth
+from app.core.database import Base, get_async_database_url, get_db
+from app.core.principal import PrincipalCache
+from app.models import User
+
+
+def _seed(database_url: str) -> None:
+    engine = create_engine(database_url)
+    Base.metadata.create_all(bind=engine)
+    with sessionmaker(bind=engine)() as db:
+        if not db.query(User).filter(User.username == "bench").first():
+            db.add(User(username="bench", email="bench@example.com", hashed_password="x", role_id=None))
+            db.commit()
+    engine.dispose()
+
+
+def build_app(database_url: str) -> FastAPI:
+    engine = create_async_engine(get_async_database_url(database_url))
+    session_factory = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+
+    async def override_get_db():
+        async with session_factory() as db:
+            yield db
+
+    app = FastAPI()
+    app.dependency_overrides[get_db] = override_get_db
+
+    @app.get("/me")
+    async def me(current_user=Depends(auth.get_current_user)):
+        return {"id": current_user.id, "username": current_user.username}
+
+    app.state.engine = engine
+    return app
+
+
+async def run(app: FastAPI, token: str, total: int, concurrency: int) -> float:
+    headers = {"Authorization": f"Bearer {token}"}
+    sem = asyncio.Semaphore(concurrency)
+    async with AsyncClient(app=app, base_url="http://bench") as client:
+        async def one() -> None:
+            async with sem:
+                r = await client.get("/me", headers=headers)
+                r.raise_for_status()
+
+        await client.get("/me", headers=headers)  # aquecimento
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        return time.perf_counter() - start
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None, help="default: sqlite temporário")
+    parser.add_argument("--redis-url", default=None)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    tmpdir = None
+    database_url = args.database_url
+    if database_url is None:
+        tmpdir = tempfile.mkdtemp(prefix="bench_auth_")
+        database_url = f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+    _seed(database_url)
+
+    redis_client: Optional[redis.Redis] = None
+    if args.redis_url:
+        redis_client = redis.from_url(args.redis_url, decode_responses=True)
+
+    modes = [("db", PrincipalCache(None, lru_size=0))]
+    if redis_client is not None:
+        modes.append(("redis", PrincipalCache(redis_client, lru_size=0)))
+    modes.append(("lru", PrincipalCache(redis_client, lru_size=1024, lru_ttl=60)))
+
+    token = auth.create_access_token({"sub": "bench"})
+    app = build_app(database_url)
+    original = auth.principal_cache
+    try:
+        for label, cache in modes:
+            auth.principal_cache = cache
+            await cache.invalidate("bench")
+            elapsed = await run(app, token, args.requests, args.concurrency)
+            print(f"{label:<6} {args.requests} GETs em {elapsed:.2f}s -> {args.requests / elapsed:8.1f} req/s")
+    finally:
+        auth.principal_cache = original
+        await app.state.engine.dispose()
+        if redis_client is not None:
+            await redis_client.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
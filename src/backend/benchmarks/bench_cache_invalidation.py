@@ -0,0 +1,81 @@
+"""
+Securet Flow SSC - Cache Invalidation Benchmark
+Compara o custo de invalidar um namespace com SCAN+DELETE (antigo) e com troca de geração.
+
+Uso:
+    python -m benchmarks.bench_cache_invalidation --redis-url redis://localhost:6379/15
+    python -m benchmarks.bench_cache_invalidation --redis-url redis://localhost:6379/15 --sizes 100 10000 100000
+
+Para cada tamanho, o keyspace recebe N entradas de outros usuários (ruído que o
+SCAN precisa percorrer) e 50 entradas do usuário invalidado.
+"""
+
+import argparse
+import asyncio
+import time
+
+from app.core.cache import RedisCache
+
+OWN_KEYS = 50
+
+
+async def _scan_delete(cache: RedisCache, prefix: str) -> None:
+    # implementação anterior de invalidate_prefix
+    async for k in cache.client.scan_iter(prefix + "*"):
+        await cache.client.delete(k)
+
+
+async def _fill(cache: RedisCache, noise: int) -> None:
+    pipe = cache.client.pipeline(transaction=False)
+    for i in range(noise):
+        pipe.setex(f"bench:targets:{i % 1000 + 1000}:list:{i}", 300, "{}")
+        if len(pipe.command_stack) >= 5000:
+            await pipe.execute()
+    await pipe.execute()
+
+
+async def _own(cache: RedisCache, versioned: bool) -> None:
+    for i in range(OWN_KEYS):
+        key = f"bench:targets:1:list:{i}"
+        if versioned:
+            await cache.set_versioned("bench:targets:1", key, {}, ttl_seconds=300)
+        else:
+            await cache.set_json(key, {}, ttl_seconds=300)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--redis-url", required=True, help="use um banco descartável: o benchmark executa FLUSHDB")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    cache = RedisCache(args.redis_url)
+    try:
+        print(f"{'keyspace':>10} {'scan+delete':>14} {'geração':>10}")
+        for size in args.sizes:
+            await cache.client.flushdb()
+            await _fill(cache, size)
+
+            scan = 0.0
+            for _ in range(args.rounds):
+                await _own(cache, versioned=False)
+                start = time.perf_counter()
+                await _scan_delete(cache, "bench:targets:1:")
+                scan += time.perf_counter() - start
+
+            gen = 0.0
+            for _ in range(args.rounds):
+                await _own(cache, versioned=True)
+                start = time.perf_counter()
+                await cache.invalidate("bench:targets:1")
+                gen += time.perf_counter() - start
+
+            print(f"{size:>10} {scan / args.rounds * 1000:>11.2f} ms {gen / args.rounds * 1000:>7.3f} ms")
+        await cache.client.flushdb()
+    finally:
+        await cache.client.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
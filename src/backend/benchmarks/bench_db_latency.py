@@ -0,0 +1,161 @@
+"""
+Securet Flow SSC - DB Latency Benchmark
+Compara a latência concorrente (p50/p99) entre o caminho sync (SessionLocal
+dentro de handlers async) e o caminho AsyncSession/asyncpg.
+
+Uso:
+    python -m benchmarks.bench_db_latency --requests 2000 --concurrency 100
+
+Uma fração das requisições executa uma query lenta (pg_sleep no Postgres);
+as demais executam SELECT 1. No caminho sync a query lenta bloqueia o event
+loop e a latência das requisições rápidas explode; no caminho async ela não.
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from typing import Dict, List
+
+from fastapi import Depends, FastAPI
+from httpx import AsyncClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.core.database import get_async_database_url
+
+
+def _slow_statement(dialect: str, slow_ms: int):
+    if dialect == "postgresql":
+        return text("SELECT pg_sleep(:s)").bindparams(s=slow_ms / 1000)
+    # Fallback (ex.: sqlite): CTE recursiva para simular uma query cara
+    return text(
+        "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < :n) "
+        "SELECT count(*) FROM c"
+    ).bindparams(n=slow_ms * 20_000)
+
+
+def _pool_kwargs(database_url: str, pool_size: int) -> Dict[str, int]:
+    # aiosqlite usa NullPool e não aceita parâmetros de pool
+    if database_url.startswith("sqlite+aiosqlite"):
+        return {}
+    return {"pool_size": pool_size, "max_overflow": 0}
+
+
+def build_sync_app(database_url: str, slow_ms: int, pool_size: int) -> FastAPI:
+    """App no formato antigo: handler async chamando a sessão sync"""
+    engine = create_engine(database_url, **_pool_kwargs(database_url, pool_size))
+    session_factory = sessionmaker(bind=engine, autoflush=False)
+    slow = _slow_statement(engine.dialect.name, slow_ms)
+    app = FastAPI()
+
+    def get_db():
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    @app.get("/fast")
+    async def fast(db=Depends(get_db)):
+        return {"v": db.execute(text("SELECT 1")).scalar()}
+
+    @app.get("/slow")
+    async def slow_query(db=Depends(get_db)):
+        return {"v": db.execute(slow).scalar()}
+
+    app.state.engine = engine
+    return app
+
+
+def build_async_app(database_url: str, slow_ms: int, pool_size: int) -> FastAPI:
+    """App no formato novo: AsyncSession em todo o caminho"""
+    async_url = get_async_database_url(database_url)
+    engine = create_async_engine(async_url, **_pool_kwargs(async_url, pool_size))
+    session_factory = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+    slow = _slow_statement(engine.dialect.name, slow_ms)
+    app = FastAPI()
+
+    async def get_db():
+        async with session_factory() as db:
+            yield db
+
+    @app.get("/fast")
+    async def fast(db: AsyncSession = Depends(get_db)):
+        return {"v": await db.scalar(text("SELECT 1"))}
+
+    @app.get("/slow")
+    async def slow_query(db: AsyncSession = Depends(get_db)):
+        return {"v": await db.scalar(slow)}
+
+    app.state.engine = engine
+    return app
+
+
+async def run_load(app: FastAPI, total: int, concurrency: int, slow_ratio: float) -> Dict[str, List[float]]:
+    latencies: Dict[str, List[float]] = {"fast": [], "slow": []}
+    sem = asyncio.Semaphore(concurrency)
+    rng = random.Random(42)
+    paths = ["slow" if rng.random() < slow_ratio else "fast" for _ in range(total)]
+
+    async with AsyncClient(app=app, base_url="http://bench") as client:
+        async def one(kind: str) -> None:
+            async with sem:
+                start = time.perf_counter()
+                r = await client.get(f"/{kind}")
+                r.raise_for_status()
+                latencies[kind].append((time.perf_counter() - start) * 1000)
+
+        await asyncio.gather(*(one(kind) for kind in paths))
+    return latencies
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def _report(label: str, latencies: Dict[str, List[float]], elapsed: float) -> None:
+    done = sum(len(v) for v in latencies.values())
+    print(f"\n[{label}] {done} requisições em {elapsed:.2f}s ({done / elapsed:.1f} req/s)")
+    for kind, values in latencies.items():
+        if not values:
+            continue
+        print(
+            f"  {kind:<5} n={len(values):<6} "
+            f"p50={_percentile(values, 50):8.2f}ms "
+            f"p99={_percentile(values, 99):8.2f}ms "
+            f"mean={statistics.mean(values):8.2f}ms"
+        )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--slow-ratio", type=float, default=0.1)
+    parser.add_argument("--slow-ms", type=int, default=100)
+    parser.add_argument("--pool-size", type=int, default=20)
+    args = parser.parse_args()
+
+    for label, builder in (("before: sync session", build_sync_app), ("after: async session", build_async_app)):
+        app = builder(args.database_url, args.slow_ms, args.pool_size)
+        start = time.perf_counter()
+        latencies = await run_load(app, args.requests, args.concurrency, args.slow_ratio)
+        _report(label, latencies, time.perf_counter() - start)
+        engine = app.state.engine
+        if hasattr(engine, "sync_engine"):
+            await engine.dispose()
+        else:
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,174 @@
+"""
+Securet Flow SSC - Middleware Stack Benchmark
+req/s sem middleware, com a pilha anterior (4 camadas BaseHTTPMiddleware) e com o PlatformMiddleware.
+
+Uso:
+    python -m benchmarks.bench_middleware
+    python -m benchmarks.bench_middleware --requests 20000 --concurrency 50
+    python -m benchmarks.bench_middleware --redis-url redis://localhost:6379/15
+
+As requisições vão direto ao app ASGI (sem servidor HTTP). /json devolve um corpo
+pequeno; /stream devolve --chunks pedaços via StreamingResponse e mede também o
+tempo até o primeiro chunk (que a pilha anterior só entregava após re-empacotar o
+stream em tasks). Sem --redis-url o rate limiting fica desligado nas duas pilhas.
+"""
+
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+
+import redis.asyncio as redis
+from starlette.applications import Starlette
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from app.core.config import settings
+from app.core.middleware import SECURITY_HEADERS, PlatformMiddleware
+from app.core.rate_limit import Identities, RateLimiter, RouteTemplates, rule_for
+
+CHUNKS = 16
+
+
+class LegacyLogging(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        start = time.time()
+        logging.getLogger(__name__).info(f"Request: {request.method} {request.url.path} - Client: {request.client.host}")
+        response = await call_next(request)
+        duration = time.time() - start
+        logging.getLogger(__name__).info(f"Response: {response.status_code} - Duration: {duration:.3f}s")
+        response.headers["X-Response-Time"] = f"{duration:.3f}s"
+        return response
+
+
+class LegacyErrors(BaseHTTPMiddleware):
+    async def dispatch(self, request, call_next):
+        try:
+            return await call_next(request)
+        except Exception:
+            return JSONResponse(status_code=500, content={"detail": "Internal server error"})
+
+
+class LegacyRateLimit(BaseHTTPMiddleware):
+    """Mesmo RateLimiter do PlatformMiddleware, para isolar o custo das camadas"""
+
+    def __init__(self, app, redis_client=None):
+        super().__init__(app)
+        self.limiter = RateLimiter(redis_client) if redis_client else None
+        self.routes, self.identities = RouteTemplates(), Identities()
+
+    async def dispatch(self, request, call_next):
+        if self.limiter:
+            bucket, limit, window = rule_for(request.method, self.routes.resolve(request.scope))
+            identity = self.identities.resolve(request.headers.get("authorization"), request.client.host)
+            if not (await self.limiter.hit(bucket, identity, limit, window)).allowed:
+                return JSONResponse(status_code=429, content={"detail": "Rate limit exceeded"})
+        return await call_next(request)
+
+
+async def legacy_security_headers(request, call_next):
+    response = await call_next(request)
+    for name, value in SECURITY_HEADERS:
+        response.headers[name.decode()] = value.decode()
+    return response
+
+
+async def json_endpoint(request):
+    return JSONResponse({"status": "ok", "items": list(range(20))})
+
+
+async def stream_endpoint(request):
+    async def body():
+        for _ in range(CHUNKS):
+            yield b"x" * 1024
+            await asyncio.sleep(0)
+    return StreamingResponse(body(), media_type="application/octet-stream")
+
+
+def build(stack: str, client=None) -> Starlette:
+    app = Starlette(routes=[Route("/json", json_endpoint), Route("/stream", stream_endpoint)])
+    if stack == "legacy":
+        app.add_middleware(LegacyLogging)
+        app.add_middleware(LegacyErrors)
+        app.add_middleware(LegacyRateLimit, redis_client=client)
+        app.add_middleware(BaseHTTPMiddleware, dispatch=legacy_security_headers)
+    elif stack == "asgi":
+        app.add_middleware(PlatformMiddleware, redis_client=client)
+    return app
+
+
+async def request(app, path: str, start: float, first_chunk: list) -> None:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": b"", "headers": [], "client": ("10.0.0.1", 5000), "server": ("bench", 80),
+    }
+    done = asyncio.Event()
+    body_sent = False
+    got_chunk = False
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await done.wait()  # como um servidor: disconnect só depois da resposta
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal got_chunk
+        if message["type"] == "http.response.start":
+            assert message["status"] == 200, message["status"]
+        elif message["type"] == "http.response.body":
+            if not got_chunk and message.get("body"):
+                got_chunk = True
+                first_chunk.append(time.perf_counter() - start)
+            if not message.get("more_body"):
+                done.set()
+
+    await app(scope, receive, send)
+
+
+async def run(app, path: str, requests: int, concurrency: int):
+    first_chunk: list = []
+    queue = iter(range(requests))
+
+    async def worker():
+        for _ in queue:
+            await request(app, path, time.perf_counter(), first_chunk)
+
+    await request(app, path, time.perf_counter(), [])  # aquece middleware stack e caches
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return requests / (time.perf_counter() - start), statistics.median(first_chunk) * 1e6
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--redis-url", help="liga o rate limiting; use um banco descartável (FLUSHDB)")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)  # mede o pipeline, não o handler de log
+    settings.RATE_LIMIT_PER_MINUTE = 10 ** 9
+    client = redis.from_url(args.redis_url, decode_responses=True) if args.redis_url else None
+    try:
+        print(f"{args.requests} requisições, concorrência {args.concurrency}, "
+              f"rate limiting {'ligado' if client else 'desligado'}")
+        for path in ("/json", "/stream"):
+            for label, stack in (("sem middleware", "none"), ("anterior (4x BaseHTTP)", "legacy"), ("PlatformMiddleware", "asgi")):
+                if client:
+                    await client.flushdb()
+                rps, ttfb = await run(build(stack, client), path, args.requests, args.concurrency)
+                print(f"{path:<8} {label:<24} {rps:9.0f} req/s   1º chunk p50 {ttfb:8.1f} µs")
+    finally:
+        if client:
+            await client.flushdb()
+            await client.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,135 @@
+"""
+Securet Flow SSC - Rate Limit Benchmark
+Custo por requisição do rate limiting: implementação anterior vs Lua (com e sem pré-checagem local).
+
+Uso:
+    python -m benchmarks.bench_rate_limit --redis-url redis://localhost:6379/15
+    python -m benchmarks.bench_rate_limit --redis-url redis://localhost:6379/15 --requests 20000 --concurrency 50
+
+As requisições vão direto ao app ASGI (sem servidor HTTP) em /items/{id} com ids
+variados e um bearer token; o overhead é a diferença para o app sem middleware
+(no PlatformMiddleware inclui também headers de segurança e timing, alguns µs).
+O limite é alto o suficiente para nenhuma requisição ser negada.
+"""
+
+import argparse
+import asyncio
+import time
+
+import redis.asyncio as redis
+from starlette.applications import Starlette
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Route
+
+from app.core.auth import create_access_token
+from app.core.config import settings
+from app.core.middleware import PlatformMiddleware
+
+
+class LegacyRateLimitMiddleware(BaseHTTPMiddleware):
+    """Implementação anterior: GET + pipeline(INCR, EXPIRE), chave por IP e path completo"""
+
+    def __init__(self, app, redis_client):
+        super().__init__(app)
+        self.redis = redis_client
+
+    async def dispatch(self, request, call_next):
+        key = f"rate_limit:{request.client.host}:{request.url.path}"
+        current = await self.redis.get(key)
+        if current and int(current) >= settings.RATE_LIMIT_PER_MINUTE:
+            return JSONResponse(status_code=429, content={"detail": "Rate limit exceeded"})
+        pipe = self.redis.pipeline()
+        pipe.incr(key)
+        pipe.expire(key, 60)
+        await pipe.execute()
+        return await call_next(request)
+
+
+async def item(request):
+    return PlainTextResponse("ok")
+
+
+def build(middleware=None, client=None):
+    app = Starlette(routes=[Route("/items/{item_id}", item)])
+    if middleware is not None:
+        app.add_middleware(middleware, redis_client=client)
+    return app
+
+
+async def run(app, requests: int, concurrency: int, token: str) -> float:
+    headers = [(b"authorization", f"Bearer {token}".encode())]
+
+    async def one(i: int) -> None:
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "path": f"/items/{i % 1000}", "raw_path": f"/items/{i % 1000}".encode(),
+            "root_path": "", "query_string": b"", "headers": headers,
+            "client": ("10.0.0.1", 5000), "server": ("bench", 80), "app": app,
+        }
+        sent, done = [], asyncio.Event()
+        body_sent = False
+
+        async def receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": b"", "more_body": False}
+            await done.wait()  # como um servidor: disconnect só depois da resposta
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+            if message["type"] == "http.response.body" and not message.get("more_body"):
+                done.set()
+
+        await app(scope, receive, send)
+        assert sent[0]["status"] == 200
+
+    queue = iter(range(requests))
+
+    async def worker():
+        for i in queue:
+            await one(i)
+
+    await one(0)  # aquece middleware stack, script Lua e caches
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--redis-url", required=True, help="use um banco descartável: o benchmark executa FLUSHDB")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    settings.RATE_LIMIT_PER_MINUTE = 10 ** 9
+    client = redis.from_url(args.redis_url, decode_responses=True)
+    token = create_access_token({"sub": "bench"})
+    try:
+        await client.flushdb()
+        baseline = await run(build(), args.requests, args.concurrency, token)
+        results = []
+        for label, middleware, fraction in (
+            ("anterior (GET+INCR+EXPIRE)", LegacyRateLimitMiddleware, None),
+            ("lua", PlatformMiddleware, 0.0),
+            ("lua + pré-checagem local", PlatformMiddleware, 0.5),
+        ):
+            if fraction is not None:
+                settings.RATE_LIMIT_LOCAL_FRACTION = fraction
+            await client.flushdb()
+            results.append((label, await run(build(middleware, client), args.requests, args.concurrency, token)))
+
+        print(f"{args.requests} requisições, concorrência {args.concurrency}")
+        print(f"{'sem middleware':<28} {baseline:8.1f} µs/req")
+        for label, us in results:
+            print(f"{label:<28} {us:8.1f} µs/req  (overhead {us - baseline:7.1f} µs)")
+        await client.flushdb()
+    finally:
+        await client.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
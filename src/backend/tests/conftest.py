@@ -0,0 +1,39 @@
+import asyncio
+import uuid
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+
+from app.core.database import SessionLocal
+from app.main import app
+from app.models.role import Role
+from app.models.user import User
+
+
+@pytest.fixture(scope="session")
+def event_loop():
+    """Um loop para a sessão: clientes Redis e a engine async do app são globais e presos ao loop"""
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest_asyncio.fixture
+async def analyst():
+    """Cliente HTTP autenticado como um usuário novo com role analyst: (client, headers)"""
+    username = f"u{uuid.uuid4().hex[:12]}"
+    password = "Passw0rd!"
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        r = await ac.post("/api/v1/auth/register", json={
+            "username": username,
+            "email": f"{username}@example.com",
+            "password": password,
+        })
+        assert r.status_code in (200, 201)
+        with SessionLocal() as db:
+            user = db.query(User).filter(User.username == username).first()
+            user.role_id = db.query(Role).filter(Role.name == "analyst").first().id
+            db.commit()
+        r = await ac.post("/api/v1/auth/login", data={"username": username, "password": password})
+        yield ac, {"Authorization": f"Bearer {r.json()['access_token']}"}
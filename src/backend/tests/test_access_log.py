@@ -0,0 +1,73 @@
+import json
+import logging
+
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import text
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from app.core import access_log
+from app.core.database import AsyncSessionLocal
+from app.core.logging import StructuredFormatter
+from app.core.middleware import PlatformMiddleware
+
+
+class Capture(logging.Handler):
+    def __init__(self):
+        super().__init__(logging.INFO)
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture
+def captured():
+    handler = Capture()
+    logger = access_log.logger
+    previous = logger.level
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
+    yield handler.records
+    logger.removeHandler(handler)
+    logger.setLevel(previous)
+
+
+def test_sampling_keeps_errors_and_slow_requests(captured):
+    log = access_log.AccessLog(sample_rate=0, slow_ms=100)
+    assert log.level_for(200, 0.01) is None
+    assert log.level_for(200, 0.2) == logging.WARNING
+    assert log.level_for(404, 0.01) == logging.WARNING
+    assert log.level_for(503, 0.01) == logging.ERROR
+    assert access_log.AccessLog(sample_rate=1, slow_ms=100).level_for(200, 0.01) == logging.INFO
+
+
+def test_disabled_level_skips_record(captured):
+    access_log.logger.setLevel(logging.ERROR)
+    assert access_log.AccessLog(sample_rate=1).level_for(200, 0.01) is None
+    assert access_log.AccessLog(sample_rate=1).level_for(500, 0.01) == logging.ERROR
+
+
+@pytest.mark.asyncio
+async def test_one_structured_record_per_request(captured):
+    async def item(request):
+        access_log.set_user(42)
+        async with AsyncSessionLocal() as db:
+            await db.execute(text("SELECT 1"))
+            await db.execute(text("SELECT 2"))
+        return JSONResponse({"ok": True})
+
+    app = Starlette(routes=[Route("/items/{item_id}", item)])
+    app.add_middleware(PlatformMiddleware)
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        assert (await ac.get("/items/7")).status_code == 200
+
+    assert len(captured) == 1
+    record = captured[0]
+    assert (record.method, record.route, record.status, record.user_id) == ("GET", "/items/{item_id}", 200, 42)
+    assert record.db_queries == 2 and 0 < record.db_ms <= record.duration_ms
+
+    line = json.loads(StructuredFormatter().format(record))
+    assert line["route"] == "/items/{item_id}" and line["message"].startswith("GET /items/{item_id} 200 ")
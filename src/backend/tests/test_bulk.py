@@ -0,0 +1,113 @@
+import uuid
+
+import pytest
+from sqlalchemy import select
+
+from app.api.v1.endpoints import targets as targets_endpoint
+from app.core.database import AsyncSessionLocal, Base, engine
+from app.models.target import Target
+from app.models.vulnerability import Vulnerability
+from app.schemas import TargetCreate, VulnerabilityCreate
+from app.services.bulk import insert_rows, set_vulnerability_status, validate_items
+
+
+def test_validate_items_reports_errors_by_index():
+    items = [
+        {"name": "ok-1", "host": "a.test"},
+        {"name": "x", "host": "b.test"},
+        {"name": "ok-2", "host": "c.test", "port": 70000, "protocol": "gopher"},
+        {"name": "ok-3", "host": "d.test", "protocol": "https"},
+    ]
+    accepted, errors = validate_items(TargetCreate, items)
+    assert [i for i, _ in accepted] == [0, 3]
+    assert [e.index for e in errors] == [1, 2]
+    assert len(errors[1].errors) == 2 and errors[1].errors[0].startswith("port:")
+    assert accepted[1][1].protocol == "https"
+
+
+def test_validate_items_all_valid_single_pass():
+    accepted, errors = validate_items(VulnerabilityCreate, [{"title": f"v{i}", "severity": "low"} for i in range(50)])
+    assert len(accepted) == 50 and errors == []
+
+
+@pytest.mark.asyncio
+async def test_insert_rows_returns_ids_in_order_across_batches():
+    Base.metadata.create_all(bind=engine)
+    marker = uuid.uuid4().hex
+    rows = [{"name": f"{marker}-{i}", "host": f"h{i}.test", "protocol": "http"} for i in range(25)]
+    async with AsyncSessionLocal() as db:
+        ids = await insert_rows(db, Target.__table__, rows, batch_size=10)
+        await db.commit()
+        names = dict((await db.execute(select(Target.id, Target.name).where(Target.id.in_(ids)))).tuples().all())
+    assert [names[i] for i in ids] == [r["name"] for r in rows]
+
+
+@pytest.mark.asyncio
+async def test_bulk_status_transition_reports_unknown_ids():
+    Base.metadata.create_all(bind=engine)
+    async with AsyncSessionLocal() as db:
+        vulns = [Vulnerability(title="bulk", severity="high", user_id=None) for _ in range(5)]
+        db.add_all(vulns)
+        await db.commit()
+        ids = [v.id for v in vulns]
+        missing = max(ids) + 10_000
+
+        request = ids[:3] + [missing] + ids[3:] + [ids[0]]
+        owners, errors = await set_vulnerability_status(db, request, "resolved", batch_size=2)
+        await db.commit()
+
+        statuses = (await db.execute(select(Vulnerability.status).where(Vulnerability.id.in_(ids)))).scalars().all()
+    assert sorted(owners) == sorted(ids)
+    assert [(e.index, e.errors) for e in errors] == [(3, ["Vulnerability not found"])]
+    assert set(statuses) == {"resolved"}
+
+
+@pytest.mark.asyncio
+async def test_bulk_target_db_error_rolls_back_and_returns_500(analyst, monkeypatch):
+    client, headers = analyst
+
+    async def failing_insert(*args, **kwargs):
+        raise RuntimeError("db down")
+
+    monkeypatch.setattr(targets_endpoint, "insert_rows", failing_insert)
+    r = await client.post("/api/v1/targets/bulk", headers=headers, json={"items": [
+        {"name": "Bulk 1", "host": "bulk1.example.com"},
+    ]})
+    assert r.status_code == 500
+    assert r.json()["detail"] == "Internal server error"
+
+
+@pytest.mark.asyncio
+async def test_bulk_endpoints_report_invalid_items_by_index(analyst):
+    client, headers = analyst
+
+    # Importação em lote: item inválido volta em errors sem impedir os demais
+    r = await client.post("/api/v1/targets/bulk", headers=headers, json={"items": [
+        {"name": "Bulk 1", "host": "bulk1.example.com"},
+        {"name": "B", "host": "bulk2.example.com"},
+        {"name": "Bulk 3", "host": "bulk3.example.com", "protocol": "https", "port": 8443},
+    ]})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["created"] == 2 and len(body["ids"]) == 2
+    assert [e["index"] for e in body["errors"]] == [1]
+    r = await client.get("/api/v1/targets/", headers=headers)
+    assert {"bulk1.example.com", "bulk3.example.com"} <= {t["host"] for t in r.json()}
+    target_id = body["ids"][0]
+
+    # Vulnerabilidades em lote + transição de status em massa
+    r = await client.post("/api/v1/vulnerabilities/bulk", headers=headers, json={"items": [
+        {"title": "SQLi", "severity": "critical", "target_id": target_id},
+        {"title": "XSS", "severity": "urgent"},
+        {"title": "CSRF", "severity": "medium", "target_id": 10_000_000},
+    ]})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["created"] == 1
+    assert [e["index"] for e in body["errors"]] == [1, 2]
+    r = await client.post("/api/v1/vulnerabilities/bulk/status", headers=headers,
+                          json={"ids": body["ids"] + [10_000_000], "status": "resolved"})
+    assert r.status_code == 200
+    assert r.json()["updated"] == 1 and r.json()["errors"][0]["index"] == 1
+    r = await client.get(f"/api/v1/vulnerabilities/{body['ids'][0]}", headers=headers)
+    assert r.json()["status"] == "resolved"
@@ -0,0 +1,230 @@
+import asyncio
+import uuid
+
+import pytest
+import pytest_asyncio
+from prometheus_client import REGISTRY
+
+from app.core.cache import RedisCache, cached
+from app.core.serialization import RawJSON
+from app.core.config import settings
+
+
+@pytest_asyncio.fixture
+async def cache():
+    c = RedisCache(settings.REDIS_URL, generation_ttl=60)
+    yield c
+    await c.close()
+    await c.client.aclose()
+
+
+def _namespace() -> str:
+    return f"test:{uuid.uuid4().hex}"
+
+
+@pytest.mark.asyncio
+async def test_invalidate_makes_every_entry_stale_in_one_command(cache):
+    ns = _namespace()
+    for i in range(200):
+        _, gen = await cache.get_versioned(ns, f"{ns}:k{i}")
+        await cache.set_versioned(ns, f"{ns}:k{i}", {"i": i}, ttl_seconds=60, generation=gen)
+    assert (await cache.get_versioned(ns, f"{ns}:k7"))[0] == {"i": 7}
+
+    calls = []
+    original = cache.client.pipeline
+
+    def counting_pipeline(*args, **kwargs):
+        pipe = original(*args, **kwargs)
+        send = pipe.execute
+
+        async def execute(*a, **kw):
+            calls.append(len(pipe.command_stack))
+            return await send(*a, **kw)
+
+        pipe.execute = execute
+        return pipe
+
+    cache.client.pipeline = counting_pipeline
+    await cache.invalidate(ns)
+    cache.client.pipeline = original
+    assert calls == [2]  # SET da geração + PUBLISH, independente do número de chaves
+
+    for i in range(200):
+        assert (await cache.get_versioned(ns, f"{ns}:k{i}"))[0] is None
+
+
+@pytest.mark.asyncio
+async def test_write_during_computation_is_not_cached(cache):
+    ns, key = _namespace(), "value"
+    _, gen = await cache.get_versioned(ns, f"{ns}:{key}")
+    # escrita concorrente invalida enquanto o valor antigo é calculado
+    await cache.invalidate(ns)
+    await cache.set_versioned(ns, f"{ns}:{key}", "stale", ttl_seconds=60, generation=gen)
+    assert (await cache.get_versioned(ns, f"{ns}:{key}"))[0] is None
+
+
+@pytest.mark.asyncio
+async def test_expired_generation_never_revives_old_entries(cache):
+    ns = _namespace()
+    _, gen = await cache.get_versioned(ns, f"{ns}:a")
+    await cache.set_versioned(ns, f"{ns}:a", 1, ttl_seconds=60, generation=gen)
+    await cache.client.delete(cache._generation_key(ns))  # geração expirada/evictada
+
+    value, new_gen = await cache.get_versioned(ns, f"{ns}:a")
+    assert value is None
+    assert new_gen and new_gen != gen
+    await cache.set_versioned(ns, f"{ns}:a", 2, ttl_seconds=60, generation=new_gen)
+    assert (await cache.get_versioned(ns, f"{ns}:a"))[0] == 2
+
+
+@pytest.mark.asyncio
+async def test_namespaces_are_independent(cache):
+    a, b = _namespace(), _namespace()
+    for ns in (a, b):
+        _, gen = await cache.get_versioned(ns, f"{ns}:x")
+        await cache.set_versioned(ns, f"{ns}:x", ns, ttl_seconds=60, generation=gen)
+    await cache.invalidate(a)
+    assert (await cache.get_versioned(a, f"{a}:x"))[0] is None
+    assert (await cache.get_versioned(b, f"{b}:x"))[0] == b
+
+
+def _requests(name: str, result: str) -> float:
+    return REGISTRY.get_sample_value("cache_requests_total", {"cache": name, "result": result}) or 0.0
+
+
+@pytest.mark.asyncio
+async def test_cached_serves_local_then_redis_then_loader(cache):
+    ns, calls = _namespace(), []
+
+    @cached(ns, ttl=60, name=ns, backend=cache)
+    async def load(item_id: int):
+        calls.append(item_id)
+        return {"id": item_id}
+
+    assert await load(1) == {"id": 1}
+    assert await load(1) == {"id": 1}
+    assert _requests(ns, "miss") == 1 and _requests(ns, "local_hit") == 1
+
+    cache.local.clear()  # outro processo: só o Redis tem o valor
+    assert await load(1) == {"id": 1}
+    assert _requests(ns, "redis_hit") == 1
+    assert calls == [1]
+
+    await cache.invalidate(ns)
+    assert await load(1) == {"id": 1}
+    assert calls == [1, 1]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_one_loader(cache):
+    ns, calls = _namespace(), []
+    release = asyncio.Event()
+
+    @cached(ns, ttl=60, name=ns, backend=cache)
+    async def load(item_id: int):
+        calls.append(item_id)
+        await release.wait()
+        return [item_id]
+
+    waiters = [asyncio.create_task(load(7)) for _ in range(50)]
+    await asyncio.sleep(0.05)
+    release.set()
+    assert await asyncio.gather(*waiters) == [[7]] * 50
+    assert calls == [7]
+    assert _requests(ns, "coalesced") == 49
+
+
+@pytest.mark.asyncio
+async def test_cancelled_leader_hands_over_to_waiters(cache):
+    ns, calls = _namespace(), []
+
+    @cached(ns, ttl=60, name=ns, backend=cache)
+    async def load(item_id: int):
+        calls.append(item_id)
+        await asyncio.sleep(0.05)
+        return item_id
+
+    leader = asyncio.create_task(load(3))
+    await asyncio.sleep(0.01)
+    follower = asyncio.create_task(load(3))
+    await asyncio.sleep(0.01)
+    leader.cancel()
+    assert await follower == 3
+    assert calls == [3, 3]
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+
+
+@pytest.mark.asyncio
+async def test_invalidation_during_load_is_not_cached_locally(cache):
+    ns, version = _namespace(), {"v": 1}
+
+    @cached(ns, ttl=60, name=ns, backend=cache)
+    async def load():
+        value = version["v"]
+        await cache.invalidate(ns)  # escrita concorrente
+        return value
+
+    assert await load() == 1
+    version["v"] = 2
+    assert await load() == 2
+
+
+@pytest.mark.asyncio
+async def test_entry_near_expiry_is_refreshed_early(cache, monkeypatch):
+    ns, calls = _namespace(), []
+
+    @cached(ns, ttl=60, name=ns, lru=False, backend=cache)
+    async def load():
+        calls.append(1)
+        return len(calls)
+
+    assert await load() == 1
+    # simula uma entrada cara (10s de cálculo) a 5s de expirar
+    key = cache._make_key(f"{ns}:{ns}")
+    entry, generation = await cache._read(ns, key)
+    await cache.set_versioned(ns, key, entry["v"], ttl_seconds=5, generation=generation, compute_seconds=10.0)
+    monkeypatch.setattr("app.core.cache.random.random", lambda: 0.5)
+
+    assert await load() == 2
+    assert _requests(ns, "early_refresh") == 1
+    cache.early_refresh_beta = 0
+    assert await load() == 2
+
+
+@pytest.mark.asyncio
+async def test_large_payloads_are_compressed_and_round_trip(cache):
+    ns = _namespace()
+    cache.compress_min = 1024
+    raw = RawJSON(b"[" + b",".join(b'{"host":"h%d.example.com"}' % i for i in range(500)) + b"]", {"X-Next-Cursor": "abc"})
+    _, gen = await cache.get_versioned(ns, f"{ns}:page")
+    await cache.set_versioned(ns, f"{ns}:page", raw, ttl_seconds=60, generation=gen)
+    await cache.set_versioned(ns, f"{ns}:small", {"a": 1}, ttl_seconds=60, generation=gen)
+
+    assert len(await cache.binary.get(f"{ns}:page")) < len(raw.body) / 4
+    assert (await cache.get_versioned(ns, f"{ns}:page"))[0] == raw
+    assert (await cache.get_versioned(ns, f"{ns}:small"))[0] == {"a": 1}
+
+
+@pytest.mark.asyncio
+async def test_target_update_invalidates_cached_reads(analyst):
+    client, headers = analyst
+    r = await client.post("/api/v1/targets/", headers=headers, json={
+        "name": "Site", "host": "cached.example.com", "protocol": "https", "port": 443,
+    })
+    assert r.status_code in (200, 201)
+    target_id = r.json()["id"]
+
+    # Detalhe é cacheado e a edição invalida o cache do usuário
+    for _ in range(2):
+        r = await client.get(f"/api/v1/targets/{target_id}", headers=headers)
+        assert r.status_code == 200
+        assert r.json()["name"] == "Site"
+    r = await client.get("/api/v1/targets/", headers=headers)
+    assert any(t["name"] == "Site" for t in r.json())
+    r = await client.put(f"/api/v1/targets/{target_id}", headers=headers, json={"name": "Site 2"})
+    assert r.status_code == 200
+    r = await client.get(f"/api/v1/targets/{target_id}", headers=headers)
+    assert r.json()["name"] == "Site 2"
+    r = await client.get("/api/v1/targets/", headers=headers)
+    assert any(t["name"] == "Site 2" for t in r.json())
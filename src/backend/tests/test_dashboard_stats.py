@@ -0,0 +1,101 @@
+import uuid
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import delete, event, update
+
+from app.core.cache import cache
+from app.core.database import AsyncSessionLocal, async_engine
+from app.models import Scan, Target, User
+from app.models.vulnerability import Vulnerability
+from app.services import dashboard_stats
+from app.services.cached_queries import DASHBOARD
+
+
+@pytest_asyncio.fixture(autouse=True)
+async def _release_cache():
+    yield
+    # o cliente do cache é global: as conexões ficam presas ao loop de cada teste
+    await cache.close()
+
+
+async def _seed_user() -> int:
+    name = uuid.uuid4().hex[:12]
+    async with AsyncSessionLocal() as db:
+        user = User(username=name, email=f"{name}@dash.test", hashed_password="x")
+        db.add(user)
+        await db.flush()
+        targets = [Target(name=f"t{i}", host=f"h{i}.test", user_id=user.id) for i in range(3)]
+        db.add_all(targets)
+        await db.flush()
+        for i, status in enumerate(["running", "completed", "completed", "pending", "failed"]):
+            db.add(Scan(name=f"s{i}", scan_type="web", status=status, user_id=user.id, target_id=targets[0].id))
+        for i, severity in enumerate(["critical", "high", "high", "medium", "low", "low", "low"]):
+            db.add(Vulnerability(title=f"v{i}", severity=severity, user_id=user.id, target_id=targets[1].id))
+        await db.commit()
+        return user.id
+
+
+async def _both(user_id: int):
+    async with AsyncSessionLocal() as db:
+        aggregate = await dashboard_stats.compute_stats(db, user_id, use_counters=False)
+        counters = await dashboard_stats.compute_stats(db, user_id, use_counters=True)
+    return aggregate, counters
+
+
+@pytest.mark.asyncio
+async def test_stats_are_one_query_and_counters_agree():
+    uid = await _seed_user()
+
+    statements = []
+    listener = lambda *args: statements.append(args[2])  # noqa: E731
+    event.listen(async_engine.sync_engine, "before_cursor_execute", listener)
+    try:
+        async with AsyncSessionLocal() as db:
+            stats = await dashboard_stats.compute_stats(db, uid, use_counters=False)
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", listener)
+    assert len(statements) == 2  # contagens + scans recentes
+
+    assert stats["totalScans"] == 5
+    assert stats["activeScans"] == 1
+    assert stats["completedScans"] == 2
+    assert stats["totalTargets"] == 3
+    assert stats["vulnerabilities"] == {"critical": 1, "high": 2, "medium": 1, "low": 3}
+    assert len(stats["recentScans"]) == 5
+
+    aggregate, counters = await _both(uid)
+    assert aggregate == counters
+
+
+@pytest.mark.asyncio
+async def test_counters_follow_updates_and_deletes():
+    uid = await _seed_user()
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(Scan).where(Scan.user_id == uid, Scan.status == "running").values(status="completed"))
+        await db.execute(update(Vulnerability).where(Vulnerability.user_id == uid, Vulnerability.severity == "low").values(severity="critical"))
+        # reescrever a mesma severidade não altera contadores
+        await db.execute(update(Vulnerability).where(Vulnerability.user_id == uid).values(severity=Vulnerability.severity))
+        await db.execute(delete(Vulnerability).where(Vulnerability.user_id == uid, Vulnerability.severity == "high"))
+        await db.execute(delete(Scan).where(Scan.user_id == uid, Scan.status == "failed"))
+        await db.commit()
+
+    aggregate, counters = await _both(uid)
+    assert aggregate == counters
+    assert counters["activeScans"] == 0
+    assert counters["completedScans"] == 3
+    assert counters["totalScans"] == 4
+    assert counters["vulnerabilities"] == {"critical": 4, "high": 0, "medium": 1, "low": 0}
+
+
+@pytest.mark.asyncio
+async def test_cached_stats_until_invalidated():
+    uid = await _seed_user()
+    async with AsyncSessionLocal() as db:
+        first = await dashboard_stats.get_stats(db, uid)
+        db.add(Target(name="late", host="late.test", user_id=uid))
+        await db.commit()
+
+        assert (await dashboard_stats.get_stats(db, uid))["totalTargets"] == first["totalTargets"]
+        await cache.invalidate(DASHBOARD.format(user_id=uid))
+        assert (await dashboard_stats.get_stats(db, uid))["totalTargets"] == first["totalTargets"] + 1
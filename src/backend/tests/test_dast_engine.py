@@ -0,0 +1,159 @@
+import asyncio
+import json
+import os
+import sys
+import textwrap
+
+import pytest
+
+from app.services.dast_engine import (
+    DASTEngine,
+    DASTQueueFull,
+    DASTToolError,
+    ToolRunner,
+    parse_line,
+)
+
+# Ferramenta falsa no formato Nuclei: estatísticas JSON + achados JSONL
+FAKE_NUCLEI = textwrap.dedent(
+    """
+    import json, sys, time
+    target = sys.argv[1]
+    for pct in (25, 50, 75):
+        print(json.dumps({"percent": str(pct), "requests": "10"}), flush=True)
+        time.sleep(0.01)
+    print(json.dumps({
+        "template-id": "xss-reflected",
+        "info": {"name": "XSS Refletido", "severity": "high",
+                 "classification": {"cve-id": ["cve-2021-1234"]}},
+        "matched-at": target + "/search?q=1",
+    }), flush=True)
+    print("[INF] scan finished 100%", flush=True)
+    """
+)
+
+# Ferramenta que grava o PID e dorme: usada para validar o cancelamento
+FAKE_HANG = textwrap.dedent(
+    """
+    import os, subprocess, sys, time
+    child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+    with open(sys.argv[1], "w") as f:
+        f.write(f"{os.getpid()} {child.pid}")
+    print("10%", flush=True)
+    time.sleep(60)
+    """
+)
+
+
+def _script(tmp_path, name, body):
+    path = tmp_path / name
+    path.write_text(body)
+    return f"{sys.executable} {path}"
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    # Processo zumbi ainda responde a kill(0); checa o estado no /proc
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().split()[2] != "Z"
+    except FileNotFoundError:
+        return False
+
+
+def test_parse_line_variants():
+    assert parse_line('{"percent": "40"}') == ("progress", 40)
+    assert parse_line("Active scan progress: 73%") == ("progress", 73)
+    kind, finding = parse_line(json.dumps({"alert": "SQL Injection", "riskdesc": "High (Medium)", "pluginId": "40018", "url": "http://x"}))
+    assert kind == "finding" and finding["severity"] == "high" and finding["tool"] == "zap"
+    assert parse_line("just a log line") is None
+
+
+@pytest.mark.asyncio
+async def test_runner_streams_progress_and_findings(tmp_path):
+    runner = ToolRunner("nuclei", _script(tmp_path, "nuclei.py", FAKE_NUCLEI) + " {target}")
+    progress, findings = [], []
+    rc = await runner.run("http://example.test", progress.append, findings.append)
+    assert rc == 0
+    assert progress == [25, 50, 75, 100]
+    assert findings[0]["severity"] == "high"
+    assert findings[0]["cve"] == "CVE-2021-1234"
+    assert findings[0]["url"] == "http://example.test/search?q=1"
+
+
+@pytest.mark.asyncio
+async def test_runner_reports_missing_binary_and_exit_code(tmp_path):
+    with pytest.raises(DASTToolError):
+        await ToolRunner("zap", "/nonexistent/zap.sh {target}").run("http://x")
+    failing = _script(tmp_path, "fail.py", "import sys; sys.exit(3)")
+    with pytest.raises(DASTToolError):
+        await ToolRunner("zap", failing).run("http://x")
+
+
+@pytest.mark.asyncio
+async def test_cancel_kills_tool_process_group(tmp_path):
+    pidfile = tmp_path / "pids"
+    runner = ToolRunner("zap", _script(tmp_path, "hang.py", FAKE_HANG) + f" {pidfile}", kill_grace=1)
+    task = asyncio.create_task(runner.run("http://x"))
+    for _ in range(200):
+        if pidfile.exists() and pidfile.read_text():
+            break
+        await asyncio.sleep(0.02)
+    tool_pid, child_pid = map(int, pidfile.read_text().split())
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    await asyncio.sleep(0.1)
+    assert not _alive(tool_pid)
+    assert not _alive(child_pid)
+
+
+@pytest.mark.asyncio
+async def test_engine_enforces_global_and_per_target_limits():
+    engine = DASTEngine(max_concurrency=2, max_per_target=1, max_queue=100)
+    active = {"global": 0, "peak": 0}
+    per_target = {}
+    per_target_peak = {}
+
+    def make_job(host):
+        async def job():
+            active["global"] += 1
+            per_target[host] = per_target.get(host, 0) + 1
+            active["peak"] = max(active["peak"], active["global"])
+            per_target_peak[host] = max(per_target_peak.get(host, 0), per_target[host])
+            await asyncio.sleep(0.01)
+            per_target[host] -= 1
+            active["global"] -= 1
+        return job
+
+    tasks = [
+        engine.submit(f"job-{i}", f"http://host{i % 3}.test/app", make_job(f"host{i % 3}"))
+        for i in range(12)
+    ]
+    await asyncio.gather(*tasks)
+    assert active["peak"] == 2
+    assert all(peak == 1 for peak in per_target_peak.values())
+    assert engine.stats()["running"] == 0 and engine.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_engine_rejects_when_queue_full_and_cancels_pending():
+    engine = DASTEngine(max_concurrency=1, max_per_target=1, max_queue=2)
+    gate = asyncio.Event()
+
+    async def blocked():
+        await gate.wait()
+
+    engine.submit("a", "http://h.test", blocked)
+    engine.submit("b", "http://h.test", blocked)
+    await asyncio.sleep(0)
+    engine.submit("c", "http://h.test", blocked)
+    with pytest.raises(DASTQueueFull):
+        engine.submit("d", "http://h.test", blocked)
+    assert await engine.cancel("c") is True
+    gate.set()
+    await asyncio.sleep(0.05)
+    assert engine.pending == 0
@@ -0,0 +1,81 @@
+import asyncio
+import uuid
+
+import pytest
+import pytest_asyncio
+import redis.asyncio as redis
+
+from app.core.config import settings
+from app.services.dast_events import DASTEventHub
+from app.services.dast_service import DASTService
+from app.services.dast_store import DASTJobStore
+
+
+@pytest_asyncio.fixture
+async def service():
+    client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+    svc = DASTService()
+    svc.store = DASTJobStore(client, ttl=60)
+    svc.events = DASTEventHub(client)
+    yield svc
+    await client.aclose()
+
+
+def _owner() -> str:
+    return f"owner-{uuid.uuid4().hex}"
+
+
+@pytest.mark.asyncio
+async def test_hub_fans_out_to_job_and_user_subscribers(service):
+    store, owner = service.store, _owner()
+    job_a, job_b = str(uuid.uuid4()), str(uuid.uuid4())
+    await store.create(job_a, owner, "http://a.test", "zap")
+    await store.create(job_b, owner, "http://b.test", "zap")
+
+    async with service.events.subscribe(owner) as everything, service.events.subscribe(owner, job_a) as only_a:
+        await store.transition(job_b, "running")
+        await store.record(job_a, progress=30, findings=[{"severity": "low"}], owner_id=owner)
+        await store.transition(job_a, "failed", error="boom")
+
+        seen = [await everything.get(timeout=2) for _ in range(3)]
+        assert [(e["job_id"], e["type"]) for e in seen] == [
+            (job_b, "status"), (job_a, "update"), (job_a, "status"),
+        ]
+        update = await only_a.get(timeout=2)
+        assert update["progress"] == 30 and update["findings"] == [{"severity": "low"}]
+        final = await only_a.get(timeout=2)
+        assert final["status"] == "failed" and final["error"] == "boom"
+        assert await only_a.get(timeout=0.1) is None
+
+    # Sem assinantes locais a conexão pub/sub é liberada
+    assert service.events._pubsub is None and not service.events._subs
+
+
+@pytest.mark.asyncio
+async def test_job_stream_ends_on_terminal_status(service):
+    store, owner = service.store, _owner()
+    job_id = str(uuid.uuid4())
+    await store.create(job_id, owner, "http://a.test", "nuclei")
+    await store.transition(job_id, "running")
+
+    events = []
+
+    async def consume():
+        async for event in service.stream(owner, job_id, keepalive=0.05):
+            events.append(event)
+
+    consumer = asyncio.create_task(consume())
+    while not events:
+        await asyncio.sleep(0.01)
+    await store.record(job_id, progress=80, owner_id=owner)
+    await store.transition(job_id, "completed", progress=100)
+    await asyncio.wait_for(consumer, timeout=2)
+
+    typed = [e for e in events if e is not None]
+    assert typed[0]["type"] == "snapshot" and typed[0]["job"]["status"] == "running"
+    assert typed[1]["type"] == "update" and typed[1]["progress"] == 80
+    assert typed[-1] == {"type": "status", "job_id": job_id, "status": "completed", "progress": 100}
+
+    # Job já finalizado: apenas o snapshot
+    finished = [e async for e in service.stream(owner, job_id)]
+    assert len(finished) == 1 and finished[0]["job"]["status"] == "completed"
@@ -0,0 +1,65 @@
+import uuid
+
+import pytest
+from sqlalchemy import func, select
+
+from app.core.database import AsyncSessionLocal, Base, engine
+from app.models.scan import Scan, ScanResult
+from app.models.vulnerability import Vulnerability
+from app.services.dast_ingest import finding_rows, fingerprint, ingest_job
+
+
+def _findings(target: str, n: int):
+    return [
+        {
+            "id": f"t-{i}",
+            "severity": ("critical", "high", "medium", "low", "info")[i % 5],
+            "title": f"Finding {i}",
+            "url": f"{target}/p/{i}",
+            "cve": f"cve-2024-{i:04d}" if i % 3 == 0 else None,
+            "description": "v1",
+            "tool": "nuclei",
+        }
+        for i in range(n)
+    ]
+
+
+def test_fingerprint_is_stable_and_scoped():
+    a = fingerprint(1, "http://x", "XSS", "http://x/a", "cve-2024-1")
+    assert a == fingerprint(1, "http://x", "XSS", "http://x/a", "CVE-2024-1")
+    assert a != fingerprint(2, "http://x", "XSS", "http://x/a", "CVE-2024-1")
+    assert a != fingerprint(1, "http://x", "XSS", "http://x/b", "CVE-2024-1")
+
+
+def test_finding_rows_skips_info_and_dedups_batch():
+    findings = _findings("http://x", 10)
+    rows = finding_rows(findings + findings[:3], owner_id=1, target_url="http://x")
+    assert len(rows) == 8  # 2 achados "info" descartados, repetidos colapsados
+    assert {r["severity"] for r in rows} == {"critical", "high", "medium", "low"}
+
+
+@pytest.mark.asyncio
+async def test_rescan_updates_instead_of_duplicating():
+    Base.metadata.create_all(bind=engine)
+    target = f"http://{uuid.uuid4().hex}.test"
+    findings = _findings(target, 50)
+
+    async with AsyncSessionLocal() as db:
+        first = await ingest_job(db, "job-1", None, target, "nuclei", findings, batch_size=7)
+    assert first["vulnerabilities"] == 40
+
+    for f in findings:
+        f["description"] = "v2"
+    async with AsyncSessionLocal() as db:
+        await ingest_job(db, "job-2", None, target, "nuclei", findings, batch_size=7)
+
+    async with AsyncSessionLocal() as db:
+        where = Vulnerability.url.like(f"{target}/%")
+        count = await db.scalar(select(func.count()).select_from(Vulnerability).where(where))
+        descriptions = set((await db.execute(select(Vulnerability.description).where(where))).scalars())
+        results = await db.scalar(
+            select(func.count()).select_from(ScanResult).join(Scan).where(Scan.id == first["scan_id"])
+        )
+    assert count == 40
+    assert descriptions == {"v2"}
+    assert results == 1
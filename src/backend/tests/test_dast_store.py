@@ -0,0 +1,117 @@
+import asyncio
+import sys
+import textwrap
+import uuid
+
+import pytest
+import pytest_asyncio
+import redis.asyncio as redis
+
+from app.core.cache import cache
+from app.core.config import settings
+from app.services.dast_service import DASTService, execute_job
+from app.services.dast_events import DASTEventHub
+from app.services.dast_store import DASTJobStore
+
+FAKE_NUCLEI = textwrap.dedent(
+    """
+    import json, sys
+    print(json.dumps({"percent": "50"}), flush=True)
+    for sev in ("high", "low"):
+        print(json.dumps({"template-id": "t-" + sev, "info": {"name": sev, "severity": sev},
+                          "matched-at": sys.argv[1]}), flush=True)
+    """
+)
+
+
+@pytest_asyncio.fixture
+async def store():
+    client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+    yield DASTJobStore(client, ttl=60)
+    await client.aclose()
+    # execute_job invalida o cache do dashboard pelo cliente global, preso ao loop deste teste
+    await cache.close()
+
+
+def _job_id() -> str:
+    return str(uuid.uuid4())
+
+
+@pytest.mark.asyncio
+async def test_terminal_status_is_not_overwritten(store):
+    job_id = _job_id()
+    await store.create(job_id, 1, "http://x.test", "zap")
+    assert await store.transition(job_id, "running")
+    await store.record(job_id, progress=40, findings=[{"severity": "high", "title": "a"}])
+    assert await store.request_cancel(job_id)
+    # O runner terminando depois do cancelamento não sobrescreve o estado
+    assert not await store.transition(job_id, "completed")
+    assert not await store.transition(_job_id(), "running")
+
+    data = await store.get(job_id)
+    assert data["status"] == "cancelled"
+    assert data["progress"] == 40
+    assert data["result"]["summary"]["high"] == 1
+    assert data["result"]["findings"] == [{"severity": "high", "title": "a"}]
+    assert 0 < await store.redis.ttl(store._job_key(job_id)) <= 60
+
+
+@pytest.mark.asyncio
+async def test_user_index_lists_newest_first_and_drops_expired(store):
+    owner = f"owner-{uuid.uuid4().hex}"
+    ids = [_job_id() for _ in range(3)]
+    for i, job_id in enumerate(ids):
+        await store.create(job_id, owner, f"http://h{i}.test", "nuclei")
+    # Mesmo segundo de criação: fixa a ordem explicitamente
+    now = await store.redis.zscore(store._user_key(owner), ids[0])
+    await store.redis.zadd(store._user_key(owner), {job_id: now + i for i, job_id in enumerate(ids)})
+    await store.redis.delete(store._job_key(ids[0]))
+
+    total, items = await store.list_for_user(owner, skip=0, limit=10)
+    assert total == 2
+    assert [item["id"] for item in items] == [ids[2], ids[1]]
+    assert "result" not in items[0]
+    assert await store.redis.zcard(store._user_key(owner)) == 2
+
+
+@pytest.mark.asyncio
+async def test_execute_job_state_is_visible_from_another_client(store, tmp_path, monkeypatch):
+    script = tmp_path / "nuclei.py"
+    script.write_text(FAKE_NUCLEI)
+    monkeypatch.setattr(settings, "DAST_NUCLEI_CMD", f"{sys.executable} {script} {{target}}")
+
+    job_id = _job_id()
+    await store.create(job_id, 7, "http://x.test", "nuclei")
+    assert await execute_job(store, job_id, "http://x.test", "nuclei") == "completed"
+
+    # Outro worker: cliente Redis independente
+    other = redis.from_url(settings.REDIS_URL, decode_responses=True)
+    try:
+        data = await DASTJobStore(other).get(job_id)
+    finally:
+        await other.aclose()
+    assert data["status"] == "completed" and data["progress"] == 100
+    assert data["result"]["summary"]["high"] == 1 and data["result"]["summary"]["low"] == 1
+    assert len(data["result"]["findings"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_cancel_flag_stops_job_running_elsewhere(store, tmp_path, monkeypatch):
+    script = tmp_path / "hang.py"
+    script.write_text("import time\nprint('5%', flush=True)\ntime.sleep(60)\n")
+    monkeypatch.setattr(settings, "DAST_ZAP_CMD", f"{sys.executable} {script}")
+    monkeypatch.setattr(settings, "DAST_KILL_GRACE_SECONDS", 1)
+
+    service = DASTService()
+    service.store = store
+    service.events = DASTEventHub(store.redis)
+    job_id = _job_id()
+    await store.create(job_id, 3, "http://x.test", "zap")
+    task = asyncio.create_task(service._run(job_id, "http://x.test", "zap"))
+    await asyncio.sleep(0.2)
+
+    # Cancelamento pedido por outro worker: só o evento publicado no Redis, sem polling
+    assert await store.request_cancel(job_id)
+    with pytest.raises(asyncio.CancelledError):
+        await asyncio.wait_for(task, timeout=5)
+    assert (await store.get(job_id))["status"] == "cancelled"
@@ -0,0 +1,94 @@
+import csv
+import gzip
+import io
+import json
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from httpx import AsyncClient
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, Base, engine
+from app.main import app
+from app.models.vulnerability import Vulnerability
+from app.services.cached_queries import vulnerability_query
+from app.services.export import export_rows
+
+
+async def _seed(n: int) -> str:
+    Base.metadata.create_all(bind=engine)
+    marker = f"export-{uuid.uuid4().hex}"
+    base = datetime(2032, 1, 1)
+    async with AsyncSessionLocal() as db:
+        db.add_all([
+            Vulnerability(title=marker, severity="high" if i % 2 else "low", cvss=5.5,
+                          url=f"=HYPERLINK(\"https://evil/{i}\")", references=["r"],
+                          created_at=base + timedelta(seconds=i))
+            for i in range(n)
+        ])
+        await db.commit()
+    return marker
+
+
+def _query(marker: str, severity=None):
+    return (
+        vulnerability_query(severity=severity)
+        .where(Vulnerability.title == marker)
+        .order_by(Vulnerability.created_at, Vulnerability.id)
+    )
+
+
+async def _collect(query, fmt, gzip_=False):
+    return [chunk async for chunk in export_rows(query, fmt, gzip_)]
+
+
+@pytest.mark.asyncio
+async def test_ndjson_streams_in_chunks_with_filters(monkeypatch):
+    marker = await _seed(7)
+    monkeypatch.setattr(settings, "EXPORT_CHUNK_ROWS", 2)
+
+    chunks = await _collect(_query(marker, severity="high"), "ndjson")
+    assert len(chunks) == 2  # 3 linhas "high" em partições de 2
+    rows = [json.loads(line) for line in b"".join(chunks).splitlines()]
+    assert [r["severity"] for r in rows] == ["high"] * 3
+    assert rows[0]["references"] == ["r"] and rows[0]["created_at"] == "2032-01-01T00:00:01"
+    assert rows == sorted(rows, key=lambda r: r["created_at"])
+
+
+@pytest.mark.asyncio
+async def test_gzip_output_matches_plain_and_csv_is_neutralized(monkeypatch):
+    marker = await _seed(5)
+    monkeypatch.setattr(settings, "EXPORT_CHUNK_ROWS", 2)
+
+    plain = b"".join(await _collect(_query(marker), "csv"))
+    compressed = await _collect(_query(marker), "csv", gzip_=True)
+    assert gzip.decompress(b"".join(compressed)) == plain
+
+    rows = list(csv.DictReader(io.StringIO(plain.decode())))
+    assert len(rows) == 5
+    assert rows[0]["url"].startswith("'=HYPERLINK")
+    assert rows[0]["cvss"] == "5.5" and rows[0]["references"] == '["r"]'
+
+
+@pytest.mark.asyncio
+async def test_empty_csv_export_still_has_header():
+    body = b"".join(await _collect(_query(f"none-{uuid.uuid4().hex}"), "csv"))
+    assert body.decode().startswith("title,description,severity")
+
+
+@pytest.mark.asyncio
+async def test_export_requires_auth():
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        r = await ac.get("/api/v1/vulnerabilities/export")
+        assert r.status_code in (401, 403)
+
+
+@pytest.mark.asyncio
+async def test_export_endpoint_streams_gzip_csv(analyst):
+    client, headers = analyst
+    # gzip negociado pelo Accept-Encoding do httpx
+    r = await client.get("/api/v1/vulnerabilities/export?format=csv", headers=headers)
+    assert r.status_code == 200
+    assert r.headers["content-encoding"] == "gzip"
+    assert r.text.startswith("title,")
@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+from starlette.applications import Starlette
+from starlette.responses import StreamingResponse
+from starlette.routing import Route
+
+from app.core.middleware import PlatformMiddleware
+from app.main import app
+
+
+def _app(routes):
+    test_app = Starlette(routes=routes)
+    test_app.add_middleware(PlatformMiddleware)
+    return test_app
+
+
+@pytest.mark.asyncio
+async def test_security_and_timing_headers_on_api_responses():
+    async with AsyncClient(app=app, base_url="http://test") as ac:
+        r = await ac.get("/health")
+    assert r.status_code == 200
+    assert r.headers["x-content-type-options"] == "nosniff"
+    assert r.headers["x-frame-options"] == "DENY"
+    assert "frame-ancestors 'none'" in r.headers["content-security-policy"]
+    assert r.headers["x-response-time"].endswith("s")
+    # uma única camada: nenhum header duplicado
+    assert len(r.headers.get_list("x-frame-options")) == 1
+
+
+@pytest.mark.asyncio
+async def test_unhandled_error_mapped_to_500_with_headers():
+    async def boom(request):
+        raise RuntimeError("boom")
+
+    async with AsyncClient(app=_app([Route("/boom", boom)]), base_url="http://test") as ac:
+        r = await ac.get("/boom")
+    assert r.status_code == 500
+    assert r.json()["detail"] == "Internal server error"
+    assert r.headers["x-content-type-options"] == "nosniff"
+
+
+@pytest.mark.asyncio
+async def test_streaming_chunks_pass_through_before_body_ends():
+    release = asyncio.Event()
+
+    async def stream(request):
+        async def body():
+            yield b"first"
+            await release.wait()
+            yield b"second"
+        return StreamingResponse(body())
+
+    test_app = _app([Route("/stream", stream)])
+    sent = []
+    first_chunk = asyncio.Event()
+
+    async def receive():
+        await asyncio.Event().wait()
+
+    async def send(message):
+        sent.append(message)
+        if message.get("body") == b"first":
+            first_chunk.set()
+
+    scope = {"type": "http", "method": "GET", "path": "/stream", "root_path": "", "query_string": b"",
+             "headers": [], "client": ("10.0.0.1", 1), "server": ("test", 80), "scheme": "http"}
+    task = asyncio.create_task(test_app(scope, receive, send))
+    await asyncio.wait_for(first_chunk.wait(), 1)
+    assert not task.done()
+    assert sent[0]["status"] == 200 and (b"x-frame-options", b"DENY") in sent[0]["headers"]
+    release.set()
+    await asyncio.wait_for(task, 1)
+    assert [m.get("body") for m in sent[1:] if m.get("body")] == [b"first", b"second"]
+
+
+@pytest.mark.asyncio
+async def test_non_http_scopes_pass_through():
+    seen = []
+
+    async def inner(scope, receive, send):
+        seen.append(scope["type"])
+
+    await PlatformMiddleware(inner)({"type": "lifespan"}, None, None)
+    assert seen == ["lifespan"]
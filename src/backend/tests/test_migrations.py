@@ -0,0 +1,40 @@
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine, text
+
+from app.core.database import Base, run_migrations
+import app.models  # noqa: F401
+from app.models import vulnerability as _vulnerability  # noqa: F401
+
+
+def test_migrations_match_models(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrations.db'}")
+    run_migrations(engine)
+    with engine.connect() as conn:
+        diff = compare_metadata(MigrationContext.configure(conn, opts={"compare_type": True}), Base.metadata)
+    engine.dispose()
+    # Qualquer diferença aqui exige uma nova revisão em alembic/versions
+    assert diff == []
+
+
+def test_user_stats_backfill_counts_existing_rows(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'backfill.db'}")
+    run_migrations(engine, revision="0003")
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO users (id, username, email, hashed_password) VALUES (1, 'u', 'u@x', 'x')"))
+        conn.execute(text("INSERT INTO targets (id, name, host, user_id) VALUES (1, 't', 'h', 1), (2, 't2', 'h2', 1)"))
+        conn.execute(text(
+            "INSERT INTO scans (name, scan_type, status, user_id, target_id) "
+            "VALUES ('a', 'web', 'running', 1, 1), ('b', 'web', 'completed', 1, 1)"
+        ))
+        conn.execute(text(
+            "INSERT INTO vulnerabilities (title, severity, user_id) VALUES ('x', 'high', 1), ('y', 'high', 1), ('z', 'low', 1)"
+        ))
+    run_migrations(engine)
+    with engine.connect() as conn:
+        row = conn.execute(text("SELECT * FROM user_stats WHERE user_id = 1")).mappings().one()
+    engine.dispose()
+    assert dict(row) == {
+        "user_id": 1, "total_scans": 2, "active_scans": 1, "completed_scans": 1, "total_targets": 2,
+        "vulns_critical": 0, "vulns_high": 2, "vulns_medium": 0, "vulns_low": 1,
+    }
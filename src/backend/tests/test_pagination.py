@@ -0,0 +1,104 @@
+import json
+import uuid
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException, Response
+from sqlalchemy import select
+
+from app.core.database import AsyncSessionLocal, Base, engine
+from app.core.pagination import (
+    NEXT_CURSOR_HEADER, decode_cursor, encode_cursor, fetch_page, fetch_page_payload, fetch_rows_payload, select_schema,
+)
+from app.models import Scan, Target, User
+from app.models.vulnerability import Vulnerability
+from app.schemas import ScanResponse, VulnerabilityResponse
+
+
+def test_cursor_roundtrip_and_invalid():
+    ts = datetime(2025, 3, 1, 10, 30, 15, 123456)
+    assert decode_cursor(encode_cursor(ts, 42)) == (ts, 42)
+    assert decode_cursor(None) is None
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor("not-a-cursor")
+    assert exc.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_keyset_walk_matches_offset_order():
+    Base.metadata.create_all(bind=engine)
+    marker = f"page-{uuid.uuid4().hex}"
+    base = datetime(2030, 1, 1)
+    async with AsyncSessionLocal() as db:
+        # Timestamps repetidos: o desempate por id precisa manter a ordem estável
+        db.add_all([
+            Vulnerability(title=marker, severity="low", created_at=base + timedelta(seconds=i // 3))
+            for i in range(23)
+        ])
+        await db.commit()
+
+        query = select(Vulnerability).where(Vulnerability.title == marker)
+        offset_ids = [v.id for v in await fetch_page(db, query, Vulnerability, limit=100)]
+
+        walked, after = [], None
+        while True:
+            response = Response()
+            page = await fetch_page(db, query, Vulnerability, limit=5, after=after, response=response)
+            walked.extend(v.id for v in page)
+            cursor = response.headers.get(NEXT_CURSOR_HEADER)
+            if not cursor:
+                break
+            after = decode_cursor(cursor)
+
+    assert len(offset_ids) == 23
+    assert walked == offset_ids
+
+
+@pytest.mark.asyncio
+async def test_page_payload_matches_response_model_encoding():
+    Base.metadata.create_all(bind=engine)
+    marker = f"payload-{uuid.uuid4().hex}"
+    async with AsyncSessionLocal() as db:
+        db.add_all([Vulnerability(title=marker, severity="high", cvss=7.5) for _ in range(3)])
+        await db.commit()
+
+        query = select(Vulnerability).where(Vulnerability.title == marker)
+        page = await fetch_page_payload(db, query, Vulnerability, VulnerabilityResponse, limit=2)
+        rows = await fetch_page(db, query, Vulnerability, limit=2)
+
+    # o corpo pré-codificado é o mesmo que o response_model produziria
+    expected = [VulnerabilityResponse.model_validate(v).model_dump(mode="json") for v in rows]
+    assert json.loads(page.body) == expected
+    assert decode_cursor(page.headers[NEXT_CURSOR_HEADER])[1] == rows[-1].id
+
+
+@pytest.mark.asyncio
+async def test_column_fast_path_matches_response_model_bytes():
+    Base.metadata.create_all(bind=engine)
+    marker = f"fast-{uuid.uuid4().hex}"
+    async with AsyncSessionLocal() as db:
+        user = User(username=marker[:30], email=f"{marker}@fast.test", hashed_password="x")
+        db.add(user)
+        await db.flush()
+        target = Target(name="t", host="fast.test", user_id=user.id)
+        db.add(target)
+        await db.flush()
+        db.add_all([
+            Vulnerability(title=marker, severity="critical", cvss=9.8, references=["https://a", "b"],
+                          description="aspas \" e acentuação", target_id=target.id, user_id=user.id,
+                          created_at=datetime(2031, 1, 1, 12, 0, 0, 5)),
+            Vulnerability(title=marker, severity="low", cvss=7.0, created_at=datetime(2031, 1, 1, 12)),
+            Vulnerability(title=marker, severity="medium"),
+        ])
+        db.add(Scan(name="s", target_id=target.id, user_id=user.id, scan_type="custom", status="running",
+                    started_at=datetime(2031, 1, 2)))
+        await db.commit()
+
+        for model, schema, where in (
+            (Vulnerability, VulnerabilityResponse, Vulnerability.title == marker),
+            (Scan, ScanResponse, Scan.target_id == target.id),
+        ):
+            slow = await fetch_page_payload(db, select(model).where(where), model, schema, limit=2)
+            fast = await fetch_rows_payload(db, select_schema(model, schema).where(where), model, limit=2)
+            assert fast.body == slow.body
+            assert fast.headers == slow.headers
@@ -0,0 +1,88 @@
+import uuid
+from types import SimpleNamespace
+
+import pytest
+import pytest_asyncio
+import redis.asyncio as redis
+from prometheus_client import CollectorRegistry, generate_latest
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.services.platform_metrics import (
+    DURATION_BUCKETS,
+    PlatformCollector,
+    ScanMetrics,
+    parse,
+    quantile,
+    summarize,
+)
+
+
+@pytest_asyncio.fixture
+async def metrics():
+    client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+    yield ScanMetrics(client, key=f"metrics:test:{uuid.uuid4().hex}")
+    await client.aclose()
+
+
+def _totals(**overrides):
+    values = dict(total_targets=12, active_scans=2, vulns_critical=1, vulns_high=2, vulns_medium=3, vulns_low=4)
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+def test_quantile_interpolates_within_bucket():
+    buckets = [(10.0, 0), (20.0, 10), (30.0, 20), (float("inf"), 20)]
+    assert quantile(0.5, buckets) == 20.0
+    assert quantile(0.75, buckets) == 25.0
+    assert quantile(0.5, [(10.0, 0), (float("inf"), 0)]) is None
+    # tudo acima do maior limite finito: devolve o limite
+    assert quantile(0.5, [(10.0, 0), (float("inf"), 5)]) == 10.0
+
+
+@pytest.mark.asyncio
+async def test_counters_feed_summary(metrics):
+    await metrics.started("dast")
+    await metrics.started("dast")
+    await metrics.finished("dast", "completed", 45.0, active=True)
+    await metrics.finished("scan", "completed", 100.0)
+    await metrics.finished("scan", "completed", 250.0)
+    await metrics.finished("scan", "failed", 10.0)
+    await metrics.finished("scan", "cancelled", None)
+
+    stats = parse(await metrics.raw())
+    assert stats["dast"]["active"] == 1
+    assert stats["scan"]["finished"] == {"completed": 2, "failed": 1, "cancelled": 1}
+    assert stats["scan"]["duration_count"] == 2  # só scans concluídos entram no histograma
+    assert len(stats["scan"]["buckets"]) == len(DURATION_BUCKETS)
+
+    summary = summarize(_totals(), stats)
+    assert summary["active_scans"] == 3
+    assert summary["scans"]["scan"]["active"] == 2  # mesmo valor de user_stats
+    assert summary["scans"]["dast"]["active"] == 1
+    assert summary["total_vulnerabilities"] == 10
+    assert summary["critical_vulnerabilities"] == 1
+    assert summary["scan_success_rate"] == 75.0
+    assert summary["scan_duration_seconds"]["mean"] == pytest.approx((45 + 100 + 250) / 3)
+    assert summary["average_scan_duration"] == "2m 12s"
+    assert 30 < summary["scan_duration_seconds"]["p50"] <= 120
+    assert 120 < summary["scan_duration_seconds"]["p95"] <= 300
+
+
+def test_summary_without_finished_scans():
+    summary = summarize(_totals(active_scans=0), parse({}))
+    assert summary["scan_success_rate"] is None
+    assert summary["average_scan_duration"] is None
+    assert summary["scan_duration_seconds"]["p95"] is None
+
+
+def test_collector_exports_gauges_and_histogram():
+    registry = CollectorRegistry()
+    registry.register(PlatformCollector(settings.REDIS_URL, SessionLocal))
+    text = generate_latest(registry).decode()
+    assert "securetflow_targets " in text
+    assert 'securetflow_vulnerabilities{severity="critical"}' in text
+    assert 'securetflow_scans_active{kind="dast"}' in text
+    assert 'securetflow_scans_finished_total{kind="scan",outcome="failed"}' in text
+    assert 'securetflow_scan_duration_seconds_bucket{kind="scan",le="+Inf"}' in text
+    assert 'securetflow_scan_duration_seconds_count{kind="dast"}' in text
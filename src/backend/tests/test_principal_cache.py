@@ -0,0 +1,119 @@
+import asyncio
+import uuid
+
+import pytest
+import redis.asyncio as redis
+from datetime import datetime
+from app.core.config import settings
+from app.core.principal import INVALIDATION_CHANNEL, Principal, PrincipalCache
+
+
+def _principal(**overrides):
+    data = {
+        "id": 1,
+        "username": "tester",
+        "email": "tester@example.com",
+        "role_id": 2,
+        "created_at": datetime(2025, 1, 1, 12, 0, 0),
+        "updated_at": datetime(2025, 1, 2, 12, 0, 0),
+    }
+    data.update(overrides)
+    return Principal(**data)
+
+
+def test_principal_json_roundtrip():
+    p = _principal(last_login=datetime(2025, 1, 3, 8, 30, 0))
+    assert Principal.from_json(p.to_json()) == p
+
+
+@pytest.mark.asyncio
+async def test_lru_hit_is_keyed_by_sub_and_version():
+    cache = PrincipalCache(redis_client=None, lru_size=8, lru_ttl=60)
+    p = _principal()
+    await cache.set("tester", 1, p)
+    assert await cache.get("tester", 1) is p
+    # Outra versão de token não reaproveita o principal
+    assert await cache.get("tester", 2) is None
+
+
+@pytest.mark.asyncio
+async def test_invalidate_drops_all_versions():
+    cache = PrincipalCache(redis_client=None, lru_size=8, lru_ttl=60)
+    await cache.set("tester", 1, _principal())
+    await cache.set("tester", 2, _principal())
+    await cache.set("other", 1, _principal(id=2, username="other"))
+    await cache.invalidate("tester")
+    assert await cache.get("tester", 1) is None
+    assert await cache.get("tester", 2) is None
+    assert await cache.get("other", 1) is not None
+
+
+@pytest.mark.asyncio
+async def test_lru_evicts_oldest_and_expires():
+    cache = PrincipalCache(redis_client=None, lru_size=2, lru_ttl=60)
+    for i in range(3):
+        await cache.set(f"u{i}", 1, _principal(id=i, username=f"u{i}"))
+    assert await cache.get("u0", 1) is None
+    assert await cache.get("u2", 1) is not None
+
+    expired = PrincipalCache(redis_client=None, lru_size=2, lru_ttl=-1)
+    await expired.set("tester", 1, _principal())
+    assert await expired.get("tester", 1) is None
+
+
+def _redis():
+    return redis.from_url(settings.REDIS_URL, decode_responses=True)
+
+
+@pytest.mark.asyncio
+async def test_invalidation_reaches_other_workers():
+    sub = f"user-{uuid.uuid4().hex}"
+    worker_a = PrincipalCache(_redis(), lru_size=8, lru_ttl=60)
+    worker_b = PrincipalCache(_redis(), lru_size=8, lru_ttl=60)
+    try:
+        await worker_a.set(sub, 1, _principal(username=sub))
+        assert await worker_a.get(sub, 2) is None  # miss: inicia o listener de invalidações
+        for _ in range(100):
+            if (await worker_b.redis.pubsub_numsub(INVALIDATION_CHANNEL))[0][1]:
+                break
+            await asyncio.sleep(0.01)
+
+        await worker_b.invalidate(sub)
+        for _ in range(100):
+            if (sub, 1) not in worker_a._lru:
+                break
+            await asyncio.sleep(0.01)
+        assert await worker_a.get(sub, 1) is None
+    finally:
+        await worker_a.close()
+        await worker_a.redis.aclose()
+        await worker_b.redis.aclose()
+
+
+@pytest.mark.asyncio
+async def test_set_from_read_older_than_invalidation_is_refused():
+    sub = f"user-{uuid.uuid4().hex}"
+    worker_a = PrincipalCache(_redis(), lru_size=8, lru_ttl=60)
+    worker_b = PrincipalCache(_redis(), lru_size=8, lru_ttl=60)
+    try:
+        generation = await worker_a.generation(sub)
+        # a role muda enquanto worker_a ainda lê o usuário antigo do banco
+        await worker_b.invalidate(sub)
+        await worker_a.set(sub, 1, _principal(username=sub), generation)
+        assert await worker_a.get(sub, 1) is None
+        assert await worker_b.get(sub, 1) is None
+
+        # leitura posterior à invalidação é cacheada normalmente
+        await worker_a.set(sub, 1, _principal(username=sub), await worker_a.generation(sub))
+        assert await worker_b.get(sub, 1) == _principal(username=sub)
+
+        # invalidação no mesmo processo durante a leitura
+        generation = await worker_a.generation(sub)
+        await worker_a.invalidate(sub)
+        await worker_a.set(sub, 1, _principal(username=sub), generation)
+        assert await worker_a.get(sub, 1) is None
+    finally:
+        await worker_a.close()
+        await worker_b.close()
+        await worker_a.redis.aclose()
+        await worker_b.redis.aclose()
@@ -0,0 +1,139 @@
+"""
+Regressão de planos: as queries quentes de endpoints/ não podem cair em seq scan.
+
+Popula um volume razoável de linhas dentro de uma transação (desfeita no fim),
+roda ANALYZE e inspeciona o EXPLAIN de cada formato de query. Funciona com o
+PostgreSQL (EXPLAIN FORMAT JSON) e com o SQLite (EXPLAIN QUERY PLAN).
+"""
+
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert, select, text
+
+from app.core.database import Base, engine, run_migrations
+from app.core.pagination import keyset
+from app.models import Report, Scan, Target, User
+from app.models.vulnerability import Vulnerability
+from app.services.dashboard_stats import counters_query, recent_scans_query, stats_query
+
+USERS = 200
+TARGETS = 4_000
+SCANS = 20_000
+VULNS = 60_000
+REPORTS = 4_000
+LIMIT = 100
+
+BASE = datetime(2024, 1, 1)
+CURSOR = (BASE + timedelta(minutes=5), 10)
+
+
+def _hot_queries(uid: int):
+    """Mesmos formatos de query emitidos pelos endpoints (com e sem cursor)"""
+    scans = select(Scan).where(Scan.user_id == uid)
+    vulns = select(Vulnerability)
+    reports = select(Report)
+    targets = select(Target).where(Target.user_id == uid)
+    return {
+        "scans.list": keyset(scans, Scan, LIMIT),
+        "scans.list.cursor": keyset(scans, Scan, LIMIT, after=CURSOR),
+        "scans.get": select(Scan).where(Scan.id == 5, Scan.user_id == uid),
+        "dashboard.stats": stats_query(uid),
+        "dashboard.counters": counters_query(uid),
+        "dashboard.recent_scans": recent_scans_query(uid),
+        "targets.list": keyset(targets, Target, LIMIT),
+        "targets.list.cursor": keyset(targets, Target, LIMIT, after=CURSOR),
+        "targets.by_host": select(Target.id).where(Target.user_id == uid, Target.host == "h7.test").order_by(Target.id).limit(1),
+        "vulns.list": keyset(vulns, Vulnerability, LIMIT),
+        "vulns.list.cursor": keyset(vulns, Vulnerability, LIMIT, after=CURSOR),
+        "vulns.by_severity": keyset(vulns.where(Vulnerability.severity == "critical"), Vulnerability, LIMIT, after=CURSOR),
+        "vulns.by_status": keyset(vulns.where(Vulnerability.status == "resolved"), Vulnerability, LIMIT, after=CURSOR),
+        "vulns.by_target": keyset(vulns.where(Vulnerability.target_id == 7), Vulnerability, LIMIT),
+        "vulns.by_fingerprint": select(Vulnerability.id).where(Vulnerability.fingerprint == "fp-7"),
+        "reports.list": keyset(reports, Report, LIMIT),
+        "reports.by_type": keyset(reports.where(Report.report_type == "audit"), Report, LIMIT),
+        "reports.by_scan": keyset(reports.where(Report.scan_id == 7), Report, LIMIT),
+        "users.list": keyset(select(User), User, LIMIT),
+        "users.login": select(User).where(User.username == "user7"),
+        "roles.in_use": select(User.username).where(User.role_id == 2),
+    }
+
+
+def _seed(conn) -> None:
+    severities = ("critical", "high", "medium", "low")
+    statuses = ("open", "open", "open", "in-progress", "resolved", "false-positive")
+    conn.execute(insert(User.__table__), [
+        {"username": f"user{i}", "email": f"user{i}@plan.test", "hashed_password": "x",
+         "role_id": 1 + i % 3, "created_at": BASE + timedelta(seconds=i)}
+        for i in range(1, USERS + 1)
+    ])
+    conn.execute(insert(Target.__table__), [
+        {"name": f"t{i}", "host": f"h{i}.test", "user_id": 1 + i % USERS, "created_at": BASE + timedelta(seconds=i)}
+        for i in range(1, TARGETS + 1)
+    ])
+    conn.execute(insert(Scan.__table__), [
+        {"name": f"s{i}", "scan_type": "web", "user_id": 1 + i % USERS, "target_id": 1 + i % TARGETS,
+         "status": "running" if i % 50 == 0 else "completed", "created_at": BASE + timedelta(seconds=i)}
+        for i in range(1, SCANS + 1)
+    ])
+    conn.execute(insert(Vulnerability.__table__), [
+        {"title": f"v{i}", "severity": severities[i % 4], "status": statuses[i % 6],
+         "target_id": 1 + i % TARGETS, "user_id": 1 + i % USERS, "fingerprint": f"fp-{i}", "created_at": BASE + timedelta(seconds=i)}
+        for i in range(1, VULNS + 1)
+    ])
+    conn.execute(insert(Report.__table__), [
+        {"title": f"r{i}", "report_type": ("vulnerability", "compliance", "audit", "custom")[i % 4],
+         "scan_id": 1 + i % SCANS, "created_at": BASE + timedelta(seconds=i)}
+        for i in range(1, REPORTS + 1)
+    ])
+    conn.execute(text("ANALYZE"))
+
+
+def _compile(conn, stmt):
+    compiled = stmt.compile(dialect=conn.dialect)
+    if compiled.positional:
+        return str(compiled), tuple(compiled.params[name] for name in compiled.positiontup)
+    return str(compiled), compiled.params
+
+
+def _seq_scans(conn, stmt):
+    """Tabelas lidas por varredura completa no plano da query"""
+    sql, params = _compile(conn, stmt)
+    if conn.dialect.name == "postgresql":
+        plan = conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + sql, params).scalar()
+        plan = json.loads(plan) if isinstance(plan, str) else plan
+        found, stack = [], [plan[0]["Plan"]]
+        while stack:
+            node = stack.pop()
+            if node.get("Node Type") == "Seq Scan":
+                found.append(node.get("Relation Name"))
+            stack.extend(node.get("Plans", []))
+        return found
+    rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + sql, params).all()
+    # "SCAN tabela" sem índice = varredura completa; "SEARCH"/"USING INDEX" = acesso por índice.
+    # SCAN de subquery materializada (ex.: os agregados do dashboard) não lê tabela.
+    return [
+        row[3] for row in rows
+        if row[3].startswith("SCAN") and "INDEX" not in row[3] and row[3].split()[1] in Base.metadata.tables
+    ]
+
+
+@pytest.fixture(scope="module")
+def seeded_conn():
+    if engine.dialect.name not in ("postgresql", "sqlite"):
+        pytest.skip(f"EXPLAIN não suportado para {engine.dialect.name}")
+    run_migrations()
+    with engine.connect() as conn:
+        trans = conn.begin()
+        try:
+            _seed(conn)
+            yield conn
+        finally:
+            trans.rollback()
+
+
+@pytest.mark.parametrize("name", sorted(_hot_queries(1)))
+def test_hot_query_uses_index(seeded_conn, name):
+    stmt = _hot_queries(uid=7)[name]
+    assert _seq_scans(seeded_conn, stmt) == [], f"{name} caiu em seq scan"
@@ -0,0 +1,102 @@
+import asyncio
+import time
+import uuid
+
+import pytest
+import pytest_asyncio
+import redis.asyncio as redis
+
+from app.core.auth import create_access_token
+from app.core.config import settings
+from app.core.rate_limit import Identities, RateLimiter, RouteTemplates, rule_for
+from app.main import app
+
+
+@pytest_asyncio.fixture
+async def client():
+    c = redis.from_url(settings.REDIS_URL, decode_responses=True)
+    yield c
+    await c.aclose()
+
+
+def _counting(limiter: RateLimiter) -> list:
+    calls = []
+    script = limiter._script
+
+    async def call(keys, args):
+        calls.append(args[3])  # admitidas localmente desde a última sincronização
+        return await script(keys=keys, args=args)
+
+    limiter._script = call
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_concurrent_hits_never_exceed_limit(client):
+    limiter = RateLimiter(client, local_fraction=0)
+    bucket = f"test:{uuid.uuid4().hex}"
+    decisions = await asyncio.gather(*(limiter.hit(bucket, "ip:1", 20, 60) for _ in range(100)))
+    assert sum(d.allowed for d in decisions) == 20
+    denied = next(d for d in decisions if not d.allowed)
+    assert denied.remaining == 0 and 1 <= denied.retry_after <= 60
+
+
+@pytest.mark.asyncio
+async def test_previous_window_weighs_on_current(client):
+    limiter = RateLimiter(client, local_fraction=0)
+    bucket, window = f"test:{uuid.uuid4().hex}", 3600
+    start = int(time.time() // window) * window
+    # janela anterior cheia: no início da janela atual quase todo o peso ainda conta
+    await client.set(f"rate_limit:{{{bucket}:ip:1}}:{start - window}", 10)
+    elapsed = (time.time() - start) / window
+    allowed = 0
+    for _ in range(10):
+        allowed += (await limiter.hit(bucket, "ip:1", 10, window)).allowed
+    assert allowed == int(10 - 10 * (1 - elapsed))
+
+
+@pytest.mark.asyncio
+async def test_local_precheck_batches_redis_calls(client):
+    limiter = RateLimiter(client, local_fraction=0.5, local_batch=8, sync_seconds=60)
+    calls = _counting(limiter)
+    bucket = f"test:{uuid.uuid4().hex}"
+
+    for _ in range(10):
+        assert (await limiter.hit(bucket, "user:a", 100, 60)).allowed
+    # 1a vai ao Redis, 8 admitidas localmente, a 10a sincroniza as 8 pendentes
+    assert calls == [0, 8]
+    start = int(time.time() // 60) * 60
+    assert int(await client.get(f"rate_limit:{{{bucket}:user:a}}:{start}")) == 10
+
+
+@pytest.mark.asyncio
+async def test_local_precheck_stops_near_the_limit(client):
+    limiter = RateLimiter(client, local_fraction=0.5, local_batch=100, sync_seconds=60)
+    calls = _counting(limiter)
+    bucket = f"test:{uuid.uuid4().hex}"
+    results = [(await limiter.hit(bucket, "user:a", 10, 60)).allowed for _ in range(12)]
+    assert results == [True] * 10 + [False] * 2
+    # acima de 50% do limite toda decisão passa pelo Redis
+    assert len(calls) == 8
+
+
+def test_route_templates_share_bucket_across_ids():
+    routes = RouteTemplates()
+
+    def scope(method, path):
+        return {"type": "http", "method": method, "path": path, "root_path": "", "app": app}
+
+    first = routes.resolve(scope("GET", "/api/v1/scans/1"))
+    assert first == routes.resolve(scope("GET", "/api/v1/scans/2")) == "/api/v1/scans/{scan_id}"
+    assert routes.resolve(scope("GET", "/does/not/exist")) is None
+    assert rule_for("POST", "/api/v1/scans/{scan_id}/start")[0] == "scans:write"
+    assert rule_for("GET", first) == (first, settings.RATE_LIMIT_PER_MINUTE, 60)
+    assert rule_for("GET", None)[0] == "unmatched"
+
+
+def test_identity_uses_verified_subject():
+    identities = Identities()
+    token = create_access_token({"sub": "alice"})
+    assert identities.resolve(f"Bearer {token}", "10.0.0.1") == "user:alice"
+    assert identities.resolve("Bearer forged.token.value", "10.0.0.1") == "ip:10.0.0.1"
+    assert identities.resolve(None, None) == "ip:unknown"